@@ -0,0 +1,83 @@
+"""Compare the legacy diff handling with the single-pass ParsedDiff.
+
+The legacy path parsed the diff into a PatchSet twice (added lines and context
+building) and regex-scanned the whole diff text once per new file. Needs the
+benchmark requirements (pip install -r benchmarks/requirements.txt). Run with:
+
+    python benchmarks/diff_parsing.py --lines 20000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from unidiff import PatchSet
+from github.parsed_diff import ParsedDiff
+from synthetic import diff_with_total_lines
+
+
+def legacy(diff):
+    """Replicate the pre-ParsedDiff work done per run."""
+    added = {}
+    for pfile in PatchSet(diff.splitlines(keepends=True)):
+        if pfile.is_removed_file:
+            continue
+        for hunk in pfile:
+            for line in hunk:
+                if line.is_added:
+                    added.setdefault(pfile.path, {})[line.target_line_no] = line.value.rstrip("\n\r")
+
+    patch_set = PatchSet(diff.splitlines(keepends=True))
+    for pfile in patch_set:
+        if not pfile.is_added_file:
+            continue
+        pattern = rf"^diff --git a/{re.escape(pfile.path)} b/{re.escape(pfile.path)}"
+        match = re.search(pattern, diff, re.MULTILINE)
+        start = match.start()
+        next_match = re.search(r"^diff --git", diff[start + 1:], re.MULTILINE)
+        section = diff[start:start + 1 + next_match.start()] if next_match else diff[start:]
+        "\n".join(line[1:] for line in section.split("\n") if line.startswith("+") and not line.startswith("+++"))
+    return added, patch_set
+
+
+def current(diff):
+    """Parse once and read everything from the index."""
+    parsed = ParsedDiff(diff)
+    for pfile in parsed:
+        if pfile.is_added_file:
+            "\n".join(pfile.added_lines.values())
+    return parsed
+
+
+def measure(func, diff):
+    """Return (seconds, peak bytes) for one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(diff)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=20000, help="approximate diff size in lines")
+    args = parser.parse_args()
+
+    diff = diff_with_total_lines(args.lines)
+    print(f"Diff: {len(diff.splitlines())} lines, {len(diff) / 1024:.0f} KiB")
+    print(f"{'approach':<12} {'time (s)':>10} {'peak (MiB)':>12}")
+    for name, func in (("legacy", legacy), ("ParsedDiff", current)):
+        elapsed, peak = measure(func, diff)
+        print(f"{name:<12} {elapsed:>10.3f} {peak / 2**20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
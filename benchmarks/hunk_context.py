@@ -0,0 +1,83 @@
+"""Scaling of PRHandler._get_diff_context on a single large hunk.
+
+The legacy implementation rebuilt and sorted the hunk's target lines for every
+added line (O(n^2 log n) per hunk); the current one slices a per-hunk index
+built once. Legacy totals are extrapolated from a sample of lines. Run with:
+
+    python benchmarks/hunk_context.py --sizes 100 1000 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from github.parsed_diff import ParsedDiff, LINE_ADDED, LINE_REMOVED
+from github.pr_handler import PRHandler
+from synthetic import generate_diff
+
+
+def legacy_diff_context(hunk, target_line, context_lines=10):
+    """The pre-index algorithm, kept here as the comparison baseline."""
+    context = []
+    target_lines = []
+    for line_type, line_no, value in hunk:
+        if line_type != LINE_REMOVED:
+            target_lines.append((line_no, value, line_type == LINE_ADDED))
+
+    target_lines.sort(key=lambda x: x[0] if x[0] is not None else 0)
+
+    target_idx = None
+    for i, (line_no, content, is_added) in enumerate(target_lines):
+        if line_no == target_line:
+            target_idx = i
+            break
+
+    if target_idx is not None:
+        start = max(0, target_idx - context_lines)
+        end = min(len(target_lines), target_idx + context_lines + 1)
+        for i in range(start, end):
+            line_no, content, is_added = target_lines[i]
+            prefix = ">>> " if line_no == target_line else "    "
+            context.append(f"{prefix}{line_no:4d}: {content}")
+
+    return "\n".join(context)
+
+
+def time_lines(func, hunk, line_nos):
+    """Seconds spent computing the context of each given line."""
+    start = time.perf_counter()
+    for line_no in line_nos:
+        func(hunk, line_no, 15)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--legacy-sample", type=int, default=300, help="lines timed for the legacy estimate")
+    args = parser.parse_args()
+
+    # The method does not touch instance state, so skip the event-file setup
+    handler = PRHandler.__new__(PRHandler)
+
+    print(f"{'added lines':>12} {'legacy (s)':>12} {'indexed (s)':>12} {'speedup':>9}")
+    for size in args.sizes:
+        diff = generate_diff(files=1, hunks=1, lines=size, new_file_ratio=0)
+        hunk = ParsedDiff(diff).files[0].hunks[0]
+        added = [line_no for line_type, line_no, _ in hunk if line_type == LINE_ADDED]
+
+        step = max(1, len(added) // args.legacy_sample)
+        sample = added[::step]
+        legacy = time_lines(legacy_diff_context, hunk, sample) * len(added) / len(sample)
+
+        hunk._index = None  # include the one-off index build in the measurement
+        indexed = time_lines(handler._get_diff_context, hunk, added)
+
+        print(f"{size:>12} {legacy:>12.3f} {indexed:>12.4f} {legacy / indexed:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
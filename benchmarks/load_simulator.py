@@ -0,0 +1,285 @@
+"""End-to-end load simulation of one review run against local mock servers.
+
+Generates a pull request (event, diff and head files), serves it from a mock
+GitHub API, answers the AI provider calls from mock provider APIs, and runs
+main.main() in a child process pointed at both. Reports wall time, the stage
+breakdown from the timing trace, the requests each mock served and the child's
+peak RSS. Run with:
+
+    python benchmarks/load_simulator.py --files 500 --provider claude --llm-latency 45
+    python benchmarks/load_simulator.py --provider claude,gemini --llm-error-rate 0.5 --env HEDGE_DELAY=5
+    python benchmarks/load_simulator.py --files 1000 --github-max-diff-files 300 --github-max-patch-lines 50
+    python benchmarks/load_simulator.py --output run.json
+    python benchmarks/load_simulator.py --baseline run.json [--threshold 0.25]
+
+Extra action settings are passed with --env NAME=VALUE. With --baseline the run
+fails when wall time or peak RSS grew by more than the threshold, or the action
+itself failed, so it can gate performance changes.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from github.parsed_diff import ParsedDiff
+from mock_servers import Behaviour, MockGitHub, MockProviders
+from synthetic import generate_diff, head_contents
+
+# Set in the child's environment: where the provider APIs are served
+PROVIDERS_URL_ENV = "SIMULATOR_PROVIDERS_URL"
+
+# Distinct placeholder credentials, so a recorded cassette can redact them without touching other text
+PROVIDER_ENV = {
+    "claude": {"CLAUDE_API_KEY": "sim-claude-key"},
+    "deepseek": {"DEEPSEEK_API_KEY": "sim-deepseek-key"},
+    "gemini": {"GEMINI_API_KEY": "sim-gemini-key"},
+    "openai": {"OPENAI_API_KEY": "sim-openai-key", "OPENAI_ASSISTANT_ID": "asst_simulated"},
+    "openai_compatible": {"OPENAI_COMPATIBLE_MODEL": "simulated-model"}
+}
+
+# Report entries compared against a baseline, and whether more is worse
+GATED_METRICS = ("wall_seconds", "peak_rss_mib")
+
+BASE_SHA = "0" * 40
+
+# Inputs that must match for a baseline comparison to mean anything
+KNOBS = (
+    "files", "hunks", "lines", "line_length", "new_file_ratio", "seed", "provider", "llm_latency", "llm_jitter",
+    "llm_error_rate", "llm_error_status", "github_latency", "github_error_rate", "github_max_diff_files",
+    "github_max_patch_lines", "comments", "comment_chars", "env"
+)
+
+
+def run_action():
+    """Child process: run the action with every provider's API base moved onto the mock server."""
+    from providers.provider_factory import ProviderFactory
+    import main
+
+    providers_url = os.environ[PROVIDERS_URL_ENV]
+    from mock_servers import PROVIDER_PREFIXES
+    create_named_provider = ProviderFactory.create_named_provider
+
+    def create_redirected(provider_name, config):
+        provider = create_named_provider(provider_name, config)
+        # Keep each provider's own path (and Gemini's model and key query) below the mock's prefix
+        for attr in ("base_url", "api_url"):
+            url = getattr(provider, attr, None)
+            if url:
+                setattr(provider, attr, re.sub(r"^https?://[^/]+", providers_url + PROVIDER_PREFIXES[provider_name], url))
+        return provider
+
+    ProviderFactory.create_named_provider = staticmethod(create_redirected)
+    main.main()
+
+
+def build_pull_request(args, workdir):
+    """Generate the diff, head contents and event file; return them with the added lines comments can target."""
+    diff = generate_diff(
+        files=args.files, hunks=args.hunks, lines=args.lines, line_length=args.line_length,
+        new_file_ratio=args.new_file_ratio, seed=args.seed
+    )
+    parsed_diff = ParsedDiff(diff)
+    contents = head_contents(parsed_diff, line_length=args.line_length, seed=args.seed)
+    targets = [(pfile.path, line_no) for pfile in parsed_diff for line_no in pfile.added_lines]
+
+    event_path = os.path.join(workdir, "event.json")
+    with open(event_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "action": "opened",
+            "number": 1,
+            "repository": {"full_name": "simulated/repo"},
+            "pull_request": {"head": {"sha": "f" * 40}, "base": {"sha": BASE_SHA}}
+        }, f)
+    return diff, contents, targets, event_path
+
+
+def child_environment(args, github, providers, event_path, trace_path):
+    """The action's environment: mocks, generated event, one key per selected provider, then --env overrides."""
+    names = [name.strip() for name in args.provider.split(",") if name.strip()]
+    env = {name: value for name, value in os.environ.items() if name != "GITHUB_STEP_SUMMARY"}
+    env.update({
+        "GITHUB_TOKEN": "sim-github-token",
+        "GITHUB_API_URL": github.url,
+        "GITHUB_EVENT_PATH": event_path,
+        "AI_PROVIDERS": ",".join(names),
+        "FRAMEWORK": args.framework,
+        "TRACE_FILE": trace_path,
+        PROVIDERS_URL_ENV: providers.url,
+        "PYTHONUNBUFFERED": "1"
+    })
+    for name in names:
+        if name not in PROVIDER_ENV:
+            raise SystemExit(f"Unknown provider {name}; choose from {', '.join(PROVIDER_ENV)}")
+        env.update(PROVIDER_ENV[name])
+    for setting in args.env:
+        name, _, value = setting.partition("=")
+        env[name] = value
+    return env
+
+
+def run_child(env, log_path):
+    """Run the action in a child process; return (exit status, wall seconds, peak RSS in MiB)."""
+    with open(log_path, "w", encoding="utf-8") as log:
+        started_at = time.monotonic()
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--run-action"], env=env,
+                                   stdout=log, stderr=subprocess.STDOUT)
+        # wait4 gives this child's own resource usage, including its peak RSS
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.monotonic() - started_at
+        process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak_rss = usage.ru_maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+    return process.returncode, wall, peak_rss
+
+
+def simulate(args):
+    """Run one simulated review and return the report document."""
+    with tempfile.TemporaryDirectory(prefix="load-sim-") as workdir:
+        diff, contents, targets, event_path = build_pull_request(args, workdir)
+        github = MockGitHub(diff, contents, behaviour=Behaviour(
+            latency=args.github_latency, error_rate=args.github_error_rate, error_status=429, retry_after=1,
+            seed=args.seed
+        ), max_diff_files=args.github_max_diff_files, max_patch_lines=args.github_max_patch_lines,
+            base_sha=BASE_SHA).start()
+        providers = MockProviders(targets, comments=args.comments, comment_chars=args.comment_chars, seed=args.seed,
+                                  behaviour=Behaviour(
+                                      latency=args.llm_latency, jitter=args.llm_jitter, error_rate=args.llm_error_rate,
+                                      error_status=args.llm_error_status, seed=args.seed
+                                  )).start()
+        trace_path = os.path.join(workdir, "trace.json")
+        log_path = args.log or os.path.join(workdir, "action.log")
+        try:
+            env = child_environment(args, github, providers, event_path, trace_path)
+            exit_code, wall, peak_rss = run_child(env, log_path)
+        finally:
+            github.stop()
+            providers.stop()
+
+        trace = {}
+        if os.path.exists(trace_path):
+            with open(trace_path, encoding="utf-8") as f:
+                trace = json.load(f)
+        if exit_code and not args.log:
+            with open(log_path, encoding="utf-8") as f:
+                print("".join(f.readlines()[-30:]))
+
+    summary = trace.get("summary", [])
+    posted = github.posted_reviews[-1] if github.posted_reviews else None
+    return {
+        "knobs": {knob: getattr(args, knob) for knob in KNOBS},
+        "input": {
+            "diff_kib": round(len(diff) / 1024, 1),
+            "files": len(contents),
+            "added_lines": len(targets)
+        },
+        "exit_code": exit_code,
+        "wall_seconds": round(wall, 3),
+        "peak_rss_mib": round(peak_rss, 1),
+        "stages": {entry["name"]: entry["total_seconds"] for entry in summary if entry["category"] == "stage"},
+        "calls": [entry for entry in summary if entry["category"] != "stage"],
+        "github_requests": github.stats,
+        "provider_requests": providers.stats,
+        "posted_comments": len(posted["comments"]) if posted else None
+    }
+
+
+def print_report(report):
+    print(f"Input: {report['input']['files']} files, {report['input']['added_lines']} added lines, "
+          f"{report['input']['diff_kib']} KiB diff")
+    print(f"Exit code: {report['exit_code']}")
+    print(f"Wall time: {report['wall_seconds']:.2f}s")
+    print(f"Peak RSS:  {report['peak_rss_mib']:.1f} MiB")
+    print(f"Review comments posted: {report['posted_comments']}")
+    if report["stages"]:
+        print(f"\n{'stage':<28} {'seconds':>9}")
+        for name, seconds in report["stages"].items():
+            print(f"{name:<28} {seconds:>9.2f}")
+    for title, counts in (("GitHub requests", report["github_requests"]), ("Provider requests", report["provider_requests"])):
+        if counts:
+            print(f"\n{title}: " + ", ".join(f"{route} {count}" for route, count in sorted(counts.items())))
+
+
+def compare(report, baseline, threshold):
+    """Print the gated metrics next to the baseline and return the ones that grew by more than threshold."""
+    regressions = []
+    print(f"\n{'metric':<16} {'baseline':>10} {'current':>10} {'change':>8}")
+    for metric in GATED_METRICS:
+        previous, current = baseline[metric], report[metric]
+        change = current / previous - 1 if previous else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(metric)
+            flag = "  REGRESSION"
+        print(f"{metric:<16} {previous:>10.2f} {current:>10.2f} {change:>+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--run-action", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--files", type=int, default=100, help="files in the pull request")
+    parser.add_argument("--hunks", type=int, default=3, help="hunks per modified file")
+    parser.add_argument("--lines", type=int, default=20, help="added lines per hunk")
+    parser.add_argument("--line-length", type=int, default=60, help="approximate characters per source line")
+    parser.add_argument("--new-file-ratio", type=float, default=0.2, help="fraction of files that are new")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--framework", default="react")
+    parser.add_argument("--provider", default="claude", help="provider, or a ranked comma-separated list to hedge")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="seconds before a provider answers")
+    parser.add_argument("--llm-jitter", type=float, default=0.0, help="extra random provider latency, up to this")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="fraction of provider requests that fail")
+    parser.add_argument("--llm-error-status", type=int, default=503, help="status of failed provider requests")
+    parser.add_argument("--github-latency", type=float, default=0.02, help="seconds per GitHub API request")
+    parser.add_argument("--github-error-rate", type=float, default=0.0,
+                        help="fraction of GitHub requests rate limited (429, Retry-After: 1)")
+    parser.add_argument("--github-max-diff-files", type=int,
+                        help="refuse the PR diff (406) above this many files, as GitHub does above 300")
+    parser.add_argument("--github-max-patch-lines", type=int,
+                        help="omit longer patches from the file listing, as GitHub does for large changes")
+    parser.add_argument("--comments", type=int, default=10, help="review comments per provider answer")
+    parser.add_argument("--comment-chars", type=int, default=200, help="length of each review comment")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE", help="extra action setting")
+    parser.add_argument("--log", help="write the action's output to this file")
+    parser.add_argument("--output", help="write the report to this JSON file")
+    parser.add_argument("--baseline", help="compare with this report and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed growth against the baseline")
+    args = parser.parse_args()
+
+    if args.run_action:
+        run_action()
+        return
+
+    report = simulate(args)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("knobs") != report["knobs"]:
+            print(f"\nBaseline was run with {baseline.get('knobs')}, this run used {report['knobs']}; "
+                  f"rerun with the same settings to compare")
+            sys.exit(2)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+    if report["exit_code"]:
+        sys.exit(report["exit_code"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Peak memory of context building and review as the PR grows.
+
+Runs the action's batched pipeline (fetch, metadata, context packing, message
+rendering and review) over synthetic diffs of increasing size, up to 5,000 files,
+with file contents generated on fetch and a provider that answers at once. The
+peak traced memory above the parsed diff itself is reported per size; the run
+fails when the largest PR needs more than the threshold above the smallest,
+i.e. when memory is no longer flat in the number of files. Run with:
+
+    python benchmarks/memory_scaling.py [--sizes 500 1000 2500 5000] [--batch-files 500]
+    python benchmarks/memory_scaling.py --unbatched   # also measure REVIEW_BATCH_FILES=0
+
+tests/test_memory_scaling.py runs smaller sizes (300 and 1,500 files) under pytest.
+
+The diff text and its parsed form are inputs and are not counted: they grow with
+the PR whatever the batch size.
+"""
+import argparse
+import contextlib
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from github.parsed_diff import ParsedDiff
+from prompts.prompt_factory import PromptFactory
+from review.sharded_review import ShardedReviewer
+from offline import OfflinePRHandler
+from synthetic import generate_diff, head_content
+
+MIB = 1024 * 1024
+
+# Allowed growth of the peak from the smallest to the largest PR
+GROWTH_THRESHOLD = 0.25
+
+
+class GeneratedContentHandler(OfflinePRHandler):
+    """Builds each head file when it is fetched, so contents cost memory only while in use."""
+
+    def _get_file_content(self, filepath, parsed_diff=None):
+        return head_content(parsed_diff.get(filepath))
+
+
+class InstantProvider:
+    """Provider stand-in that answers every review at once with one comment."""
+
+    model = "instant"
+
+    def __init__(self):
+        self.calls = 0
+        self.largest_request = 0
+
+    def review_code(self, message, system_prompt, stable_prefix=""):
+        self.calls += 1
+        self.largest_request = max(self.largest_request, len(stable_prefix) + len(message))
+        return {
+            "summary": {"confidence": 80, "risk_level": "Low", "reasoning": "Synthetic review"},
+            "comments": [{"file": "synthetic", "line": 1, "comment": "Synthetic comment"}]
+        }
+
+
+def measure(files, batch_files, token_budget, shards):
+    """Review a synthetic PR of the given size; return (peak MiB above the parsed diff, diff MiB, provider calls, seconds)."""
+    diff = generate_diff(files=files, hunks=2, lines=10, seed=files)
+    parsed_diff = ParsedDiff(diff)
+    handler = GeneratedContentHandler()
+    prompt = PromptFactory.create_prompt("react")
+    system_prompt = prompt.get_system_prompt()
+    provider = InstantProvider()
+    reviewer = ShardedReviewer(provider, prompt, shards=shards)
+
+    gc.collect()
+    start = time.monotonic()
+    tracemalloc.start()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            batches = handler.iter_context_batches(parsed_diff, token_budget=token_budget, batch_files=batch_files)
+            for structured_files in batches:
+                reviewer.add_batch(structured_files, system_prompt)
+                del structured_files
+            reviewer.result()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / MIB, len(diff) / MIB, provider.calls, time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2500, 5000], help="files per synthetic PR")
+    parser.add_argument("--batch-files", type=int, default=500, help="REVIEW_BATCH_FILES to run with")
+    parser.add_argument("--token-budget", type=int, default=100000, help="token budget of the whole PR")
+    parser.add_argument("--shards", type=int, default=1, help="REVIEW_SHARDS to run with")
+    parser.add_argument("--threshold", type=float, default=GROWTH_THRESHOLD,
+                        help="allowed growth of the peak from the smallest to the largest PR")
+    parser.add_argument("--unbatched", action="store_true", help="also measure every PR reviewed in one batch")
+    args = parser.parse_args()
+
+    sizes = sorted(args.sizes)
+    runs = [("batched", args.batch_files)]
+    if args.unbatched:
+        runs.append(("unbatched", 0))
+
+    print(f"{'files':>6} {'diff (MiB)':>11} {'mode':<10} {'peak (MiB)':>11} {'calls':>6} {'seconds':>8}")
+    peaks = {}
+    for files in sizes:
+        for mode, batch_files in runs:
+            peak, diff_mib, calls, seconds = measure(files, batch_files, args.token_budget, args.shards)
+            peaks[(mode, files)] = peak
+            print(f"{files:>6} {diff_mib:>11.1f} {mode:<10} {peak:>11.1f} {calls:>6} {seconds:>8.1f}")
+
+    smallest = peaks[("batched", sizes[0])]
+    largest = peaks[("batched", sizes[-1])]
+    growth = largest / smallest - 1 if smallest else 0.0
+    print(f"\nBatched peak grew {100 * growth:.0f}% from {sizes[0]} to {sizes[-1]} files "
+          f"(threshold {100 * args.threshold:.0f}%)")
+    if growth > args.threshold:
+        print("FAIL: peak memory grows with the number of files")
+        sys.exit(1)
+    print("OK: peak memory is flat in the number of files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""Local HTTP stand-ins for the GitHub REST API and the AI provider APIs.
+
+MockGitHub answers the endpoints PRHandler calls; MockProviders answers the
+Claude, DeepSeek, Gemini, OpenAI assistants and OpenAI-compatible endpoints,
+routed by a path prefix (see PROVIDER_PREFIXES). Both take a Behaviour with
+latency, error rate and, for providers, response size.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+# Path prefix on MockProviders for each provider's API base
+PROVIDER_PREFIXES = {
+    "claude": "/anthropic",
+    "deepseek": "/deepseek",
+    "gemini": "/gemini",
+    "openai": "/openai",
+    "openai_compatible": "/compatible"
+}
+
+
+class Behaviour:
+    """
+    How a mock server misbehaves.
+
+    Args:
+        latency (float): Seconds before each answer (for providers: before the review is returned)
+        jitter (float): Extra random latency, uniform between 0 and this many seconds
+        error_rate (float): Fraction of requests answered with error_status
+        error_status (int): Status code of the injected errors
+        retry_after (float): Retry-After header sent with injected errors, if set
+        seed (int): Random seed, so runs are reproducible
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, retry_after=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        with self._lock:
+            return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def fails(self):
+        with self._lock:
+            return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+
+class MockServer:
+    """Serves a request handler class on a free local port from a daemon thread."""
+
+    handler_class = None
+
+    def __init__(self, behaviour=None):
+        self.behaviour = behaviour or Behaviour()
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+        # Handlers reach the server object through a class attribute
+        handler = type(self.handler_class.__name__, (self.handler_class,), {"mock": self})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def count(self, key):
+        """Count a request under a route name; the counts end up in the simulator report."""
+        with self._stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Shared plumbing: keep-alive responses, latency and injected errors."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; with Nagle's algorithm each keep-alive
+    # response would wait for the client's delayed ACK (~40 ms), swamping what is measured
+    disable_nagle_algorithm = True
+    mock = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        try:
+            self.route(method, unquote(url.path), parse_qs(url.query), body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (timeout, or a hedged request that lost the race)
+            self.close_connection = True
+
+    def route(self, method, path, query, body):
+        raise NotImplementedError
+
+    def simulate(self, route):
+        """Count the request, wait out the latency and maybe inject an error; False if an error was sent."""
+        self.mock.count(route)
+        behaviour = self.mock.behaviour
+        time.sleep(behaviour.delay())
+        if not behaviour.fails():
+            return True
+        self.mock.count(f"{route} (error {behaviour.error_status})")
+        headers = {}
+        if behaviour.retry_after is not None:
+            headers["Retry-After"] = str(behaviour.retry_after)
+        self.respond(behaviour.error_status, {"message": "Injected error"}, headers=headers)
+        return False
+
+    def respond(self, status, body, content_type="application/json", headers=None):
+        if not isinstance(body, (str, bytes)):
+            body = json.dumps(body)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream(self, events):
+        """Send (event, data) pairs as server-sent events, ending the response by closing the connection."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for event, data in events:
+            chunk = f"event: {event}\n" if event else ""
+            chunk += f"data: {data if isinstance(data, str) else json.dumps(data)}\n\n"
+            self.wfile.write(chunk.encode("utf-8"))
+            self.wfile.flush()
+        self.close_connection = True
+
+
+class _GitHubHandler(_Handler):
+    """The REST endpoints used by PRHandler, for one repository and pull request."""
+
+    PULL_RE = re.compile(r"^/repos/[^/]+/[^/]+/pulls/(\d+)(/reviews|/files)?$")
+    CONTENTS_RE = re.compile(r"^/repos/[^/]+/[^/]+/contents/(.+)$")
+    BLOB_RE = re.compile(r"^/repos/[^/]+/[^/]+/git/blobs/([0-9a-f]+)$")
+    COMPARE_RE = re.compile(r"^/repos/[^/]+/[^/]+/compare/")
+
+    def route(self, method, path, query, body):
+        mock = self.mock
+        pull = self.PULL_RE.match(path)
+        contents = self.CONTENTS_RE.match(path)
+        blob = self.BLOB_RE.match(path)
+
+        if method == "POST" and pull and pull.group(2) == "/reviews":
+            if self.simulate("POST reviews"):
+                mock.posted_reviews.append(json.loads(body))
+                self.respond(200, {"id": len(mock.posted_reviews)})
+        elif method != "GET":
+            self.respond(404, {"message": "Not Found"})
+        elif pull and pull.group(2) is None:
+            if self.simulate("GET pull diff"):
+                if mock.max_diff_files is not None and len(mock.files) > mock.max_diff_files:
+                    # What GitHub answers when a PR is too large for a single diff
+                    self.respond(406, {
+                        "message": f"Sorry, the diff exceeded the maximum number of files ({mock.max_diff_files}).",
+                        "errors": [{"resource": "PullRequest", "field": "diff", "code": "too_large"}]
+                    })
+                else:
+                    self.respond(200, mock.diff, "text/x-diff")
+        elif pull and pull.group(2) == "/reviews":
+            if self.simulate("GET reviews"):
+                self._paginated(path, query, mock.reviews)
+        elif pull and pull.group(2) == "/files":
+            if self.simulate("GET files"):
+                self._paginated(path, query, mock.files)
+        elif blob:
+            if self.simulate("GET blob"):
+                content = mock.blobs.get(blob.group(1))
+                if content is None:
+                    self.respond(404, {"message": "Not Found"})
+                else:
+                    self.respond(200, content, "application/vnd.github.raw")
+        elif contents:
+            if self.simulate("GET contents"):
+                # Only the head is known; earlier revisions of a file are not served
+                content = mock.contents.get(contents.group(1))
+                if mock.base_sha and query.get("ref", [None])[0] == mock.base_sha:
+                    content = None
+                if content is None:
+                    self.respond(404, {"message": "Not Found"})
+                else:
+                    self.respond(200, content, "application/vnd.github.raw")
+        elif self.COMPARE_RE.match(path):
+            # No commit history behind the simulated PR
+            self.simulate("GET compare")
+            self.respond(404, {"message": "Not Found"})
+        else:
+            self.respond(404, {"message": "Not Found"})
+
+    def _paginated(self, path, query, items):
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        start = (page - 1) * per_page
+        headers = {}
+        if start + per_page < len(items):
+            last_page = (len(items) + per_page - 1) // per_page
+            headers["Link"] = (f'<{self.mock.url}{path}?per_page={per_page}&page={page + 1}>; rel="next", '
+                               f'<{self.mock.url}{path}?per_page={per_page}&page={last_page}>; rel="last"')
+        self.respond(200, items[start:start + per_page], headers=headers)
+
+
+class MockGitHub(MockServer):
+    """
+    GitHub REST API for one pull request.
+
+    Args:
+        diff (str): Unified diff served for the pull request; also split into the
+            pulls/{n}/files listing with per-file patches
+        contents (dict): Head file contents by path; other paths answer 404
+        reviews (list): Existing reviews of the pull request
+        behaviour (Behaviour): Latency and injected errors
+        max_diff_files (int): Refuse the single-document diff (406) for PRs with more
+            files, as GitHub does above 300
+        max_patch_lines (int): Leave the patch out of the file listing for files whose
+            patch is longer, as GitHub does for large changes
+        base_sha (str): Base commit of the pull request; contents at this ref answer 404
+    """
+
+    handler_class = _GitHubHandler
+
+    def __init__(self, diff, contents, reviews=None, behaviour=None, max_diff_files=None, max_patch_lines=None,
+                 base_sha=None):
+        super().__init__(behaviour)
+        self.diff = diff
+        self.contents = contents
+        self.reviews = reviews or []
+        self.max_diff_files = max_diff_files
+        self.base_sha = base_sha
+        self.blobs = {}
+        for content in contents.values():
+            self.blobs[hashlib.sha1(content.encode("utf-8")).hexdigest()] = content
+        self.files = self._list_files(diff, max_patch_lines)
+        self.posted_reviews = []
+
+    def _list_files(self, diff, max_patch_lines):
+        """The pulls/{n}/files entries of the diff's file sections."""
+        files = []
+        for section in re.split(r"^(?=diff --git )", diff, flags=re.MULTILINE):
+            path = re.search(r"^\+\+\+ b/(.+)$", section, re.MULTILINE) or re.search(r"^--- a/(.+)$", section, re.MULTILINE)
+            if path is None:
+                continue
+            hunks = section.find("\n@@")
+            patch = section[hunks + 1:].rstrip("\n") if hunks != -1 else ""
+            lines = patch.splitlines()
+            content = self.contents.get(path.group(1))
+            entry = {
+                "filename": path.group(1),
+                "status": "added" if "\nnew file mode" in section else
+                          "removed" if "\ndeleted file mode" in section else "modified",
+                "sha": hashlib.sha1(content.encode("utf-8")).hexdigest() if content is not None else None,
+                "additions": sum(1 for line in lines if line.startswith("+")),
+                "deletions": sum(1 for line in lines if line.startswith("-")),
+            }
+            entry["changes"] = entry["additions"] + entry["deletions"]
+            if patch and (max_patch_lines is None or len(lines) <= max_patch_lines):
+                entry["patch"] = patch
+            files.append(entry)
+        return files
+
+
+class _ProviderHandler(_Handler):
+    """The review endpoints of every provider, under their PROVIDER_PREFIXES."""
+
+    def route(self, method, path, query, body):
+        mock = self.mock
+        request = json.loads(body) if body else {}
+        prefix = "/" + path.split("/", 2)[1]
+
+        if method == "POST" and prefix == PROVIDER_PREFIXES["claude"]:
+            if self.simulate("claude messages"):
+                self._claude(request, len(body))
+        elif method == "POST" and path.endswith("/chat/completions"):
+            if self.simulate(f"{prefix[1:]} chat/completions"):
+                self._chat_completion(request, len(body))
+        elif method == "POST" and prefix == PROVIDER_PREFIXES["gemini"]:
+            if self.simulate("gemini generateContent"):
+                text = mock.review_text()
+                self.respond(200, {
+                    "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}],
+                    "usageMetadata": {"promptTokenCount": len(body) // 4, "candidatesTokenCount": len(text) // 4}
+                })
+        elif prefix == PROVIDER_PREFIXES["openai"]:
+            self._assistants(method, path, len(body))
+        else:
+            self.respond(404, {"error": {"message": f"No mock for {method} {path}"}})
+
+    def _claude(self, request, request_bytes):
+        text = self.mock.review_text()
+        usage = {"input_tokens": request_bytes // 4, "output_tokens": len(text) // 4}
+        if not request.get("stream"):
+            self.respond(200, {"content": [{"type": "text", "text": text}], "usage": usage})
+            return
+        events = [("message_start", {"type": "message_start", "message": {"usage": {**usage, "output_tokens": 1}}})]
+        events += [
+            ("content_block_delta", {"type": "content_block_delta", "delta": {"type": "text_delta", "text": piece}})
+            for piece in self.mock.pieces(text)
+        ]
+        events += [
+            ("message_delta", {"type": "message_delta", "usage": {"output_tokens": usage["output_tokens"]}}),
+            ("message_stop", {"type": "message_stop"})
+        ]
+        self.stream(events)
+
+    def _chat_completion(self, request, request_bytes):
+        text = self.mock.review_text()
+        usage = {"prompt_tokens": request_bytes // 4, "completion_tokens": len(text) // 4}
+        if not request.get("stream"):
+            self.respond(200, {"choices": [{"message": {"role": "assistant", "content": text}}], "usage": usage})
+            return
+        events = [(None, {"choices": [{"delta": {"content": piece}}]}) for piece in self.mock.pieces(text)]
+        events += [(None, {"choices": [], "usage": usage}), (None, "[DONE]")]
+        self.stream(events)
+
+    def _assistants(self, method, path, request_bytes):
+        """Threads and runs; a run completes once the configured latency has passed since it was created."""
+        mock = self.mock
+        parts = path.split("/")[3:]  # after /openai/v1
+        if method == "POST" and parts == ["threads"]:
+            mock.count("openai threads")
+            thread_id = mock.new_id("thread")
+            mock.threads[thread_id] = {"prompt_bytes": request_bytes, "text": None}
+            self.respond(200, {"id": thread_id})
+        elif method == "POST" and len(parts) == 3 and parts[2] == "runs":
+            if not self.simulate_error_only("openai runs"):
+                return
+            run_id = mock.new_id("run")
+            mock.runs[run_id] = {"thread": parts[1], "done_at": time.monotonic() + mock.behaviour.delay()}
+            self.respond(200, self._run(run_id))
+        elif method == "GET" and len(parts) == 3 and parts[2] == "runs":
+            mock.count("openai run list")
+            runs = [self._run(run_id) for run_id, run in mock.runs.items() if run["thread"] == parts[1]]
+            self.respond(200, {"data": runs[::-1]})
+        elif method == "GET" and len(parts) == 4 and parts[2] == "runs":
+            mock.count("openai run status")
+            self.respond(200, self._run(parts[3]))
+        elif method == "POST" and len(parts) == 5 and parts[4] == "cancel":
+            mock.count("openai run cancel")
+            self.respond(200, {"id": parts[3], "status": "cancelling"})
+        elif method == "GET" and len(parts) == 3 and parts[2] == "messages":
+            mock.count("openai messages")
+            text = mock.threads[parts[1]]["text"] or ""
+            self.respond(200, {"data": [
+                {"role": "user", "content": []},
+                {"role": "assistant", "content": [{"type": "text", "text": {"value": text}}]}
+            ]})
+        else:
+            self.respond(404, {"error": {"message": f"No mock for {method} {path}"}})
+
+    def simulate_error_only(self, route):
+        """Like simulate(), without the latency: assistant runs take their time in the background."""
+        self.mock.count(route)
+        behaviour = self.mock.behaviour
+        if not behaviour.fails():
+            return True
+        self.mock.count(f"{route} (error {behaviour.error_status})")
+        headers = {"Retry-After": str(behaviour.retry_after)} if behaviour.retry_after is not None else {}
+        self.respond(behaviour.error_status, {"error": {"message": "Injected error"}}, headers=headers)
+        return False
+
+    def _run(self, run_id):
+        mock = self.mock
+        run = mock.runs[run_id]
+        if time.monotonic() < run["done_at"]:
+            return {"id": run_id, "status": "in_progress"}
+        thread = mock.threads[run["thread"]]
+        if thread["text"] is None:
+            thread["text"] = mock.review_text()
+        return {
+            "id": run_id,
+            "status": "completed",
+            "usage": {"prompt_tokens": thread["prompt_bytes"] // 4, "completion_tokens": len(thread["text"]) // 4}
+        }
+
+
+class MockProviders(MockServer):
+    """
+    Every provider's API on one server.
+
+    Args:
+        targets (list): (path, line) pairs of added lines that review comments point at
+        comments (int): Review comments per answer
+        comment_chars (int): Length of each comment body, to scale the response size
+        stream_chunk_chars (int): Text per streamed event
+        behaviour (Behaviour): Latency and injected errors
+    """
+
+    handler_class = _ProviderHandler
+
+    def __init__(self, targets, comments=5, comment_chars=200, stream_chunk_chars=40, behaviour=None, seed=0):
+        super().__init__(behaviour)
+        self.targets = targets
+        self.comments = comments
+        self.comment_chars = comment_chars
+        self.stream_chunk_chars = stream_chunk_chars
+        self.threads = {}
+        self.runs = {}
+        self._rng = random.Random(seed)
+        self._ids = 0
+        self._id_lock = threading.Lock()
+
+    def new_id(self, kind):
+        with self._id_lock:
+            self._ids += 1
+            return f"{kind}_{self._ids}"
+
+    def review_text(self):
+        """A review answer in the format the prompts ask for."""
+        with self._id_lock:
+            picks = [self._rng.choice(self.targets) for _ in range(self.comments)] if self.targets else []
+        body = ("Consider handling the failure case here. " * (self.comment_chars // 41 + 1))[:self.comment_chars]
+        return json.dumps({
+            "summary": {"confidence": 82, "risk_level": "Low risk", "reasoning": "Simulated review"},
+            "comments": [{"file": path, "line": line, "comment": body} for path, line in picks]
+        })
+
+    def pieces(self, text):
+        size = max(1, self.stream_chunk_chars)
+        return [text[i:i + size] for i in range(0, len(text), size)]
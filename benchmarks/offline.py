@@ -0,0 +1,40 @@
+"""Helpers for running PRHandler against in-memory data instead of GitHub."""
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from github.pr_handler import PRHandler
+
+
+def write_event(pr_number=1, repo="synthetic/repo", head_sha="synthetic-head", base_sha="synthetic-base", action="opened"):
+    """Write a minimal pull_request event file and point GITHUB_EVENT_PATH at it."""
+    event = {
+        "action": action,
+        "number": pr_number,
+        "repository": {"full_name": repo},
+        "pull_request": {"head": {"sha": head_sha}, "base": {"sha": base_sha}},
+    }
+    handle, path = tempfile.mkstemp(prefix="event-", suffix=".json")
+    with os.fdopen(handle, "w") as f:
+        json.dump(event, f)
+    os.environ["GITHUB_EVENT_PATH"] = path
+    return path
+
+
+class OfflinePRHandler(PRHandler):
+    """PRHandler that serves head file contents from a dict instead of the GitHub API."""
+
+    def __init__(self, file_contents=None, **kwargs):
+        if not os.environ.get("GITHUB_EVENT_PATH"):
+            write_event()
+        super().__init__("offline-token", **kwargs)
+        self.file_contents = file_contents or {}
+
+    def _get_file_content(self, filepath, parsed_diff=None):
+        content = self.file_contents.get(filepath)
+        if content is None and parsed_diff is not None:
+            return self._reconstruct_file_from_diff(filepath, parsed_diff)
+        return content
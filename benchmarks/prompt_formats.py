@@ -0,0 +1,71 @@
+"""Prompt size and provider latency of each full-file format on the same PR.
+
+Builds the review message in the "standard" and "annotated" FULL_FILE_FORMAT
+for one diff and reports its size. With --send, each message is also sent to
+the provider configured in the environment (the same variables the action
+uses) and the end-to-end latency is reported. Run with:
+
+    python benchmarks/prompt_formats.py --diff pr.diff [--send]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from github.parsed_diff import ParsedDiff
+from prompts.prompt_factory import PromptFactory
+from utils.helpers import estimate_tokens
+from offline import OfflinePRHandler
+from synthetic import generate_diff, head_contents
+
+FORMATS = ("standard", "annotated")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--diff", help="unified diff file (default: synthetic diff)")
+    parser.add_argument("--files", type=int, default=20, help="synthetic diff: number of files")
+    parser.add_argument("--framework", default="react")
+    parser.add_argument("--send", action="store_true", help="send each message to the configured provider")
+    args = parser.parse_args()
+
+    if args.diff:
+        with open(args.diff) as f:
+            diff = f.read()
+    else:
+        diff = generate_diff(files=args.files, hunks=3, lines=15)
+
+    parsed_diff = ParsedDiff(diff)
+    handler = OfflinePRHandler(head_contents(parsed_diff))
+    structured_files = handler.process_diff_with_enhanced_context(parsed_diff)
+    prompt = PromptFactory.create_prompt(args.framework)
+    system_prompt = prompt.get_system_prompt()
+
+    provider = None
+    if args.send:
+        from config.settings import Config
+        from providers.provider_factory import ProviderFactory
+        provider = ProviderFactory.create_provider(Config())
+
+    rows = []
+    for full_file_format in FORMATS:
+        stable_prefix, message = prompt.create_enhanced_review_message(structured_files, full_file_format=full_file_format)
+        latency = None
+        if provider:
+            start = time.monotonic()
+            provider.review_code(message, system_prompt, stable_prefix=stable_prefix)
+            latency = time.monotonic() - start
+        chars = len(stable_prefix) + len(message)
+        rows.append((full_file_format, chars, estimate_tokens(chars), latency))
+
+    print(f"\n{'format':<10} {'chars':>10} {'~tokens':>10} {'latency (s)':>12}")
+    for full_file_format, chars, tokens, latency in rows:
+        latency_text = f"{latency:.1f}" if latency is not None else "-"
+        print(f"{full_file_format:<10} {chars:>10} {tokens:>10} {latency_text:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Replay a recorded review run offline and split its time into CPU and network.
+
+Record a run by setting HTTP_CASSETTE (and optionally HTTP_CASSETTE_MODE=record)
+in the action's environment, then replay the cassette here. Each replay runs
+src/main.py in a child process with the recorded event and settings; nothing is
+sent to GitHub or the providers. Run with:
+
+    python benchmarks/replay.py run.cassette.json [--timing original zero] [--repeat 3]
+
+"original" timing reproduces the recorded server delays; "zero" answers every
+request at once, so its wall time is the action's own cost on that real PR.
+
+A replay that sends a request the cassette has no response for fails (exit 1),
+and its timings are not reported as a split. Runs recorded under
+load_simulator.py cannot be replayed: the simulator moves the provider APIs onto
+its mock server inside its own child process, so a replay calls the real
+provider URLs, which were never recorded.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MAIN = os.path.join(os.path.dirname(__file__), "..", "src", "main.py")
+
+# Validation needs a credential for each provider; replay never sends them anywhere
+PLACEHOLDER_CREDENTIALS = {
+    "GITHUB_TOKEN": "replay",
+    "OPENAI_API_KEY": "replay",
+    "CLAUDE_API_KEY": "replay",
+    "GEMINI_API_KEY": "replay",
+    "DEEPSEEK_API_KEY": "replay"
+}
+
+# Settings of the current shell that would change what a replay does
+IGNORED_SETTINGS = ("GITHUB_STEP_SUMMARY", "REVIEW_CACHE_DIR", "CONTENT_CACHE_PATH", "USAGE_LEDGER", "TRACE_FILE")
+
+
+def replay_once(cassette_path, document, timing, workdir, verbose):
+    """Replay the cassette in a child process; return wall seconds, CPU seconds, peak RSS (MiB) and exit code."""
+    event_path = os.path.join(workdir, "event.json")
+    with open(event_path, "w", encoding="utf-8") as f:
+        json.dump(document["event"], f)
+
+    env = {name: value for name, value in os.environ.items() if name not in IGNORED_SETTINGS}
+    env.update(PLACEHOLDER_CREDENTIALS)
+    env.update(document.get("settings", {}))
+    env.update({
+        "GITHUB_EVENT_PATH": event_path,
+        "HTTP_CASSETTE": os.path.abspath(cassette_path),
+        "HTTP_CASSETTE_MODE": "replay",
+        "REPLAY_TIMING": timing,
+        "PYTHONUNBUFFERED": "1"
+    })
+
+    started_at = time.monotonic()
+    process = subprocess.Popen([sys.executable, MAIN], env=env, stdout=None if verbose else subprocess.DEVNULL,
+                               stderr=subprocess.STDOUT)
+    # wait4 gives this child's own CPU time and peak RSS
+    _, status, usage = os.wait4(process.pid, 0)
+    wall = time.monotonic() - started_at
+    process.returncode = os.waitstatus_to_exitcode(status)
+    peak_rss = usage.ru_maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+    return wall, usage.ru_utime + usage.ru_stime, peak_rss, process.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cassette", help="cassette recorded with HTTP_CASSETTE")
+    parser.add_argument("--timing", nargs="+", choices=("original", "zero"), default=["original", "zero"])
+    parser.add_argument("--repeat", type=int, default=1, help="replays per timing; the median is reported")
+    parser.add_argument("--verbose", action="store_true", help="show the action's output")
+    args = parser.parse_args()
+
+    with open(args.cassette, encoding="utf-8") as f:
+        document = json.load(f)
+    if not document.get("event"):
+        sys.exit(f"{args.cassette} has no recorded GitHub event to replay")
+
+    interactions = document["interactions"]
+    received = sum(len(interaction.get("body", "")) for interaction in interactions)
+    sent = sum(interaction.get("request_bytes", 0) for interaction in interactions)
+    print(f"Cassette: {len(interactions)} interaction(s) recorded {document.get('recorded_at')}, "
+          f"{sent / 1024:.0f} KiB sent, {received / 1024:.0f} KiB received")
+    print(f"Settings: {document.get('settings', {})}\n")
+
+    results = {}
+    failed = False
+    print(f"{'timing':<10} {'wall (s)':>9} {'cpu (s)':>9} {'peak RSS (MiB)':>15} {'exit':>5}")
+    with tempfile.TemporaryDirectory(prefix="replay-") as workdir:
+        for timing in args.timing:
+            runs = [replay_once(args.cassette, document, timing, workdir, args.verbose) for _ in range(args.repeat)]
+            wall = statistics.median(run[0] for run in runs)
+            cpu = statistics.median(run[1] for run in runs)
+            peak_rss = max(run[2] for run in runs)
+            exit_code = max(run[3] for run in runs)
+            results[timing] = wall
+            print(f"{timing:<10} {wall:>9.2f} {cpu:>9.2f} {peak_rss:>15.1f} {exit_code:>5}")
+            failed = failed or exit_code != 0
+
+    if failed:
+        # A miss means the action took another path than the recorded run, so its times are not comparable
+        hint = "" if args.verbose else "; rerun with --verbose for the requests that had no recording"
+        sys.exit(f"\nReplay failed (non-zero exit){hint}")
+
+    if "original" in results and "zero" in results:
+        network = results["original"] - results["zero"]
+        print(f"\nNetwork and server time: {network:.2f}s of {results['original']:.2f}s "
+              f"({100 * network / results['original']:.0f}%); action's own time: {results['zero']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
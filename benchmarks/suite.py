@@ -0,0 +1,248 @@
+"""Micro-benchmarks for the pure-Python hot paths of a review run.
+
+Times diff parsing, file metadata extraction, diff context lookup, review message
+rendering and assistant message chunking on synthetic input. Results can be written
+to JSON and compared with a stored baseline; the run fails when a benchmark got
+slower than the baseline by more than the threshold. Run with:
+
+    python benchmarks/suite.py [--files 200 --hunks 3 --lines 20 --line-length 60]
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json [--threshold 0.25]
+    python benchmarks/suite.py --update-baseline
+
+Timings are also stored relative to a fixed calibration loop timed in the same
+run, and baselines are compared on those relative numbers, so a baseline recorded
+on one machine stays usable on a faster or slower one.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from github.parsed_diff import LINE_ADDED
+from prompts.prompt_factory import PromptFactory
+from providers.openai_provider import OpenAIProvider
+from offline import OfflinePRHandler
+from synthetic import generate_diff, head_contents
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Baselines are only comparable for input generated with the same knobs
+KNOBS = ("files", "hunks", "lines", "line_length", "new_file_ratio", "seed")
+
+
+def calibrate():
+    """Time a fixed pure-Python workload used as the unit of the relative timings."""
+    def workload():
+        total = 0
+        parts = []
+        for i in range(200_000):
+            total += i % 7
+            if i % 50 == 0:
+                parts.append(str(total))
+        return "".join(parts)
+    return measure(workload, repeat=5)["min_seconds"]
+
+
+def measure(func, repeat):
+    """Call func repeat times; return the best and median wall time."""
+    samples = []
+    # Like timeit: a collection triggered by an earlier run's garbage is not the code under test
+    enabled = gc.isenabled()
+    try:
+        for _ in range(repeat):
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+            gc.enable()
+    finally:
+        if enabled:
+            gc.enable()
+    return {"min_seconds": min(samples), "median_seconds": statistics.median(samples)}
+
+
+def quiet(func, *args, **kwargs):
+    """Call func with its progress prints swallowed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def build_cases(args):
+    """
+    Prepare the inputs once and return (name, description, callable) benchmark cases.
+
+    Only the timed callables run during measurement; parsing and context building
+    needed as input by later cases happen here.
+    """
+    diff = generate_diff(
+        files=args.files, hunks=args.hunks, lines=args.lines, line_length=args.line_length,
+        new_file_ratio=args.new_file_ratio, seed=args.seed
+    )
+    handler = OfflinePRHandler()
+    parsed_diff = handler.parse_diff(diff)
+    contents = head_contents(parsed_diff, line_length=args.line_length, seed=args.seed)
+    handler.file_contents = contents
+
+    hunk_targets = [
+        (hunk, line_no)
+        for pfile in parsed_diff
+        for hunk in pfile
+        for line_type, line_no, _ in hunk
+        if line_type == LINE_ADDED
+    ]
+
+    structured_files = quiet(handler.process_diff_with_enhanced_context, parsed_diff)
+    prompt = PromptFactory.create_prompt("react")
+    stable_prefix, message = prompt.create_enhanced_review_message(structured_files)
+
+    # The chunker only splits sections above its limit; size it to force a few parts
+    assistant = OpenAIProvider.__new__(OpenAIProvider)
+    chunk_size = max(len(stable_prefix + message) // 8, 2_000)
+
+    def parse():
+        handler.parse_diff(diff)
+
+    def metadata():
+        for path, content in contents.items():
+            handler._extract_file_metadata(content, path)
+
+    def diff_context():
+        for hunk, line_no in hunk_targets:
+            handler._get_diff_context(hunk, line_no, 15)
+
+    def render(full_file_format):
+        return lambda: prompt.create_enhanced_review_message(structured_files, full_file_format=full_file_format)
+
+    def chunk():
+        assistant._chunk_messages([stable_prefix + message], chunk_size)
+
+    sizes = {
+        "diff_kib": round(len(diff) / 1024, 1),
+        "diff_lines": diff.count("\n"),
+        "file_lines": sum(content.count("\n") + 1 for content in contents.values()),
+        "added_lines": len(hunk_targets),
+        "message_kib": round(len(stable_prefix + message) / 1024, 1)
+    }
+    cases = [
+        ("parse_diff", f"PRHandler.parse_diff, {sizes['diff_lines']} diff lines", parse),
+        ("extract_file_metadata", f"_extract_file_metadata, {len(contents)} files / {sizes['file_lines']} lines", metadata),
+        ("get_diff_context", f"_get_diff_context, {sizes['added_lines']} added lines", diff_context),
+        ("render_message_standard", f"create_enhanced_review_message, {len(structured_files)} files", render("standard")),
+        ("render_message_annotated", "create_enhanced_review_message, annotated format", render("annotated")),
+        ("chunk_messages", f"OpenAIProvider._chunk_messages, {sizes['message_kib']} KiB into {chunk_size}-char parts", chunk),
+    ]
+    return cases, sizes
+
+
+def run(args):
+    """Run every selected case and return the results document."""
+    cases, sizes = build_cases(args)
+    results = {}
+    units = []
+    for name, description, func in cases:
+        if args.only and name not in args.only:
+            continue
+        # Calibrate next to each case so CPU frequency or neighbour load drifting
+        # during the run affects both numbers alike
+        unit = calibrate()
+        units.append(unit)
+        timing = measure(func, args.repeat)
+        results[name] = {
+            "description": description,
+            "min_seconds": round(timing["min_seconds"], 6),
+            "median_seconds": round(timing["median_seconds"], 6),
+            # Comparable across machines: time in units of the calibration loop
+            "relative": round(timing["min_seconds"] / unit, 4)
+        }
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "calibration_seconds": round(min(units), 6) if units else None,
+        "knobs": {knob: getattr(args, knob) for knob in KNOBS},
+        "sizes": sizes,
+        "results": results
+    }
+
+
+def compare(document, baseline, threshold):
+    """
+    Print each benchmark next to its baseline and return the names that regressed.
+
+    A benchmark regresses when its relative time exceeds the baseline's by more
+    than threshold (a fraction, 0.25 = 25% slower).
+    """
+    regressions = []
+    print(f"\n{'benchmark':<26} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in document["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            print(f"{name:<26} {'-':>10} {result['relative']:>10.3f} {'new':>8}")
+            continue
+        change = result["relative"] / previous["relative"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<26} {previous['relative']:>10.3f} {result['relative']:>10.3f} {change:>+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200, help="files in the synthetic diff")
+    parser.add_argument("--hunks", type=int, default=3, help="hunks per modified file")
+    parser.add_argument("--lines", type=int, default=20, help="added lines per hunk")
+    parser.add_argument("--line-length", type=int, default=60, help="approximate characters per source line")
+    parser.add_argument("--new-file-ratio", type=float, default=0.2, help="fraction of files that are new")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=7, help="timed runs per benchmark; the best is kept")
+    parser.add_argument("--only", nargs="+", help="run only these benchmarks")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with this results file and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown against the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help=f"overwrite {os.path.relpath(DEFAULT_BASELINE)}")
+    args = parser.parse_args()
+
+    document = run(args)
+    print(f"Input: {document['sizes']}")
+    print(f"Calibration loop: {(document['calibration_seconds'] or 0) * 1000:.1f} ms\n")
+    print(f"{'benchmark':<26} {'best (ms)':>10} {'median (ms)':>12} {'relative':>9}  description")
+    for name, result in document["results"].items():
+        print(f"{name:<26} {result['min_seconds'] * 1000:>10.2f} {result['median_seconds'] * 1000:>12.2f} "
+              f"{result['relative']:>9.3f}  {result['description']}")
+
+    for path in filter(None, (args.output, DEFAULT_BASELINE if args.update_baseline else None)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        print(f"\nWrote {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("knobs") != document["knobs"]:
+            print(f"\nBaseline was recorded with {baseline.get('knobs')}, this run used {document['knobs']}; "
+                  f"rerun with the same knobs to compare")
+            sys.exit(2)
+        regressions = compare(document, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nNo benchmark regressed by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
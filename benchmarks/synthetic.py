@@ -0,0 +1,114 @@
+"""Synthetic diff and source file generators shared by the benchmarks."""
+import random
+
+EXTENSIONS = [".php", ".js", ".ts", ".vue", ".jsx"]
+
+LINE_TEMPLATES = [
+    "import {{ {name} }} from './{name}';",
+    "export const {name} = () => {{",
+    "function {name}(value) {{",
+    "    const {name} = value + 1;",
+    "    return {name};",
+    "class {Name} extends Base {{",
+    "    public function {name}($request)",
+    "}}",
+    "// {name} helper",
+]
+
+
+def _line(rng, line_length):
+    """Build one pseudo-source line padded to roughly line_length characters."""
+    name = f"item{rng.randint(0, 9999)}"
+    line = rng.choice(LINE_TEMPLATES).format(name=name, Name=name.capitalize())
+    if len(line) < line_length:
+        line += " " * 4 + "// " + "x" * max(0, line_length - len(line) - 7)
+    return line
+
+
+def generate_file(lines=200, line_length=60, seed=0):
+    """Generate the content of a source file."""
+    rng = random.Random(seed)
+    return "\n".join(_line(rng, line_length) for _ in range(lines)) + "\n"
+
+
+def generate_diff(files=10, hunks=3, lines=20, line_length=60, new_file_ratio=0.2, seed=0):
+    """Generate a git-style unified diff.
+
+    Args:
+        files (int): Number of file sections
+        hunks (int): Hunks per modified file
+        lines (int): Added lines per hunk (new files get hunks * lines lines)
+        line_length (int): Approximate length of each source line
+        new_file_ratio (float): Fraction of files that are new files
+        seed (int): Random seed for reproducible output
+
+    Returns:
+        str: Unified diff text
+    """
+    rng = random.Random(seed)
+    parts = []
+
+    for index in range(files):
+        path = f"src/module{index // 50}/file{index}{EXTENSIONS[index % len(EXTENSIONS)]}"
+        parts.append(f"diff --git a/{path} b/{path}\n")
+
+        if rng.random() < new_file_ratio:
+            total = hunks * lines
+            parts.append("new file mode 100644\n")
+            parts.append(f"index 0000000..{index:07x}\n")
+            parts.append(f"--- /dev/null\n+++ b/{path}\n")
+            parts.append(f"@@ -0,0 +1,{total} @@\n")
+            parts.extend(f"+{_line(rng, line_length)}\n" for _ in range(total))
+            continue
+
+        parts.append(f"index {index:07x}..{index + 1:07x} 100644\n")
+        parts.append(f"--- a/{path}\n+++ b/{path}\n")
+
+        source_line = 1
+        target_line = 1
+        for _ in range(hunks):
+            source_line += 20
+            target_line += 20
+            removed = max(1, lines // 4)
+            source_len = 3 + removed + 3
+            target_len = 3 + lines + 3
+            parts.append(f"@@ -{source_line},{source_len} +{target_line},{target_len} @@ function context()\n")
+            parts.extend(f" {_line(rng, line_length)}\n" for _ in range(3))
+            parts.extend(f"-{_line(rng, line_length)}\n" for _ in range(removed))
+            parts.extend(f"+{_line(rng, line_length)}\n" for _ in range(lines))
+            parts.extend(f" {_line(rng, line_length)}\n" for _ in range(3))
+            source_line += source_len
+            target_line += target_len
+
+    return "".join(parts)
+
+
+def diff_with_total_lines(total_lines, lines_per_hunk=20, hunks=3, **kwargs):
+    """Generate a diff with roughly total_lines lines by scaling the file count."""
+    lines_per_file = 4 + hunks * (1 + 6 + lines_per_hunk + max(1, lines_per_hunk // 4))
+    files = max(1, total_lines // lines_per_file)
+    return generate_diff(files=files, hunks=hunks, lines=lines_per_hunk, **kwargs)
+
+
+def head_contents(parsed_diff, line_length=60, trailing_lines=20, seed=0):
+    """Build head-side file contents consistent with a parsed diff's hunks."""
+    return {
+        pfile.path: head_content(pfile, line_length, trailing_lines, seed)
+        for pfile in parsed_diff
+        if not pfile.is_removed_file
+    }
+
+
+def head_content(pfile, line_length=60, trailing_lines=20, seed=0):
+    """Build the head-side content of one parsed diff file, reproducible per path."""
+    rng = random.Random(f"{seed}:{pfile.path}")
+    known = {}
+    for hunk in pfile:
+        for _, line_no, value in hunk:
+            if line_no is not None:
+                known[line_no] = value
+    total = max(known, default=0) + (0 if pfile.is_added_file else trailing_lines)
+    return "\n".join(
+        known[line_no] if line_no in known else _line(rng, line_length)
+        for line_no in range(1, total + 1)
+    )
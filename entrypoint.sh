@@ -9,7 +9,11 @@ OPENAI_ASSISTANT_ID="$5"
 CLAUDE_API_KEY="$6"
 GEMINI_API_KEY="$7"
 DEEPSEEK_API_KEY="$8"
+OPENAI_COMPATIBLE_BASE_URL="${9:-}"
+OPENAI_COMPATIBLE_MODEL="${10:-}"
+OPENAI_COMPATIBLE_API_KEY="${11:-}"
 
 export AI_PROVIDER FRAMEWORK GITHUB_TOKEN OPENAI_API_KEY OPENAI_ASSISTANT_ID CLAUDE_API_KEY GEMINI_API_KEY DEEPSEEK_API_KEY
+export OPENAI_COMPATIBLE_BASE_URL OPENAI_COMPATIBLE_MODEL OPENAI_COMPATIBLE_API_KEY
 
 python /action/src/main.py
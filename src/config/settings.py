@@ -1,4 +1,5 @@
 import os
+from providers.usage import load_price_table
 
 class Config:
     """Configuration class to handle all environment variables and validation."""
@@ -6,6 +7,12 @@ class Config:
     def __init__(self):
         # Core configuration
         self.ai_provider = os.environ.get("AI_PROVIDER", "").lower()
+        # Optional ranked list for hedged requests and failover, e.g. "claude,gemini"
+        self.ai_providers = [
+            name.strip().lower() for name in os.environ.get("AI_PROVIDERS", "").split(",") if name.strip()
+        ]
+        self.ai_providers = list(dict.fromkeys(self.ai_providers)) or [self.ai_provider]
+        self.ai_provider = self.ai_providers[0]
         self.framework = os.environ.get("FRAMEWORK", "").lower()
         self.github_token = os.environ.get("GITHUB_TOKEN")
         
@@ -16,18 +23,107 @@ class Config:
         self.gemini_api_key = os.environ.get("GEMINI_API_KEY")
         self.deepseek_api_key = os.environ.get("DEEPSEEK_API_KEY")
         
+        # Any OpenAI-compatible chat completions endpoint (OpenAI, hosted or local servers)
+        self.openai_compatible_base_url = os.environ.get("OPENAI_COMPATIBLE_BASE_URL", "").strip() or "https://api.openai.com/v1"
+        self.openai_compatible_model = os.environ.get("OPENAI_COMPATIBLE_MODEL", "").strip()
+        # Optional: local servers usually need no key
+        self.openai_compatible_api_key = os.environ.get("OPENAI_COMPATIBLE_API_KEY", "").strip()
+        self.openai_compatible_concurrency = self._get_int("OPENAI_COMPATIBLE_CONCURRENCY", 4)
+        # Off by default: not every compatible server accepts "stream" with "stream_options"
+        self.openai_compatible_stream = self._get_bool("OPENAI_COMPATIBLE_STREAM", False)
+        
         # GitHub event data
         self.event_path = os.environ.get("GITHUB_EVENT_PATH")
         
+        # Performance tuning
+        self.fetch_workers = self._get_int("FETCH_WORKERS", 8)
+        self.diff_source = os.environ.get("DIFF_SOURCE", "auto").strip().lower() or "auto"
+        self.context_mode = os.environ.get("CONTEXT_MODE", "line").strip().lower() or "line"
+        self.full_file_format = os.environ.get("FULL_FILE_FORMAT", "standard").strip().lower() or "standard"
+        # 0 uses the selected provider's default budget
+        self.context_token_budget = self._get_int("CONTEXT_TOKEN_BUDGET", 0)
+        self.review_shards = self._get_int("REVIEW_SHARDS", 1)
+        self.shard_workers = self._get_int("SHARD_WORKERS", 4)
+        self.review_batch_files = self._get_int("REVIEW_BATCH_FILES", 500)
+        self.incremental_review = self._get_bool("INCREMENTAL_REVIEW", False)
+        # Empty disables the cache
+        self.review_cache_dir = os.environ.get("REVIEW_CACHE_DIR", "").strip()
+        self.review_cache_max_mb = self._get_int("REVIEW_CACHE_MAX_MB", 100)
+        self.content_cache_path = os.environ.get("CONTENT_CACHE_PATH", "").strip()
+        self.content_cache_max_mb = self._get_int("CONTENT_CACHE_MAX_MB", 200)
+        # Claude and DeepSeek stream responses; the idle timeout is the longest allowed gap between chunks
+        self.stream_responses = self._get_bool("STREAM_RESPONSES", True)
+        self.stream_idle_timeout = self._get_int("STREAM_IDLE_TIMEOUT", 60)
+        # Provider calls retry rate limits, 5xx and dropped connections within a per-call deadline
+        self.provider_max_retries = self._get_int("PROVIDER_MAX_RETRIES", 4)
+        self.provider_retry_deadline = self._get_int("PROVIDER_RETRY_DEADLINE", 300)
+        # Seconds before a request is also sent to the next provider of AI_PROVIDERS
+        self.hedge_delay = self._get_float("HEDGE_DELAY", 20.0)
+        # Consecutive failures after which a provider is skipped for the rest of the run
+        self.circuit_breaker_failures = self._get_int("CIRCUIT_BREAKER_FAILURES", 2)
+        # Timing trace: JSON file (empty disables) and a Markdown table in the job summary
+        self.trace_file = os.environ.get("TRACE_FILE", "").strip()
+        self.trace_step_summary = self._get_bool("TRACE_STEP_SUMMARY", True)
+        # Token prices (inline JSON or a JSON file) merged over the built-in table, and an
+        # optional JSONL file that gets one usage line per run
+        try:
+            self.price_table = load_price_table(os.environ.get("PRICE_TABLE", "").strip())
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Invalid PRICE_TABLE: {e}")
+        self.usage_ledger = os.environ.get("USAGE_LEDGER", "").strip()
+        # Profiling output directory (empty disables): cProfile, per-stage tracemalloc snapshots and peak RSS
+        self.profile_dir = os.environ.get("PROFILE_DIR", "").strip()
+        self.profile_cpu = self._get_bool("PROFILE_CPU", True)
+        self.profile_memory = self._get_bool("PROFILE_MEMORY", True)
+        self.profile_top = self._get_int("PROFILE_TOP", 20)
+        # Record every HTTP interaction to a cassette file, or replay a recorded run from it
+        self.http_cassette = os.environ.get("HTTP_CASSETTE", "").strip()
+        self.http_cassette_mode = os.environ.get("HTTP_CASSETTE_MODE", "record").strip().lower() or "record"
+        self.replay_timing = os.environ.get("REPLAY_TIMING", "original").strip().lower() or "original"
+        # Longest time an OpenAI assistant run may take before it is cancelled
+        self.openai_run_timeout = self._get_int("OPENAI_RUN_TIMEOUT", 600)
+        
         # Validate configuration
         self._validate()
     
+    def _get_int(self, name, default):
+        """Read an integer environment variable, falling back to a default."""
+        value = os.environ.get(name, "").strip()
+        if not value:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f"{name} must be an integer, got: {value}")
+    
+    def _get_float(self, name, default):
+        """Read a numeric environment variable, falling back to a default."""
+        value = os.environ.get(name, "").strip()
+        if not value:
+            return default
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError(f"{name} must be a number, got: {value}")
+    
+    def _get_bool(self, name, default):
+        """Read a boolean environment variable (true/false, yes/no, 1/0)."""
+        value = os.environ.get(name, "").strip().lower()
+        if not value:
+            return default
+        if value in ("1", "true", "yes", "on"):
+            return True
+        if value in ("0", "false", "no", "off"):
+            return False
+        raise ValueError(f"{name} must be true or false, got: {value}")
+    
     def _validate(self):
         """Validate the configuration."""
         # Validate AI provider
-        valid_providers = ["openai", "claude", "gemini", "deepseek"]
-        if self.ai_provider not in valid_providers:
-            raise ValueError(f"Invalid AI provider: {self.ai_provider}. Must be one of: {', '.join(valid_providers)}")
+        valid_providers = ["openai", "claude", "gemini", "deepseek", "openai_compatible"]
+        for provider in self.ai_providers:
+            if provider not in valid_providers:
+                raise ValueError(f"Invalid AI provider: {provider}. Must be one of: {', '.join(valid_providers)}")
         
         # Validate framework
         valid_frameworks = ["laravel", "vue", "nuxt", "react", "nextjs"]
@@ -41,21 +137,104 @@ class Config:
         if not self.event_path:
             raise ValueError("GITHUB_EVENT_PATH is required")
         
+        if self.fetch_workers < 1:
+            raise ValueError("FETCH_WORKERS must be at least 1")
+        
+        valid_diff_sources = ["auto", "diff", "files"]
+        if self.diff_source not in valid_diff_sources:
+            raise ValueError(f"Invalid DIFF_SOURCE: {self.diff_source}. Must be one of: {', '.join(valid_diff_sources)}")
+        
+        valid_context_modes = ["merged", "line"]
+        if self.context_mode not in valid_context_modes:
+            raise ValueError(f"Invalid CONTEXT_MODE: {self.context_mode}. Must be one of: {', '.join(valid_context_modes)}")
+        
+        if self.context_token_budget < 0:
+            raise ValueError("CONTEXT_TOKEN_BUDGET must not be negative")
+        
+        if self.review_shards < 1:
+            raise ValueError("REVIEW_SHARDS must be at least 1")
+        
+        if self.shard_workers < 1:
+            raise ValueError("SHARD_WORKERS must be at least 1")
+        
+        if self.review_batch_files < 0:
+            raise ValueError("REVIEW_BATCH_FILES must not be negative")
+        
+        if self.review_cache_max_mb < 1:
+            raise ValueError("REVIEW_CACHE_MAX_MB must be at least 1")
+        
+        if self.content_cache_max_mb < 1:
+            raise ValueError("CONTENT_CACHE_MAX_MB must be at least 1")
+        
+        if self.stream_idle_timeout < 1:
+            raise ValueError("STREAM_IDLE_TIMEOUT must be at least 1 second")
+        
+        if self.openai_compatible_concurrency < 1:
+            raise ValueError("OPENAI_COMPATIBLE_CONCURRENCY must be at least 1")
+        
+        if self.provider_max_retries < 0:
+            raise ValueError("PROVIDER_MAX_RETRIES must not be negative")
+        
+        if self.provider_retry_deadline < 1:
+            raise ValueError("PROVIDER_RETRY_DEADLINE must be at least 1 second")
+        
+        if self.hedge_delay < 0:
+            raise ValueError("HEDGE_DELAY must not be negative")
+        
+        if self.circuit_breaker_failures < 1:
+            raise ValueError("CIRCUIT_BREAKER_FAILURES must be at least 1")
+        
+        if self.openai_run_timeout < 1:
+            raise ValueError("OPENAI_RUN_TIMEOUT must be at least 1 second")
+        
+        if self.profile_top < 1:
+            raise ValueError("PROFILE_TOP must be at least 1")
+        
+        valid_cassette_modes = ["record", "replay"]
+        if self.http_cassette_mode not in valid_cassette_modes:
+            raise ValueError(f"Invalid HTTP_CASSETTE_MODE: {self.http_cassette_mode}. Must be one of: {', '.join(valid_cassette_modes)}")
+        
+        valid_replay_timings = ["original", "zero"]
+        if self.replay_timing not in valid_replay_timings:
+            raise ValueError(f"Invalid REPLAY_TIMING: {self.replay_timing}. Must be one of: {', '.join(valid_replay_timings)}")
+        
+        valid_full_file_formats = ["standard", "annotated"]
+        if self.full_file_format not in valid_full_file_formats:
+            raise ValueError(f"Invalid FULL_FILE_FORMAT: {self.full_file_format}. Must be one of: {', '.join(valid_full_file_formats)}")
+        
         # Validate provider-specific requirements
-        if self.ai_provider == "openai":
+        for provider in self.ai_providers:
+            self._validate_provider_keys(provider)
+    
+    def secret_values(self):
+        """The configured credentials, for scrubbing from anything written to disk."""
+        return [
+            secret for secret in (
+                self.github_token, self.openai_api_key, self.claude_api_key, self.gemini_api_key,
+                self.deepseek_api_key, self.openai_compatible_api_key
+            ) if secret
+        ]
+    
+    def _validate_provider_keys(self, provider):
+        """Check that the credentials a provider needs are set."""
+        if provider == "openai":
             if not self.openai_api_key:
                 raise ValueError("OPENAI_API_KEY is required when using OpenAI provider")
             if not self.openai_assistant_id:
                 raise ValueError("OPENAI_ASSISTANT_ID is required when using OpenAI provider")
         
-        elif self.ai_provider == "claude":
+        elif provider == "claude":
             if not self.claude_api_key:
                 raise ValueError("CLAUDE_API_KEY is required when using Claude provider")
         
-        elif self.ai_provider == "gemini":
+        elif provider == "gemini":
             if not self.gemini_api_key:
                 raise ValueError("GEMINI_API_KEY is required when using Gemini provider")
         
-        elif self.ai_provider == "deepseek":
+        elif provider == "deepseek":
             if not self.deepseek_api_key:
                 raise ValueError("DEEPSEEK_API_KEY is required when using DeepSeek provider")
+        
+        elif provider == "openai_compatible":
+            if not self.openai_compatible_model:
+                raise ValueError("OPENAI_COMPATIBLE_MODEL is required when using the OpenAI-compatible provider")
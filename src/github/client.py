@@ -0,0 +1,138 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from utils.tracing import tracer, endpoint_name
+
+DEFAULT_API_URL = "https://api.github.com"
+
+# Upper bound for a single rate-limit wait so a bad reset header cannot stall the run
+MAX_RATE_LIMIT_WAIT = 300
+
+
+class GitHubClient:
+    """GitHub REST API client that reuses one keep-alive session for every call."""
+
+    def __init__(self, github_token, api_url=None, pool_size=10, timeout=30, max_rate_limit_retries=3):
+        self.api_url = (api_url or os.environ.get("GITHUB_API_URL") or DEFAULT_API_URL).rstrip("/")
+        self.timeout = timeout
+        self.max_rate_limit_retries = max_rate_limit_retries
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {github_token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+            "User-Agent": "ultra-dev-action"
+        })
+
+    def request(self, method, path, accept=None, raise_for_status=True, **kwargs):
+        """Send a request, waiting out primary and secondary rate limits before giving up."""
+        url = path if path.startswith(("http://", "https://")) else f"{self.api_url}/{path.lstrip('/')}"
+        headers = kwargs.pop("headers", {})
+        if accept:
+            headers["Accept"] = accept
+        kwargs.setdefault("timeout", self.timeout)
+
+        with tracer.span(endpoint_name(method, path), "github") as span:
+            for attempt in range(self.max_rate_limit_retries + 1):
+                response = self.session.request(method, url, headers=headers, **kwargs)
+                span.add_bytes(len(response.content), len(response.request.body or b""))
+                wait = self._rate_limit_wait(response)
+                if wait is None or attempt == self.max_rate_limit_retries:
+                    break
+                print(f"GitHub rate limit hit for {method} {path}, retrying in {wait:.0f}s...")
+                time.sleep(wait)
+
+        if raise_for_status:
+            response.raise_for_status()
+        return response
+
+    def get(self, path, params=None, accept=None, **kwargs):
+        """Send a GET request to the API."""
+        return self.request("GET", path, params=params, accept=accept, **kwargs)
+
+    def post(self, path, json=None, **kwargs):
+        """Send a POST request to the API."""
+        return self.request("POST", path, json=json, **kwargs)
+
+    def paginate(self, path, params=None, per_page=100):
+        """Yield every item of a list endpoint, following the Link header across pages."""
+        params = dict(params or {})
+        params.setdefault("per_page", per_page)
+
+        yield from self._follow_pages(self.get(path, params=params))
+
+    def paginate_concurrently(self, path, params=None, per_page=100, workers=4):
+        """
+        Yield every item of a list endpoint in order, fetching the pages after the first concurrently.
+
+        The page count comes from the first page's rel="last" link; without one, the
+        pages are followed one by one as in paginate().
+        """
+        params = dict(params or {})
+        params.setdefault("per_page", per_page)
+
+        response = self.get(path, params=params)
+        last_page = self._page_number(response.links.get("last", {}).get("url"))
+        if last_page is None:
+            yield from self._follow_pages(response)
+            return
+
+        yield from response.json()
+        if last_page < 2:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, last_page - 1))) as executor:
+            pages = executor.map(
+                lambda page: self.get(path, params={**params, "page": page}).json(),
+                range(2, last_page + 1)
+            )
+            for items in pages:
+                yield from items
+
+    def _follow_pages(self, response):
+        """Yield the items of a page and of every page after it, following the Link header."""
+        while True:
+            yield from response.json()
+            next_url = response.links.get("next", {}).get("url")
+            if not next_url:
+                return
+            response = self.get(next_url)
+
+    @staticmethod
+    def _page_number(url):
+        """The page query parameter of a pagination link, or None."""
+        if not url:
+            return None
+        try:
+            return int(parse_qs(urlparse(url).query)["page"][0])
+        except (KeyError, ValueError):
+            return None
+
+    def _rate_limit_wait(self, response):
+        """Return how long to wait before retrying a rate-limited response, or None."""
+        if response.status_code not in (403, 429):
+            return None
+
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 1.0), MAX_RATE_LIMIT_WAIT)
+            except ValueError:
+                pass
+
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset = response.headers.get("X-RateLimit-Reset")
+            if reset and reset.isdigit():
+                return min(max(int(reset) - time.time(), 1.0), MAX_RATE_LIMIT_WAIT)
+
+        # Secondary rate limits without headers: GitHub asks clients to wait at least a minute
+        if "secondary rate limit" in response.text.lower():
+            return 60.0
+
+        return None
@@ -0,0 +1,114 @@
+import json
+import os
+import sqlite3
+import time
+
+# SQLite limits the number of bound parameters per statement
+LOOKUP_BATCH_SIZE = 500
+
+
+class ContentCache:
+    """
+    SQLite cache of decoded file contents and their extracted metadata, keyed by git blob SHA.
+
+    Only metadata derived from the content belongs here: one blob can appear under
+    several paths (empty files, renames, vendored copies).
+
+    Blob SHAs identify content exactly, so entries never go stale; the database only
+    needs a size bound. Keep the file on a path persisted with actions/cache to reuse
+    it across workflow runs.
+    """
+
+    def __init__(self, path, max_bytes=200 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " sha TEXT PRIMARY KEY,"
+            " content TEXT NOT NULL,"
+            " metadata TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS blobs_last_used ON blobs (last_used)")
+        self.connection.commit()
+
+    def get_many(self, shas):
+        """
+        Look up several blobs at once.
+
+        Returns:
+            dict: sha -> (content, metadata) for every cached blob
+        """
+        shas = list(dict.fromkeys(sha for sha in shas if sha))
+        found = {}
+        for i in range(0, len(shas), LOOKUP_BATCH_SIZE):
+            batch = shas[i:i + LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.connection.execute(
+                f"SELECT sha, content, metadata, size FROM blobs WHERE sha IN ({placeholders})", batch
+            )
+            for sha, content, metadata, size in rows:
+                found[sha] = (content, json.loads(metadata))
+                self.bytes_saved += size
+
+        if found:
+            now = time.time()
+            self.connection.executemany(
+                "UPDATE blobs SET last_used = ? WHERE sha = ?", [(now, sha) for sha in found]
+            )
+            self.connection.commit()
+
+        self.hits += len(found)
+        self.misses += len(shas) - len(found)
+        return found
+
+    def put_many(self, entries):
+        """Store (sha, content, metadata) entries, then evict least recently used blobs over the size limit."""
+        now = time.time()
+        rows = [
+            (sha, content, json.dumps(metadata), len(content.encode("utf-8")), now)
+            for sha, content, metadata in entries
+            if sha and content is not None
+        ]
+        if not rows:
+            return
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO blobs (sha, content, metadata, size, last_used) VALUES (?, ?, ?, ?, ?)", rows
+        )
+        self.connection.commit()
+        self._prune()
+
+    def report(self):
+        """Print the hit ratio and the bytes that did not have to be downloaded."""
+        lookups = self.hits + self.misses
+        ratio = 100 * self.hits / lookups if lookups else 0
+        print(f"Content cache: {self.hits}/{lookups} hit(s) ({ratio:.0f}%), "
+              f"{self.bytes_saved / 1024:.1f} KiB not downloaded")
+
+    def close(self):
+        self.connection.close()
+
+    def _prune(self):
+        """Delete the least recently used blobs until the stored content fits in max_bytes."""
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        doomed = []
+        for sha, size in self.connection.execute("SELECT sha, size FROM blobs ORDER BY last_used"):
+            if excess <= 0:
+                break
+            doomed.append((sha,))
+            excess -= size
+        self.connection.executemany("DELETE FROM blobs WHERE sha = ?", doomed)
+        self.connection.commit()
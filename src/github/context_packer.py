@@ -0,0 +1,77 @@
+TIER_FULL_FILE = "full_file"
+TIER_MERGED_HUNKS = "merged_hunks"
+TIER_HUNKS_ONLY = "hunks_only"
+TIER_METADATA_ONLY = "metadata_only"
+
+# Richest first
+TIERS = (TIER_FULL_FILE, TIER_MERGED_HUNKS, TIER_HUNKS_ONLY, TIER_METADATA_ONLY)
+
+
+class ContextPacker:
+    """Assigns every file the richest context tier that fits a shared token budget."""
+
+    def __init__(self, token_budget=None):
+        self.token_budget = token_budget
+
+    def pack(self, candidates):
+        """
+        Choose a context tier for each file.
+
+        The metadata of every file is reserved first, as it is sent whatever the
+        budget. Files with the most added lines are then served first: each is
+        upgraded to its hunks if they fit what is left, then files are upgraded to
+        merged hunks or the full file while budget remains. When the metadata alone
+        exceeds the budget every file stays at metadata only and the overrun is
+        reported.
+
+        Args:
+            candidates (list): Dicts with "file", "additions" and "costs", where costs
+                maps each available tier to its estimated token cost
+
+        Returns:
+            tuple: ({file: tier}, total estimated tokens)
+        """
+        if self.token_budget is None:
+            tiers = {c["file"]: self._richest(c["costs"]) for c in candidates}
+            used = sum(c["costs"][tiers[c["file"]]] for c in candidates)
+            return tiers, used
+
+        ordered = sorted(candidates, key=lambda c: (-c["additions"], c["file"]))
+        tiers = {c["file"]: TIER_METADATA_ONLY for c in ordered}
+        metadata_tokens = sum(c["costs"][TIER_METADATA_ONLY] for c in ordered)
+        remaining = self.token_budget - metadata_tokens
+
+        if remaining < 0:
+            print(f"Warning: metadata of {len(ordered)} file(s) needs ~{metadata_tokens} tokens, "
+                  f"over the {self.token_budget} token budget by ~{-remaining}")
+            return tiers, metadata_tokens
+
+        for candidate in ordered:
+            costs = candidate["costs"]
+            if TIER_HUNKS_ONLY not in costs:
+                continue
+            extra = costs[TIER_HUNKS_ONLY] - costs[TIER_METADATA_ONLY]
+            if extra <= remaining:
+                tiers[candidate["file"]] = TIER_HUNKS_ONLY
+                remaining -= extra
+
+        for candidate in ordered:
+            costs = candidate["costs"]
+            current = tiers[candidate["file"]]
+            for tier in (TIER_FULL_FILE, TIER_MERGED_HUNKS):
+                if tier not in costs:
+                    continue
+                extra = costs[tier] - costs[current]
+                if extra <= remaining:
+                    tiers[candidate["file"]] = tier
+                    remaining -= extra
+                    break
+
+        return tiers, self.token_budget - remaining
+
+    def _richest(self, costs):
+        """The richest tier a file can be rendered with."""
+        for tier in TIERS:
+            if tier in costs:
+                return tier
+        return TIER_METADATA_ONLY
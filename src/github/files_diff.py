@@ -0,0 +1,54 @@
+import difflib
+
+# GitHub lists at most this many files of a pull request
+FILES_LISTING_LIMIT = 3000
+
+
+def file_section(item, patch=None, binary=False):
+    """
+    Render one pulls/{n}/files entry as a git-style diff section.
+
+    Args:
+        item (dict): Entry of the file listing (filename, status, previous_filename)
+        patch (str): Hunks of the file, starting at the first "@@" line; defaults to
+            the entry's own patch
+        binary (bool): Mark the file as binary instead of listing hunks
+
+    Returns:
+        str: Section text that ParsedDiff reads like `git diff` output
+    """
+    path = item["filename"]
+    old_path = item.get("previous_filename") or path
+    status = item.get("status")
+    lines = [f"diff --git a/{old_path} b/{path}"]
+
+    if status == "added":
+        lines += ["new file mode 100644", "--- /dev/null", f"+++ b/{path}"]
+    elif status == "removed":
+        lines += ["deleted file mode 100644", f"--- a/{path}", "+++ /dev/null"]
+    else:
+        if old_path != path:
+            lines += [f"rename from {old_path}", f"rename to {path}"]
+        lines += [f"--- a/{old_path}", f"+++ b/{path}"]
+
+    if binary:
+        # Replaces the ---/+++ lines, as in git's output for binary files
+        lines = lines[:-2] + [f"Binary files a/{old_path} and b/{path} differ"]
+    else:
+        patch = item.get("patch") if patch is None else patch
+        if patch:
+            lines.append(patch.rstrip("\n"))
+
+    return "\n".join(lines) + "\n"
+
+
+def synthesize_patch(base_content, head_content, context_lines=3):
+    """Build the hunks of a file's change from its base and head contents."""
+    diff = difflib.unified_diff(
+        base_content.splitlines(),
+        head_content.splitlines(),
+        lineterm="",
+        n=context_lines
+    )
+    # Skip the ---/+++ header; file_section writes its own
+    return "\n".join(line for index, line in enumerate(diff) if index >= 2)
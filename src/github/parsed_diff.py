@@ -0,0 +1,345 @@
+import re
+
+HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)")
+DEV_NULL = "/dev/null"
+
+# Line types stored on each hunk line
+LINE_CONTEXT = " "
+LINE_ADDED = "+"
+LINE_REMOVED = "-"
+
+
+# Escapes git uses in quoted paths, besides octal bytes
+QUOTED_ESCAPES = {"a": "\a", "b": "\b", "t": "\t", "n": "\n", "v": "\v", "f": "\f", "r": "\r", '"': '"', "\\": "\\"}
+
+
+def _split_quoted(text):
+    """Split a leading C-style quoted string off text; return (unquoted value, rest)."""
+    raw = bytearray()
+    index = 1
+    while index < len(text):
+        char = text[index]
+        if char == '"':
+            return raw.decode("utf-8", errors="replace"), text[index + 1:]
+        if char == "\\" and index + 1 < len(text):
+            escape = text[index + 1]
+            if escape in "01234567":
+                raw.append(int(text[index + 1:index + 4], 8))
+                index += 4
+                continue
+            raw += QUOTED_ESCAPES.get(escape, escape).encode("utf-8")
+            index += 2
+            continue
+        raw += char.encode("utf-8")
+        index += 1
+    return raw.decode("utf-8", errors="replace"), ""
+
+
+def _unquote(path):
+    """Undo git's quoting of a path with special characters; unquoted paths are returned as is."""
+    if path.startswith('"'):
+        return _split_quoted(path)[0]
+    return path
+
+
+class HunkIndex:
+    """Target-side view of a hunk: line numbers, contents and a line-number to position map."""
+
+    __slots__ = ("line_nos", "values", "positions")
+
+    def __init__(self, hunk):
+        self.line_nos = []
+        self.values = []
+        for line_type, line_no, value in hunk.lines:
+            if line_type != LINE_REMOVED:
+                self.line_nos.append(line_no)
+                self.values.append(value)
+        self.positions = {line_no: position for position, line_no in enumerate(self.line_nos)}
+
+    def __len__(self):
+        return len(self.line_nos)
+
+
+class DiffHunk:
+    """A single hunk. Lines are (line_type, target_line_no, value) tuples; removed lines have no target number."""
+
+    __slots__ = (
+        "source_start", "source_length", "target_start", "target_length", "section_header", "lines", "_index"
+    )
+
+    def __init__(self, source_start, source_length, target_start, target_length, section_header=""):
+        self.source_start = source_start
+        self.source_length = source_length
+        self.target_start = target_start
+        self.target_length = target_length
+        self.section_header = section_header
+        self.lines = []
+        self._index = None
+
+    @property
+    def index(self):
+        """Target-line index, built on first use and reused for every line of the hunk."""
+        if self._index is None:
+            self._index = HunkIndex(self)
+        return self._index
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __len__(self):
+        return len(self.lines)
+
+
+class DiffFile:
+    """One file section of a diff with its hunks and added-line index."""
+
+    __slots__ = ("source_path", "target_path", "hunks", "added_lines", "is_added_file", "is_removed_file")
+
+    def __init__(self):
+        self.source_path = None
+        self.target_path = None
+        self.hunks = []
+        self.added_lines = {}
+        self.is_added_file = False
+        self.is_removed_file = False
+
+    @property
+    def path(self):
+        """Path of the file in the PR head, or its old path when the file was removed."""
+        if self.is_removed_file:
+            return self.source_path
+        return self.target_path or self.source_path
+
+    def release_indexes(self):
+        """Drop the hunks' target-line indexes once the file is done; they are rebuilt if used again."""
+        for hunk in self.hunks:
+            hunk._index = None
+
+    def __iter__(self):
+        return iter(self.hunks)
+
+
+class ParsedDiff:
+    """A unified diff parsed once and indexed by file path.
+
+    Replaces repeated PatchSet parsing and regex scans of the raw diff: each file
+    records its hunks, added lines and new/removed status. The diff text itself is
+    not kept.
+    """
+
+    def __init__(self, diff):
+        self.files = []
+        self._files_by_path = {}
+        self._unrestricted = None
+        self._parse(diff or "")
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+    def get(self, path):
+        """Return the DiffFile for a path, or None if the path is not in the diff."""
+        return self._files_by_path.get(path)
+
+    def is_added_line(self, path, line_no):
+        """Check whether a line number in the PR head is an added line of the given file."""
+        pfile = self.get(path)
+        return pfile is not None and not pfile.is_removed_file and line_no in pfile.added_lines
+
+    def unrestricted(self):
+        """The complete diff this diff was restricted from (itself if it was not)."""
+        return self._unrestricted or self
+
+    def restrict(self, changed_lines):
+        """
+        Return a view of this diff limited to the given added lines.
+
+        Files without a listed line are dropped, as are hunks without one. Added lines
+        that are not listed become context lines in the hunks that are kept.
+
+        Args:
+            changed_lines (dict): Path -> set of head line numbers to keep
+
+        Returns:
+            ParsedDiff: A new diff sharing this diff's hunk lines
+        """
+        restricted = ParsedDiff.__new__(ParsedDiff)
+        restricted.files = []
+        restricted._files_by_path = {}
+        restricted._unrestricted = self.unrestricted()
+
+        for pfile in self.files:
+            keep = changed_lines.get(pfile.path)
+            if not keep or pfile.is_removed_file:
+                continue
+
+            view = DiffFile()
+            for attr in DiffFile.__slots__:
+                setattr(view, attr, getattr(pfile, attr))
+            view.added_lines = {line_no: value for line_no, value in pfile.added_lines.items() if line_no in keep}
+            if not view.added_lines:
+                continue
+
+            view.hunks = []
+            for hunk in pfile.hunks:
+                if not any(line_no in view.added_lines for line_type, line_no, _ in hunk.lines if line_type == LINE_ADDED):
+                    continue
+                hunk_view = DiffHunk(
+                    hunk.source_start, hunk.source_length, hunk.target_start, hunk.target_length, hunk.section_header
+                )
+                for line_type, line_no, value in hunk.lines:
+                    if line_type == LINE_ADDED and line_no not in view.added_lines:
+                        line_type = LINE_CONTEXT
+                    hunk_view.lines.append((line_type, line_no, value))
+                view.hunks.append(hunk_view)
+
+            restricted.files.append(view)
+            restricted._files_by_path[view.path] = view
+
+        return restricted
+
+    def _parse(self, text):
+        """Single pass over the diff text building the per-file index."""
+        current = None
+        hunk = None
+        source_left = target_left = 0
+        target_no = 0
+        text_length = len(text)
+        offset = 0
+
+        # Walk the text by offsets instead of materialising a list of every line
+        while offset < text_length:
+            line_start = offset
+            newline = text.find("\n", offset)
+            offset = text_length if newline == -1 else newline + 1
+            line = text[line_start:offset].rstrip("\r\n")
+
+            # Body lines of an open hunk, driven by the hunk's line counts
+            if hunk is not None and (source_left > 0 or target_left > 0):
+                marker = line[:1]
+                if marker == LINE_ADDED:
+                    value = line[1:]
+                    hunk.lines.append((LINE_ADDED, target_no, value))
+                    current.added_lines[target_no] = value
+                    target_no += 1
+                    target_left -= 1
+                    continue
+                if marker == LINE_REMOVED:
+                    hunk.lines.append((LINE_REMOVED, None, line[1:]))
+                    source_left -= 1
+                    continue
+                if marker == LINE_CONTEXT or line == "":
+                    hunk.lines.append((LINE_CONTEXT, target_no, line[1:]))
+                    target_no += 1
+                    source_left -= 1
+                    target_left -= 1
+                    continue
+                if marker == "\\":
+                    continue
+                # Anything else ends a truncated hunk; fall through to header handling
+                hunk = None
+
+            if line.startswith("\\"):
+                # "\ No newline at end of file" after the last hunk line
+                continue
+
+            if line.startswith("diff --git "):
+                current = self._start_file(current)
+                hunk = None
+                source_path, target_path = self._split_git_header(line[len("diff --git "):])
+                current.source_path = source_path
+                current.target_path = target_path
+                continue
+
+            if line.startswith("@@ ") and current is not None:
+                match = HUNK_HEADER_RE.match(line)
+                if not match:
+                    continue
+                source_start = int(match.group(1))
+                source_length = int(match.group(2)) if match.group(2) is not None else 1
+                target_start = int(match.group(3))
+                target_length = int(match.group(4)) if match.group(4) is not None else 1
+                hunk = DiffHunk(source_start, source_length, target_start, target_length, match.group(5))
+                current.hunks.append(hunk)
+                source_left, target_left = source_length, target_length
+                target_no = target_start
+                continue
+
+            if line.startswith("--- "):
+                # Plain unified diffs have no "diff --git" line; a new "---" header starts a file
+                if current is None or current.hunks:
+                    current = self._start_file(current)
+                    hunk = None
+                path = self._strip_path(line[4:])
+                if path == DEV_NULL:
+                    current.is_added_file = True
+                else:
+                    current.source_path = path
+                continue
+
+            if current is None:
+                continue
+
+            if line.startswith("+++ "):
+                path = self._strip_path(line[4:])
+                if path == DEV_NULL:
+                    current.is_removed_file = True
+                else:
+                    current.target_path = path
+            elif line.startswith("new file mode"):
+                current.is_added_file = True
+            elif line.startswith("deleted file mode"):
+                current.is_removed_file = True
+            elif line.startswith("rename from "):
+                current.source_path = _unquote(line[len("rename from "):])
+            elif line.startswith("rename to "):
+                current.target_path = _unquote(line[len("rename to "):])
+
+        self._start_file(current)
+
+    def _start_file(self, previous):
+        """Close the previous file section and open a new one."""
+        if previous is not None:
+            self.files.append(previous)
+            path = previous.path
+            if path and path not in self._files_by_path:
+                self._files_by_path[path] = previous
+        return DiffFile()
+
+    @staticmethod
+    def _strip_path(path):
+        """Drop the a/ or b/ prefix and any trailing timestamp from a ---/+++ path."""
+        if path.startswith('"'):
+            path = _unquote(path)
+        else:
+            path = path.split("\t", 1)[0].rstrip()
+        if path.startswith(("a/", "b/")):
+            return path[2:]
+        return path
+
+    @staticmethod
+    def _split_git_header(paths):
+        """Split the "a/<old> b/<new>" part of a diff --git line."""
+        if paths.startswith('"'):
+            # Git quotes paths with special characters; either side may be quoted
+            old_path, rest = _split_quoted(paths)
+            new_path = _unquote(rest.lstrip(" "))
+            if old_path.startswith("a/") and new_path.startswith("b/"):
+                return old_path[2:], new_path[2:]
+            return None, None
+        if paths.endswith('"'):
+            separator = paths.find(' "b/')
+            if paths.startswith("a/") and separator != -1:
+                return paths[2:separator], _unquote(paths[separator + 1:])[2:]
+            return None, None
+        if paths.startswith("a/"):
+            # Same path on both sides is the common case and is unambiguous even with spaces
+            half = (len(paths) - 1) // 2
+            if paths[half] == " " and paths[2:half] == paths[half + 3:]:
+                return paths[2:half], paths[half + 3:]
+            separator = paths.find(" b/")
+            if separator != -1:
+                return paths[2:separator], paths[separator + 3:]
+        return None, None
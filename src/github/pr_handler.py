@@ -1,12 +1,25 @@
 import os
 import re
-import subprocess
 import json
 import requests
-import base64
-from unidiff import PatchSet
-from collections import defaultdict
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from urllib.parse import quote
+from .client import GitHubClient
+from .parsed_diff import ParsedDiff, LINE_ADDED
+from .files_diff import FILES_LISTING_LIMIT, file_section, synthesize_patch
+from .context_packer import (
+    ContextPacker, TIERS, TIER_FULL_FILE, TIER_MERGED_HUNKS, TIER_HUNKS_ONLY, TIER_METADATA_ONLY
+)
+from utils.helpers import estimate_tokens
+
+# Hidden marker appended to review bodies to record which head commit was reviewed
+REVIEWED_SHA_MARKER = "<!-- ultra-dev:reviewed-sha={sha} -->"
+REVIEWED_SHA_RE = re.compile(r"<!-- ultra-dev:reviewed-sha=([0-9a-f]{7,40}) -->")
+
+# Statuses GitHub answers with when a PR's diff is too large (files, lines or time) to render
+DIFF_TOO_LARGE_STATUSES = {406, 422}
 
 # File extensions to exclude from code review
 EXCLUDED_EXTENSIONS = {
@@ -25,8 +38,12 @@ EXCLUDED_EXTENSIONS = {
 class PRHandler:
     """Handles GitHub PR operations and diff processing."""
     
-    def __init__(self, github_token):
+    def __init__(self, github_token, fetch_workers=8, context_mode="line", content_cache=None, diff_source="auto"):
         self.github_token = github_token
+        self.fetch_workers = max(1, fetch_workers)
+        self.context_mode = context_mode
+        self.content_cache = content_cache
+        self.diff_source = diff_source
         self.event_path = os.environ.get("GITHUB_EVENT_PATH")
         
         with open(self.event_path) as f:
@@ -34,6 +51,11 @@ class PRHandler:
         
         self.pr_number = self.event["number"]
         self.repo = self.event["repository"]["full_name"]
+        self.head_sha = self.event["pull_request"]["head"]["sha"]
+        self.base_sha = self.event["pull_request"].get("base", {}).get("sha")
+        self.client = GitHubClient(github_token, pool_size=self.fetch_workers)
+        self._reviews = None
+        self._blob_shas = None
     
     def _should_exclude_file(self, filepath):
         """Check if a file should be excluded from review based on its extension."""
@@ -41,43 +63,111 @@ class PRHandler:
         return file_ext in EXCLUDED_EXTENSIONS
     
     def get_diff(self):
-        """Fetch the PR's unified diff via GitHub CLI."""
-        res = subprocess.run(
-            ["gh", "pr", "diff", str(self.pr_number), "--repo", self.repo, "--color", "never"],
-            capture_output=True, text=True, check=True
-        )
-        return res.stdout
+        """
+        Fetch the PR's changes as unified diff text.
+        
+        The "diff" source asks GitHub for the single-document diff, "files" builds it
+        from the paginated file listing, and "auto" uses the file listing only when
+        GitHub refuses the diff as too large.
+        """
+        if self.diff_source == "files":
+            return self.get_diff_from_files()
+        
+        try:
+            res = self.client.get(
+                f"repos/{self.repo}/pulls/{self.pr_number}",
+                accept="application/vnd.github.v3.diff"
+            )
+            return res.text
+        except requests.exceptions.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if self.diff_source != "auto" or status not in DIFF_TOO_LARGE_STATUSES:
+                raise
+            print(f"GitHub refused the PR diff ({status}), building it from the file listing")
+            return self.get_diff_from_files()
     
-    def get_added_lines(self, diff):
-        """Get a map of added lines for each file."""
-        added_lines = defaultdict(dict)
+    def get_diff_from_files(self):
+        """
+        Build the PR's unified diff from the paginated pulls/{n}/files listing.
         
-        ps = PatchSet(diff.splitlines(keepends=True))
+        Pages are fetched concurrently. Files whose patch GitHub omits (large changes,
+        binary files) get one synthesized from their base and head blobs.
+        """
+        start = time.monotonic()
+        items = list(self.client.paginate_concurrently(
+            f"repos/{self.repo}/pulls/{self.pr_number}/files",
+            workers=self.fetch_workers
+        ))
+        # The listing has the head blob SHAs the content cache needs; no need to list again
+        self._blob_shas = {item["filename"]: item.get("sha") for item in items}
+        if len(items) >= FILES_LISTING_LIMIT:
+            print(f"Warning: GitHub lists at most {FILES_LISTING_LIMIT} files of a PR; later files are not reviewed")
         
-        for pfile in ps:
-            if pfile.is_removed_file:
-                continue
-                
-            filepath = pfile.path
-            
-            for hunk in pfile:
-                for line in hunk:
-                    if line.is_added and line.target_line_no is not None:
-                        added_lines[filepath][line.target_line_no] = line.value.rstrip('\n\r')
+        omitted = [
+            item for item in items
+            if not item.get("patch") and item.get("status") != "removed" and item.get("changes", 0) > 0
+            and not self._should_exclude_file(item["filename"])
+        ]
+        sections = {}
+        if omitted:
+            with ThreadPoolExecutor(max_workers=min(self.fetch_workers, len(omitted))) as executor:
+                sections = dict(zip(
+                    (item["filename"] for item in omitted),
+                    executor.map(self._synthesize_file_section, omitted)
+                ))
+        
+        diff = "".join(sections.get(item["filename"]) or file_section(item) for item in items)
+        print(f"Built the diff of {len(items)} file(s) from the file listing in {time.monotonic() - start:.2f}s "
+              f"({len(omitted)} omitted patch(es) synthesized)")
+        return diff
+    
+    def _synthesize_file_section(self, item):
+        """Diff section for a listed file without a patch, built from its base and head blobs."""
+        try:
+            head = self._get_raw_content(f"repos/{self.repo}/git/blobs/{item['sha']}")
+            base = b""
+            if item.get("status") != "added" and self.base_sha:
+                base_path = item.get("previous_filename") or item["filename"]
+                base = self._get_raw_content(f"repos/{self.repo}/contents/{quote(base_path)}", ref=self.base_sha)
+        except requests.exceptions.RequestException as e:
+            print(f"Could not fetch {item['filename']} to rebuild its omitted patch: {e}")
+            return None
         
-        return dict(added_lines)
+        try:
+            return file_section(item, synthesize_patch(base.decode("utf-8"), head.decode("utf-8")))
+        except UnicodeDecodeError:
+            return file_section(item, binary=True)
+    
+    def _get_raw_content(self, path, ref=None):
+        """Raw bytes of a blob or file; empty when it does not exist."""
+        try:
+            return self.client.get(
+                path,
+                params={"ref": ref} if ref else None,
+                accept="application/vnd.github.raw"
+            ).content
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return b""
+            raise
+    
+    def parse_diff(self, diff):
+        """Parse the diff once into an indexed ParsedDiff shared by every later step."""
+        return ParsedDiff(diff)
+    
+    def _get_reviews(self):
+        """Fetch the PR's reviews once, oldest first."""
+        if self._reviews is None:
+            self._reviews = list(self.client.paginate(f"repos/{self.repo}/pulls/{self.pr_number}/reviews"))
+        return self._reviews
     
     def get_previous_confidence_score(self):
         """Fetch the previous confidence score from the most recent review comment."""
         try:
-            res = subprocess.run([
-                "gh", "api", 
-                f"repos/{self.repo}/pulls/{self.pr_number}/reviews",
-                "--jq", ".[-1].body // empty"
-            ], capture_output=True, text=True, check=False)
+            reviews = self._get_reviews()
+            latest_review = (reviews[-1].get("body") or "").strip() if reviews else ""
             
-            if res.returncode == 0 and res.stdout.strip():
-                latest_review = res.stdout.strip()
+            if latest_review:
                 confidence_match = re.search(r"Merge Confidence:\s*(\d+)%", latest_review)
                 if confidence_match:
                     score = int(confidence_match.group(1))
@@ -91,130 +181,384 @@ class PRHandler:
             print(f"Error fetching previous confidence score: {e}")
             return None
     
-    def process_diff_with_enhanced_context(self, diff):
-        """Process diff and create structured data with enhanced context."""
-        ps = PatchSet(diff.splitlines(keepends=True))
-        structured_files = []
+    def get_last_reviewed_sha(self):
+        """Find the head SHA recorded by the most recent review this action posted."""
+        try:
+            for review in reversed(self._get_reviews()):
+                match = REVIEWED_SHA_RE.search(review.get("body") or "")
+                if match:
+                    return match.group(1)
+        except Exception as e:
+            print(f"Error fetching last reviewed head: {e}")
+        return None
+    
+    def limit_to_changes_since_last_review(self, parsed_diff):
+        """
+        Restrict a synchronize run to the lines added since the last reviewed head.
+        
+        Returns the full parsed diff when there is no earlier review marker, the event
+        is not a push to the PR, or the last reviewed head is no longer an ancestor of
+        the new head (force-push).
+        """
+        if self.event.get("action") != "synchronize":
+            return parsed_diff
+        
+        last_sha = self.get_last_reviewed_sha()
+        if not last_sha:
+            print("No reviewed head marker found, running a full review")
+            return parsed_diff
         
-        for pfile in ps:
+        if last_sha == self.head_sha:
+            print(f"Head {self.head_sha[:7]} was already reviewed, nothing new to review")
+            return parsed_diff.restrict({})
+        
+        compare_path = f"repos/{self.repo}/compare/{last_sha}...{self.head_sha}"
+        try:
+            status = self.client.get(compare_path, params={"per_page": 1}).json().get("status")
+            if status != "ahead":
+                print(f"Last reviewed head {last_sha[:7]} is {status} relative to the new head "
+                      f"(force-push?), running a full review")
+                return parsed_diff
+            
+            changes = ParsedDiff(self.client.get(compare_path, accept="application/vnd.github.v3.diff").text)
+        except requests.exceptions.HTTPError as e:
+            print(f"Could not compare with last reviewed head {last_sha[:7]} ({e}), running a full review")
+            return parsed_diff
+        
+        changed_lines = {
+            pfile.path: set(pfile.added_lines)
+            for pfile in changes
+            if not pfile.is_removed_file and pfile.added_lines
+        }
+        incremental_diff = parsed_diff.restrict(changed_lines)
+        print(f"Incremental review since {last_sha[:7]}: {len(incremental_diff)} of {len(parsed_diff)} file(s) changed")
+        return incremental_diff
+    
+    def process_diff_with_enhanced_context(self, parsed_diff, token_budget=None):
+        """
+        Process diff and create structured data with enhanced context.
+        
+        Each file gets the richest context tier (full file, merged hunks, hunks only or
+        metadata only) that fits the token budget. Without a budget every file gets
+        its richest tier.
+        """
+        return [
+            file_data
+            for structured_files in self.iter_context_batches(parsed_diff, token_budget=token_budget)
+            for file_data in structured_files
+        ]
+    
+    def iter_context_batches(self, parsed_diff, token_budget=None, batch_files=0, before_batch=None):
+        """
+        Yield the structured file data of the PR in batches of at most batch_files files.
+        
+        Each batch is fetched, packed into its share of the token budget and yielded
+        before the next batch is fetched, so only one batch's file contents and
+        context are held at a time. A batch_files of 0 yields every file at once.
+        
+        token_budget is the whole PR's. Each batch gets the budget still unused in
+        proportion to its share of the files still to come, so what one batch leaves
+        over goes to the batches after it.
+        
+        Args:
+            parsed_diff (ParsedDiff): Diff to build context for
+            token_budget (int): Token budget of the whole PR; None for no budget
+            batch_files (int): Most files per batch; 0 for a single batch
+            before_batch (callable): Called with the batch index before each batch is fetched
+        """
+        batches = self._plan_context_batches(parsed_diff, batch_files)
+        remaining_budget = token_budget
+        remaining_files = sum(len(batch) for batch in batches)
+        
+        for index, batch in enumerate(batches):
+            if before_batch:
+                before_batch(index)
+            batch_budget = None
+            if remaining_budget is not None:
+                batch_budget = remaining_budget * len(batch) // remaining_files
+            if len(batches) > 1:
+                print(f"Context batch {index + 1}/{len(batches)}: {len(batch)} file(s)")
+            
+            structured_files, used_tokens = self._process_batch(batch, parsed_diff, batch_budget)
+            if remaining_budget is not None:
+                remaining_budget = max(0, remaining_budget - used_tokens)
+            remaining_files -= len(batch)
+            yield structured_files
+            
+            # The caller has sent the batch; drop everything built for it before the next one
+            del structured_files
+            for pfile in batch:
+                pfile.release_indexes()
+    
+    def _plan_context_batches(self, parsed_diff, batch_files):
+        """
+        Split the files to review into batches of at most batch_files files; 0 makes one batch.
+        
+        Removed files, excluded file types and files without added lines are left out.
+        Nothing is fetched yet.
+        """
+        review_files = []
+        for pfile in parsed_diff:
             if pfile.is_removed_file:
                 continue
-                
-            filepath = pfile.path
             
             # Skip excluded file types
-            if self._should_exclude_file(filepath):
-                print(f"Skipping excluded file: {filepath}")
+            if self._should_exclude_file(pfile.path):
+                print(f"Skipping excluded file: {pfile.path}")
                 continue
-                
+            
+            # Only include files with added lines
+            if pfile.added_lines:
+                review_files.append(pfile)
+        
+        batch_files = batch_files or len(review_files)
+        return [review_files[start:start + batch_files] for start in range(0, len(review_files), batch_files)]
+    
+    def _process_batch(self, review_files, parsed_diff, token_budget):
+        """Fetch, pack and attach context for one batch of files; return (structured files, tokens used)."""
+        # Fetch head content for every file of the batch up front, concurrently
+        file_contents, cached_metadata = self._load_file_contents([pfile.path for pfile in review_files], parsed_diff)
+        
+        candidates = []
+        new_cache_entries = []
+        for pfile in review_files:
+            filepath = pfile.path
             print(f"Processing file: {filepath}")
             
             # Get current file content for metadata and context
-            file_content = self._get_file_content(filepath, diff)
-            file_metadata = self._extract_file_metadata(file_content, filepath)
-            # Check if we should include full file content (for files < 75,000 characters)
-            include_full_file = file_content and len(file_content) < 75000
-            
-            # Process added lines with exact line numbers
-            added_lines = {}
-            line_contexts = {}
+            file_content = file_contents.pop(filepath, None)
+            file_metadata = cached_metadata.get(filepath)
+            if file_metadata is None:
+                file_metadata = self._extract_file_metadata(file_content, filepath)
+                if self.content_cache and file_content is not None:
+                    # Only the content-derived fields; the same blob can live under other names
+                    content_metadata = {key: value for key, value in file_metadata.items() if key != "file_type"}
+                    new_cache_entries.append((self._blob_shas.get(filepath), file_content, content_metadata))
             
-            for hunk in pfile:
-                for line in hunk:
-                    if line.is_added:
-                        line_num = line.target_line_no
-                        line_content = line.value.rstrip('\n\r')
-                        added_lines[line_num] = line_content
-                        
-                        # Skip individual line context if we're including full file
-                        if not include_full_file:
-                            # Use diff-based context for accurate line mapping
-                            diff_context = self._get_diff_context(hunk, line_num, context_lines=15)
-                            if diff_context:
-                                line_contexts[line_num] = diff_context
-                            elif file_content:
-                                # Fallback to enhanced file-based context (30 lines)
-                                line_contexts[line_num] = self._get_surrounding_context(
-                                    file_content, line_num, context_lines=30
-                                )
-            
-            if added_lines:  # Only include files with added lines
-                file_data = {
-                    "file": filepath,
-                    "added_lines": added_lines,
-                    "line_contexts": line_contexts,
-                    "metadata": file_metadata,
-                    "total_additions": len(added_lines)
-                }
-                
-                # Add full file content for smaller files
-                if include_full_file:
-                    file_data["full_file_content"] = file_content
+            file_data = {
+                "file": filepath,
+                "added_lines": dict(pfile.added_lines),
+                "line_contexts": {},
+                "metadata": file_metadata,
+                "total_additions": len(pfile.added_lines)
+            }
+            candidates.append(self._build_context_candidate(pfile, file_content, file_data))
+        
+        if new_cache_entries:
+            self.content_cache.put_many(new_cache_entries)
+        
+        tiers, used_tokens = ContextPacker(token_budget).pack(candidates)
+        
+        structured_files = []
+        for candidate in candidates:
+            self._apply_context_tier(candidate, tiers[candidate["file"]])
+            structured_files.append(candidate["file_data"])
+        
+        self._report_context_tiers(tiers, used_tokens, token_budget)
+        return structured_files, used_tokens
+    
+    def _build_context_candidate(self, pfile, file_content, file_data):
+        """Estimate the token cost of every context tier available for a file."""
+        # Rough cost of the file header and the "Line N: `...`" listing of added lines
+        header_chars = 80 + len(pfile.path)
+        listing_chars = sum(len(line) + 16 for line in pfile.added_lines.values())
+        outline_chars = sum(
+            len(item) + 4
+            for items in file_data["metadata"].values() if isinstance(items, list)
+            for item in items[:5]
+        )
+        
+        hunk_regions, hunk_chars, _ = self._build_context_regions(pfile, context_lines=3)
+        costs = {
+            TIER_METADATA_ONLY: estimate_tokens(header_chars + outline_chars),
+            TIER_HUNKS_ONLY: estimate_tokens(header_chars + hunk_chars)
+        }
+        
+        merged_regions = None
+        if self.context_mode == "merged":
+            merged_regions, merged_chars, per_line_chars = self._build_context_regions(
+                pfile, context_lines=15, file_content=file_content
+            )
+            costs[TIER_MERGED_HUNKS] = estimate_tokens(header_chars + merged_chars)
+        else:
+            _, _, per_line_chars = self._build_context_regions(pfile, context_lines=15)
+            costs[TIER_MERGED_HUNKS] = estimate_tokens(header_chars + listing_chars + per_line_chars)
+        
+        if file_content:
+            # Upper bound covering both full-file formats: numbered lines plus the added-line listing
+            numbering_chars = 10 * file_data["metadata"]["line_count"]
+            costs[TIER_FULL_FILE] = estimate_tokens(header_chars + len(file_content) + numbering_chars + listing_chars)
+        
+        return {
+            "file": pfile.path,
+            "additions": len(pfile.added_lines),
+            "costs": costs,
+            "pfile": pfile,
+            "file_content": file_content,
+            "file_data": file_data,
+            "hunk_regions": hunk_regions,
+            "merged_regions": merged_regions,
+            "per_line_tokens": estimate_tokens(per_line_chars)
+        }
+    
+    def _apply_context_tier(self, candidate, tier):
+        """Attach the context of the chosen tier to the file data."""
+        file_data = candidate["file_data"]
+        file_data["context_tier"] = tier
+        
+        if tier == TIER_FULL_FILE:
+            file_data["full_file_content"] = candidate["file_content"]
+        elif tier == TIER_MERGED_HUNKS and self.context_mode == "merged":
+            file_data["context_regions"] = candidate["merged_regions"]
+            merged_tokens = candidate["costs"][TIER_MERGED_HUNKS]
+            per_line_tokens = candidate["per_line_tokens"]
+            saved = 100 * (1 - merged_tokens / per_line_tokens) if per_line_tokens else 0
+            print(f"Merged context for {candidate['file']}: ~{merged_tokens} tokens vs ~{per_line_tokens} per-line "
+                  f"({saved:.0f}% saved, {len(candidate['merged_regions'])} region(s))")
+        elif tier == TIER_MERGED_HUNKS:
+            file_data["line_contexts"] = self._get_line_contexts(candidate["pfile"], candidate["file_content"])
+        elif tier == TIER_HUNKS_ONLY:
+            file_data["context_regions"] = candidate["hunk_regions"]
+    
+    def _report_context_tiers(self, tiers, used_tokens, token_budget):
+        """Print how many files landed in each context tier."""
+        counts = {tier: 0 for tier in TIERS}
+        for tier in tiers.values():
+            counts[tier] += 1
+        
+        budget_text = f"{token_budget} token budget" if token_budget is not None else "no token budget"
+        breakdown = ", ".join(f"{tier}={count}" for tier, count in counts.items())
+        print(f"Context packing ({budget_text}, ~{used_tokens} used): {breakdown}")
+        for filepath, tier in tiers.items():
+            if tier in (TIER_HUNKS_ONLY, TIER_METADATA_ONLY):
+                print(f"  {filepath}: {tier}")
+    
+    def _get_line_contexts(self, pfile, file_content):
+        """Build a separate diff context block for every added line."""
+        line_contexts = {}
+        
+        for hunk in pfile:
+            for line_type, line_num, line_content in hunk:
+                if line_type != LINE_ADDED:
+                    continue
                 
-                structured_files.append(file_data)
+                # Use diff-based context for accurate line mapping
+                diff_context = self._get_diff_context(hunk, line_num, context_lines=15)
+                if diff_context:
+                    line_contexts[line_num] = diff_context
+                elif file_content:
+                    # Fallback to enhanced file-based context (30 lines)
+                    line_contexts[line_num] = self._get_surrounding_context(
+                        file_content, line_num, context_lines=30
+                    )
         
-        return structured_files
+        return line_contexts
+    
+    def get_file_blob_shas(self):
+        """Map each file in the PR to its blob SHA at the head commit."""
+        if self._blob_shas is None:
+            try:
+                self._blob_shas = {
+                    item["filename"]: item.get("sha")
+                    for item in self.client.paginate_concurrently(
+                        f"repos/{self.repo}/pulls/{self.pr_number}/files",
+                        workers=self.fetch_workers
+                    )
+                }
+            except Exception as e:
+                print(f"Error listing PR files for the content cache: {e}")
+                self._blob_shas = {}
+        return self._blob_shas
     
-    def _get_file_content(self, filepath, diff_content=None):
+    def _load_file_contents(self, filepaths, parsed_diff=None):
+        """
+        Get head content for several files, serving unchanged blobs from the content cache.
+        
+        Returns:
+            tuple: ({path: content}, {path: cached metadata})
+        """
+        if not self.content_cache:
+            return self._fetch_file_contents(filepaths, parsed_diff), {}
+        
+        blob_shas = self.get_file_blob_shas()
+        cached = self.content_cache.get_many(blob_shas.get(filepath) for filepath in filepaths)
+        
+        file_contents = {}
+        cached_metadata = {}
+        missing = []
+        for filepath in filepaths:
+            entry = cached.get(blob_shas.get(filepath))
+            if entry is None:
+                missing.append(filepath)
+            else:
+                # Entries are keyed by content alone; the file type comes from this file's own path
+                content, metadata = entry
+                file_contents[filepath] = content
+                cached_metadata[filepath] = dict(metadata, file_type=self._file_type(filepath))
+        
+        file_contents.update(self._fetch_file_contents(missing, parsed_diff))
+        self.content_cache.report()
+        return file_contents, cached_metadata
+    
+    def _fetch_file_contents(self, filepaths, parsed_diff=None):
+        """Fetch head content for several files with bounded concurrency, keyed by path."""
+        if not filepaths:
+            return {}
+        
+        workers = min(self.fetch_workers, len(filepaths))
+        start = time.monotonic()
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            contents = executor.map(
+                lambda filepath: self._get_file_content(filepath, parsed_diff),
+                filepaths
+            )
+            file_contents = dict(zip(filepaths, contents))
+        
+        elapsed = time.monotonic() - start
+        print(f"Fetched {len(filepaths)} file(s) in {elapsed:.2f}s using {workers} worker(s)")
+        return file_contents
+    
+    def _get_file_content(self, filepath, parsed_diff=None):
         """Fetch the current content of a file from the PR's head branch."""
-        ref = self.event["pull_request"]["head"]["sha"]
+        ref = self.head_sha
         
         try:
-            res = subprocess.run(
-                [
-                    "gh", "api",
-                    f"repos/{self.repo}/contents/{filepath}",
-                    "-F", f"ref={ref}",
-                    "--jq", ".content"
-                ],
-                capture_output=True, text=True, check=True
+            # The raw media type skips the base64 envelope and works for files over 1 MB
+            res = self.client.get(
+                f"repos/{self.repo}/contents/{quote(filepath)}",
+                params={"ref": ref},
+                accept="application/vnd.github.raw"
             )
-
-            cleaned = res.stdout.strip().replace('\n', '')
-            if cleaned:
-                return base64.b64decode(cleaned).decode('utf-8')
+            
+            if res.content:
+                return res.content.decode('utf-8')
             return None
             
-        except subprocess.CalledProcessError:
+        except requests.exceptions.HTTPError:
             # File doesn't exist in repository (likely a new file)
-            if diff_content:
-                return self._reconstruct_file_from_diff(filepath, diff_content)
+            if parsed_diff:
+                return self._reconstruct_file_from_diff(filepath, parsed_diff)
             return None
     
-    def _reconstruct_file_from_diff(self, filepath, diff_content):
+    def _reconstruct_file_from_diff(self, filepath, parsed_diff):
         """Reconstruct file content from diff for new files."""
-        try:
-            file_pattern = rf"^diff --git a/{re.escape(filepath)} b/{re.escape(filepath)}"
-            file_match = re.search(file_pattern, diff_content, re.MULTILINE)
-            
-            if not file_match:
-                return None
-                
-            start_pos = file_match.start()
-            next_file_match = re.search(r"^diff --git", diff_content[start_pos + 1:], re.MULTILINE)
-            
-            if next_file_match:
-                file_diff = diff_content[start_pos:start_pos + 1 + next_file_match.start()]
-            else:
-                file_diff = diff_content[start_pos:]
-            
-            if "new file mode" in file_diff:
-                lines = []
-                for line in file_diff.split('\n'):
-                    if line.startswith('+') and not line.startswith('+++'):
-                        lines.append(line[1:])
-                return '\n'.join(lines)
-                
-            return None
-            
-        except Exception as e:
-            print(f"Warning: Could not reconstruct {filepath} from diff: {e}")
+        # A restricted view only lists some added lines; the new file needs all of them
+        pfile = parsed_diff.unrestricted().get(filepath)
+        if pfile is None or not pfile.is_added_file:
             return None
+        
+        # Every line of a new file is an added line, already indexed in order
+        return '\n'.join(pfile.added_lines.values())
+    
+    def _file_type(self, filepath):
+        """File type reported in a file's metadata: its extension."""
+        return Path(filepath).suffix or "unknown"
     
     def _extract_file_metadata(self, content, filepath):
         """Extract enhanced metadata from file content."""
         metadata = {
-            "file_type": Path(filepath).suffix or "unknown",
+            "file_type": self._file_type(filepath),
             "imports": [],
             "exports": [],
             "functions": [],
@@ -279,34 +623,79 @@ class PRHandler:
     
     def _get_diff_context(self, hunk, target_line, context_lines=10):
         """Get context lines from the diff hunk itself for accurate line mapping."""
+        index = hunk.index
+        target_idx = index.positions.get(target_line)
+        if target_idx is None:
+            return ""
+        
+        start = max(0, target_idx - context_lines)
+        end = min(len(index), target_idx + context_lines + 1)
+        
         context = []
+        for line_no, content in zip(index.line_nos[start:end], index.values[start:end]):
+            prefix = ">>> " if line_no == target_line else "    "
+            context.append(f"{prefix}{line_no:4d}: {content}")
+        
+        return "\n".join(context)
+    
+    def _build_context_regions(self, pfile, context_lines, file_content=None):
+        """
+        Merge overlapping windows around added lines into annotated regions.
         
-        target_lines = []
-        for line in hunk:
-            if not line.is_removed:
-                target_lines.append((line.target_line_no, line.value.rstrip('\n\r'), line.is_added))
+        Windows are cut from the head file when its content is given and matches the
+        diff, otherwise from the diff hunks.
         
-        target_lines.sort(key=lambda x: x[0] if x[0] is not None else 0)
+        Returns:
+            tuple: (regions, region_chars, per_line_chars) where per_line_chars is what
+                a separate window per added line would have cost
+        """
+        added_lines = pfile.added_lines
+        sources = []
+        if file_content:
+            lines = file_content.splitlines()
+            if max(added_lines, default=0) <= len(lines):
+                sources.append((range(1, len(lines) + 1), lines))
+        if not sources:
+            sources = [(hunk.index.line_nos, hunk.index.values) for hunk in pfile]
         
-        target_idx = None
-        for i, (line_no, content, is_added) in enumerate(target_lines):
-            if line_no == target_line:
-                target_idx = i
-                break
+        regions = []
+        region_chars = 0
+        per_line_chars = 0
         
-        if target_idx is not None:
-            start = max(0, target_idx - context_lines)
-            end = min(len(target_lines), target_idx + context_lines + 1)
+        for line_nos, values in sources:
+            # Formatted length of each line, as prefix sums for cheap window sizing
+            offsets = [0]
+            for line_no, content in zip(line_nos, values):
+                offsets.append(offsets[-1] + len(f"    {line_no:4d}: {content}\n"))
             
-            for i in range(start, end):
-                line_no, content, is_added = target_lines[i]
-                if line_no is not None:
-                    prefix = ">>> " if line_no == target_line else "    "
-                    context.append(f"{prefix}{line_no:4d}: {content}")
+            windows = []
+            for position, line_no in enumerate(line_nos):
+                if line_no not in added_lines:
+                    continue
+                start = max(0, position - context_lines)
+                end = min(len(line_nos), position + context_lines + 1)
+                per_line_chars += offsets[end] - offsets[start]
+                if windows and start <= windows[-1][1]:
+                    windows[-1][1] = max(windows[-1][1], end)
+                else:
+                    windows.append([start, end])
+            
+            for start, end in windows:
+                lines = []
+                for line_no, content in zip(line_nos[start:end], values[start:end]):
+                    prefix = ">>> " if line_no in added_lines else "    "
+                    lines.append(f"{prefix}{line_no:4d}: {content}")
+                text = "\n".join(lines)
+                region_chars += len(text)
+                regions.append({
+                    "start": line_nos[start],
+                    "end": line_nos[end - 1],
+                    "text": text
+                })
         
-        return "\n".join(context)
+        return regions, region_chars, per_line_chars
     
-    def parse_comments(self, comments_array, added_lines):
+    def parse_comments(self, comments_array, parsed_diff):
         """Turn the AI comments array into GitHub review-comments using line-based approach."""
         comments = []
         skipped_comments = 0
@@ -328,7 +717,7 @@ class PRHandler:
                 skipped_comments += 1
                 continue
             
-            if path in added_lines and line in added_lines[path]:
+            if parsed_diff.is_added_line(path, line):
                 comments.append({
                     "path": path,
                     "line": line,
@@ -367,17 +756,19 @@ class PRHandler:
             print("No comments or summary to post.")
             return
 
+        # Hidden marker recording the reviewed head, used by later incremental runs
+        body = f"{summary_text}\n\n{REVIEWED_SHA_MARKER.format(sha=self.head_sha)}"
+        
         payload = {
-            "body": summary_text,
+            "body": body,
             "event": "COMMENT",
             "comments": comments
         }
-        url = f"https://api.github.com/repos/{self.repo}/pulls/{self.pr_number}/reviews"
-        hdrs = {
-            "Authorization": f"Bearer {self.github_token}",
-            "Accept": "application/vnd.github+json"
-        }
-        res = requests.post(url, headers=hdrs, json=payload)
+        res = self.client.post(
+            f"repos/{self.repo}/pulls/{self.pr_number}/reviews",
+            json=payload,
+            raise_for_status=False
+        )
         if not res.ok:
             print("Failed to post review comments:", res.text)
         else:
@@ -9,43 +9,133 @@ from config.settings import Config
 from providers.provider_factory import ProviderFactory
 from prompts.prompt_factory import PromptFactory
 from github.pr_handler import PRHandler
-from utils.helpers import handle_error
+from github.content_cache import ContentCache
+from review.sharded_review import ShardedReviewer
+from review.review_cache import ReviewCache
+from utils.helpers import handle_error, estimate_tokens
+from utils.tracing import tracer
+from utils.cassette import Cassette
+from utils.profiling import Profiler
+from providers.usage import summarize, append_to_ledger
+from datetime import datetime, timezone
 
 def main():
     """Main execution function following the original review.py pattern."""
+    config = None
+    cassette = None
+    profiler = None
+    content_cache = None
     try:
+        tracer.stage("1) Load configuration")
         print("1) Loading configuration...")
         config = Config()
-        print(f"Using AI provider: {config.ai_provider}")
+        if len(config.ai_providers) > 1:
+            print(f"Using AI providers (hedged, in order): {', '.join(config.ai_providers)}")
+        else:
+            print(f"Using AI provider: {config.ai_provider}")
         print(f"Using framework: {config.framework}")
         
+        if config.profile_dir:
+            profiler = Profiler(
+                config.profile_dir,
+                cpu=config.profile_cpu,
+                memory=config.profile_memory,
+                top=config.profile_top
+            ).start()
+            tracer.add_stage_listener(profiler.stage_ended)
+            print(f"Profiling to {config.profile_dir}")
+        
+        if config.http_cassette:
+            cassette = Cassette(
+                config.http_cassette,
+                mode=config.http_cassette_mode,
+                timing=config.replay_timing,
+                secrets=config.secret_values()
+            ).install()
+            print(f"HTTP cassette: {config.http_cassette_mode} {config.http_cassette}")
+        
+        tracer.stage("2) Fetch diff")
         print("2) Fetching diff...")
-        pr_handler = PRHandler(config.github_token)
+        if config.content_cache_path:
+            content_cache = ContentCache(config.content_cache_path, max_bytes=config.content_cache_max_mb * 1024 * 1024)
+        
+        pr_handler = PRHandler(
+            config.github_token,
+            fetch_workers=config.fetch_workers,
+            context_mode=config.context_mode,
+            content_cache=content_cache,
+            diff_source=config.diff_source
+        )
         diff = pr_handler.get_diff()
+        diff_bytes = len(diff.encode("utf-8"))
+        parsed_diff = pr_handler.parse_diff(diff)
+        # Only the parsed form is used from here on
+        del diff
+        print(f"Parsed {len(parsed_diff)} file(s) from diff")
         
+        tracer.stage("3) Previous review state")
         print("3) Fetching previous confidence score...")
         previous_score = pr_handler.get_previous_confidence_score()
         
+        # On pushes to the PR, only review what changed since the last reviewed head
+        review_diff = parsed_diff
+        if config.incremental_review:
+            review_diff = pr_handler.limit_to_changes_since_last_review(parsed_diff)
+        
+        tracer.stage("4) Build context")
         print("4) Sending files + diffs to AI provider...")
         provider = ProviderFactory.create_provider(config)
         prompt = PromptFactory.create_prompt(config.framework)
         
-        # Process diff and create review request
-        structured_files = pr_handler.process_diff_with_enhanced_context(diff)
-        if not structured_files:
-            print("No files with added lines found.")
-            return
-        
-        enhanced_message = prompt.create_enhanced_review_message(structured_files, previous_score)
         system_prompt = prompt.get_system_prompt()
         
-        print("5) Waiting for AI response...")
-        output = provider.review_code(enhanced_message, system_prompt)
+        # Share the provider's input budget between files, after the system prompt; each shard
+        # is a separate request with its own budget
+        token_budget = config.context_token_budget or provider.context_token_budget
+        token_budget = max(0, token_budget - estimate_tokens(system_prompt)) * config.review_shards
+        
+        review_cache = None
+        if config.review_cache_dir:
+            review_cache = ReviewCache(config.review_cache_dir, max_bytes=config.review_cache_max_mb * 1024 * 1024)
+        
+        reviewer = ShardedReviewer(
+            provider,
+            prompt,
+            shards=config.review_shards,
+            workers=config.shard_workers,
+            full_file_format=config.full_file_format,
+            cache=review_cache
+        )
+        
+        # Files flow through context building and review in batches; each batch's contents
+        # and messages are released before the next batch is fetched
+        def reopen_context_stage(index):
+            # The first batch is built in the stage opened above
+            if index:
+                tracer.stage("4) Build context")
         
-        print("6) Getting added lines...")
-        added_lines = pr_handler.get_added_lines(diff)
+        batches = pr_handler.iter_context_batches(
+            review_diff,
+            token_budget=token_budget,
+            batch_files=config.review_batch_files,
+            before_batch=reopen_context_stage
+        )
+        for structured_files in batches:
+            tracer.stage("5) AI review")
+            print("5) Waiting for AI response...")
+            reviewer.add_batch(structured_files, system_prompt, previous_score)
+            del structured_files
         
-        print("7) Processing summary and comments...")
+        if not reviewer.files_reviewed:
+            print("No files with added lines found.")
+            return
+        
+        output = reviewer.result()
+        provider.report_retries()
+        provider.report_usage()
+        
+        tracer.stage("6) Process comments")
+        print("6) Processing summary and comments...")
         summary = output.get("summary")
         comments_array = output.get("comments", [])
         
@@ -53,14 +143,61 @@ def main():
         summary_text = pr_handler.create_summary_text(summary)
         
         # Parse line comments using line-based approach
-        comments = pr_handler.parse_comments(comments_array, added_lines)
+        comments = pr_handler.parse_comments(comments_array, parsed_diff)
         
-        print("8) Posting review to GitHub...")
+        tracer.stage("7) Post review")
+        print("7) Posting review to GitHub...")
         pr_handler.post_review_comments(comments, summary_text)
         
+        if config.usage_ledger:
+            write_usage_ledger(config.usage_ledger, pr_handler, provider, diff_bytes, review_diff, reviewer)
+        
     except Exception as e:
         handle_error(e)
         sys.exit(1)
+    finally:
+        if content_cache:
+            content_cache.close()
+        replay_matched = cassette.finish() if cassette else True
+        write_trace(config)
+        if profiler:
+            profiler.finish()
+        if not replay_matched:
+            sys.exit(1)
+
+def write_usage_ledger(path, pr_handler, provider, diff_bytes, review_diff, reviewer):
+    """Append this run's token usage and cost, with the size of what was reviewed, to the JSONL ledger."""
+    records = provider.all_usage_records()
+    entry = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "repository": pr_handler.repo,
+        "pr_number": pr_handler.pr_number,
+        "head_sha": pr_handler.head_sha,
+        "diff_bytes": diff_bytes,
+        "files_in_diff": len(review_diff),
+        "files_reviewed": reviewer.files_reviewed,
+        "added_lines": reviewer.added_lines,
+        "total": summarize(records),
+        "calls": records
+    }
+    try:
+        append_to_ledger(path, entry)
+        print(f"Usage appended to {path}")
+    except OSError as e:
+        print(f"Warning: could not write usage ledger: {e}")
+
+def write_trace(config):
+    """Write the run's timing trace: a JSON file if configured, and a table in the job summary."""
+    tracer.end_stage()
+    try:
+        if config and config.trace_file:
+            tracer.write_json(config.trace_file)
+            print(f"Timing trace written to {config.trace_file}")
+        step_summary = os.environ.get("GITHUB_STEP_SUMMARY")
+        if step_summary and (config is None or config.trace_step_summary):
+            tracer.write_step_summary(step_summary)
+    except OSError as e:
+        print(f"Warning: could not write timing trace: {e}")
 
 if __name__ == "__main__":
     main()
@@ -46,33 +46,98 @@ Risk Assessment:
 - Medium risk: Some issues that could affect functionality or maintainability  
 - High risk: Critical issues, security vulnerabilities, or major architectural problems"""
     
-    def create_enhanced_review_message(self, structured_files, previous_score=None):
-        """Create a structured message for code review."""
-        message_parts = []
+    def create_enhanced_review_message(self, structured_files, previous_score=None, full_file_format="standard"):
+        """
+        Create a structured message for code review.
+        
+        Args:
+            structured_files (list): File data from PRHandler.process_diff_with_enhanced_context
+            previous_score (int): Confidence score of the previous review, if any
+            full_file_format (str): "standard" sends full files plus a list of added lines,
+                "annotated" sends full files once with added lines marked inline
+            
+        Returns:
+            tuple: (stable_prefix, message); see assemble_review_message
+        """
+        parts = [self.render_file_parts(file_data, full_file_format) for file_data in structured_files]
+        return self.assemble_review_message(parts, previous_score)
+    
+    def assemble_review_message(self, file_parts, previous_score=None):
+        """
+        Assemble rendered (stable, variable) file parts into a cache-friendly prompt.
+        
+        Returns:
+            tuple: (stable_prefix, message). The prefix holds the full file contents sorted
+                by path, so identical files produce an identical prefix that providers can
+                cache; the message holds the review request and anything run-specific.
+        """
+        stable_parts = sorted(stable for stable, _ in file_parts if stable)
+        stable_prefix = ""
+        if stable_parts:
+            stable_prefix = "## FULL FILE CONTENTS\n\nCurrent contents of the changed files, referenced by the review request below:"
+            stable_prefix += "".join(stable_parts) + "\n\n"
         
         header = f"## {self.framework.upper()} CODE REVIEW\n\nReview the following {self.framework} code changes:"
         
         if previous_score is not None:
             header += f"\n\nPrevious confidence score: {previous_score}%"
         
-        message_parts.append(header)
+        return stable_prefix, "\n".join([header] + [variable for _, variable in file_parts])
+    
+    def render_file_parts(self, file_data, full_file_format="standard"):
+        """
+        Render a file's section as (stable, variable) parts.
         
-        for file_data in structured_files:
-            file_section = f"\n\n### File: {file_data['file']}\n"
-            file_section += f"Added lines: {file_data['total_additions']}\n\n"
-            
-            if file_data.get('full_file_content'):
-                file_section += f"```{self.language_ext}\n{file_data['full_file_content']}\n```\n\n"
-            
-            file_section += "**Lines to review:**\n\n"
-            
-            for line_num, line_content in sorted(file_data['added_lines'].items()):
-                file_section += f"Line {line_num}: `{line_content}`\n"
-                
-                if not file_data.get('full_file_content') and line_num in file_data['line_contexts']:
-                    file_section += f"```{self.language_ext}\n{file_data['line_contexts'][line_num]}\n```\n"
-                file_section += "\n"
+        The stable part is the full file content, which only changes with the file
+        itself and can be placed in the cacheable prompt prefix; the variable part
+        holds what to review. Files sent without full content have no stable part.
+        """
+        header = f"\n\n### File: {file_data['file']}\n"
+        file_section = f"Added lines: {file_data['total_additions']}\n\n"
+        
+        if file_data.get('context_tier') == "metadata_only":
+            # Code was left out to fit the token budget; give the reviewer the file outline only
+            file_section += "Code omitted to fit the review size limit. File outline:\n"
+            for kind in ("classes", "interfaces", "functions", "exports", "imports"):
+                for item in file_data['metadata'].get(kind, [])[:5]:
+                    file_section += f"- {item}\n"
+            return "", header + file_section + "\n"
+        
+        if file_data.get('full_file_content') and full_file_format == "annotated":
+            # The file is sent once, numbered, so the added lines are not repeated below it
+            stable = header + "**Full file** (added lines to review are marked with `>>>`):\n\n"
+            stable += f"```{self.language_ext}\n"
+            stable += self._annotate_file(file_data['full_file_content'], file_data['added_lines'])
+            stable += "\n```\n"
+            return stable, header + file_section + "Review the lines marked with `>>>` in the full file above.\n\n"
+        
+        stable = ""
+        if file_data.get('full_file_content'):
+            stable = header + f"```{self.language_ext}\n{file_data['full_file_content']}\n```\n"
+        
+        if file_data.get('context_regions'):
+            # Merged regions already carry every added line, marked inline
+            file_section += "**Changed regions** (added lines to review are marked with `>>>`):\n\n"
+            for region in file_data['context_regions']:
+                file_section += f"Lines {region['start']}-{region['end']}:\n"
+                file_section += f"```{self.language_ext}\n{region['text']}\n```\n\n"
+            return stable, header + file_section
+        
+        file_section += "**Lines to review:**\n\n"
+        
+        for line_num, line_content in sorted(file_data['added_lines'].items()):
+            file_section += f"Line {line_num}: `{line_content}`\n"
             
-            message_parts.append(file_section)
+            if not file_data.get('full_file_content') and line_num in file_data['line_contexts']:
+                file_section += f"```{self.language_ext}\n{file_data['line_contexts'][line_num]}\n```\n"
+            file_section += "\n"
         
-        return "\n".join(message_parts)
+        return stable, header + file_section
+    
+    def _annotate_file(self, content, added_lines):
+        """Number every line of a file and mark the added ones with >>>."""
+        annotated = []
+        for line_num, line in enumerate(content.splitlines(), start=1):
+            prefix = ">>> " if line_num in added_lines else "    "
+            annotated.append(f"{prefix}{line_num:4d}: {line}")
+        return "\n".join(annotated)
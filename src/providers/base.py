@@ -1,19 +1,40 @@
+import threading
+import time
 from abc import ABC, abstractmethod
+from .retry import RETRY_STATUSES, RETRY_EXCEPTIONS, backoff_delay, server_requested_delay
+from .usage import estimate_cost, price_for, summarize
+from utils.tracing import tracer
 
 class BaseProvider(ABC):
     """Abstract base class for AI providers."""
     
+    # Input tokens available for file context in one request, kept well inside the
+    # model's context window so requests stay fast and are not truncated
+    context_token_budget = 100_000
+    
     def __init__(self, config):
         self.config = config
+        self.model = None
+        self.max_retries = config.provider_max_retries
+        self.retry_deadline = config.provider_retry_deadline
+        # Shards call the provider from several threads
+        self.retries = 0
+        self.backoff_seconds = 0.0
+        # One normalized record per review call, priced with the configured price table
+        self.prices = config.price_table
+        self.usage_records = []
+        self._stats_lock = threading.Lock()
     
     @abstractmethod
-    def review_code(self, message, system_prompt):
+    def review_code(self, message, system_prompt, stable_prefix=""):
         """
         Review code using the AI provider.
         
         Args:
             message (str): The formatted review message
             system_prompt (str): Framework-specific system prompt (required)
+            stable_prefix (str): Content sent before the message that rarely changes between
+                runs (full file contents); providers place it where their prompt cache applies
             
         Returns:
             dict: Review result with summary and comments
@@ -33,6 +54,121 @@ class BaseProvider(ABC):
         """
         pass
     
+    def _send(self, send, stream=False, before_retry=None):
+        """
+        Send an HTTP request, retrying rate limits, server errors and dropped connections.
+        
+        Waits follow the server's Retry-After/rate-limit reset headers when present,
+        otherwise jittered exponential backoff. No retry is started that could not
+        finish its wait before the per-call deadline.
+        
+        Args:
+            send (callable): Performs one attempt and returns the requests.Response
+            stream (bool): The response body is streamed; its bytes are added to the span as it is read
+            before_retry (callable): Called before each retry; a response it returns is used
+                instead of sending again, for requests that are not safe to repeat blindly
+            
+        Returns:
+            requests.Response: The successful response
+            
+        Raises:
+            requests.exceptions.HTTPError: For a final non-success response
+        """
+        deadline = time.monotonic() + self.retry_deadline
+        attempt = 0
+        while True:
+            with tracer.span(f"{type(self).__name__} HTTP", "provider_http") as span:
+                try:
+                    response = send()
+                    error = None
+                    retryable = response.status_code in RETRY_STATUSES
+                    if stream:
+                        # The body arrives after the span ends; count it as the caller reads it
+                        response.raw = _CountingStream(response.raw, span)
+                    span.add_bytes(0 if stream else len(response.content), len(response.request.body or b""))
+                    span.set("status", response.status_code)
+                except RETRY_EXCEPTIONS as e:
+                    response = None
+                    error = e
+                    retryable = True
+                    span.set("error", type(e).__name__)
+            
+            if not retryable or attempt >= self.max_retries:
+                break
+            
+            attempt += 1
+            delay = backoff_delay(attempt)
+            if response is not None:
+                requested = server_requested_delay(response.headers)
+                if requested is not None:
+                    delay = max(requested, 0.1)
+            if time.monotonic() + delay > deadline:
+                print(f"{type(self).__name__}: not retrying, a {delay:.1f}s wait would pass the {self.retry_deadline}s deadline")
+                break
+            
+            reason = f"HTTP {response.status_code}" if response is not None else type(error).__name__
+            print(f"{type(self).__name__}: {reason}, retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            with self._stats_lock:
+                self.retries += 1
+                self.backoff_seconds += delay
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+            
+            if before_retry is not None:
+                recovered = before_retry()
+                if recovered is not None:
+                    return recovered
+        
+        if error is not None:
+            raise error
+        response.raise_for_status()
+        return response
+    
+    def _record_usage(self, tokens, started_at):
+        """
+        Store and log the normalized usage of one review call.
+        
+        Args:
+            tokens (dict): Token counts from one of the normalizers in providers.usage
+            started_at (float): time.monotonic() when the review call started
+        """
+        record = {
+            "provider": type(self).__name__,
+            "model": self.model,
+            **tokens,
+            "latency_seconds": round(time.monotonic() - started_at, 3)
+        }
+        record["cost_usd"] = estimate_cost(tokens, price_for(self.model, self.prices))
+        with self._stats_lock:
+            self.usage_records.append(record)
+        cost = f"${record['cost_usd']:.4f}" if record["cost_usd"] is not None else "no price"
+        print(f"{record['provider']} usage: {record['input_tokens']} input ({record['cached_input_tokens']} cached, "
+              f"{record['cache_write_tokens']} written to cache), {record['output_tokens']} output "
+              f"({record['reasoning_tokens']} reasoning) tokens in {record['latency_seconds']:.1f}s, {cost}")
+    
+    def all_usage_records(self):
+        """Usage records of every call made through this provider."""
+        with self._stats_lock:
+            return list(self.usage_records)
+    
+    def report_usage(self):
+        """Print token totals, the prompt cache hit share and the estimated cost."""
+        records = self.all_usage_records()
+        if not records:
+            return
+        total = summarize(records)
+        cached_share = 100 * total["cached_input_tokens"] / total["input_tokens"] if total["input_tokens"] else 0
+        cost = f"${total['cost_usd']:.4f}" if total["cost_usd"] is not None else "unknown (model not in price table)"
+        print(f"{type(self).__name__} total: {total['calls']} call(s), {total['input_tokens']} input tokens "
+              f"({cached_share:.0f}% cached), {total['output_tokens']} output ({total['reasoning_tokens']} reasoning), "
+              f"cost {cost}")
+    
+    def report_retries(self):
+        """Print how often requests were retried and how long was spent backing off."""
+        if self.retries:
+            print(f"{type(self).__name__} retries: {self.retries}, {self.backoff_seconds:.1f}s spent backing off")
+    
     def _validate_response(self, response):
         """
         Validate and parse the AI response.
@@ -74,3 +210,22 @@ class BaseProvider(ABC):
         except Exception as e:
             print(f"Response validation error: {e}")
             return {"summary": None, "comments": []}
+
+
+class _CountingStream:
+    """Wraps a streamed response's raw body, adding each chunk read to the request's span."""
+
+    def __init__(self, raw, span):
+        self._raw = raw
+        self._span = span
+
+    def stream(self, chunk_size=None, decode_content=True):
+        for chunk in self._raw.stream(chunk_size, decode_content=decode_content):
+            self._span.add_bytes(len(chunk))
+            yield chunk
+
+    def close(self):
+        self._raw.close()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
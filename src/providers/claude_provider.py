@@ -1,10 +1,15 @@
 import requests
 import json
+import time
 from .base import BaseProvider
+from .streaming import iter_sse_events, collect_streamed_review, StreamError
+from .usage import from_claude
 
 class ClaudeProvider(BaseProvider):
     """Claude provider using Anthropic's Messages API."""
     
+    context_token_budget = 120_000
+    
     def __init__(self, config):
         super().__init__(config)
         self.api_key = config.claude_api_key
@@ -15,25 +20,48 @@ class ClaudeProvider(BaseProvider):
             "anthropic-version": "2023-06-01"
         }
         self.max_tokens = 64000
+        self.model = "claude-sonnet-4-20250514"
+        self.stream = config.stream_responses
+        self.stream_idle_timeout = config.stream_idle_timeout
     
-    def review_code(self, message, system_prompt):
+    def review_code(self, message, system_prompt, stable_prefix=""):
         """Review code using Claude API."""
+        started_at = time.monotonic()
         try:
+            # Cache breakpoints after the system prompt and after the file contents; the
+            # review request itself is the only uncached part when the files are unchanged
+            content = []
+            if stable_prefix:
+                content.append({"type": "text", "text": stable_prefix, "cache_control": {"type": "ephemeral"}})
+            content.append({"type": "text", "text": message})
+            
             payload = {
-                "model": "claude-sonnet-4-20250514",
+                "model": self.model,
                 "max_tokens": self.max_tokens,
-                "system": system_prompt,
+                "system": [
+                    {
+                        "type": "text",
+                        "text": system_prompt,
+                        "cache_control": {"type": "ephemeral"}
+                    }
+                ],
                 "messages": [
                     {
                         "role": "user",
-                        "content": message
+                        "content": content
                     }
                 ],
                 "temperature": 0.1
             }
             
+            if self.stream:
+                return self._stream_review(payload, started_at)
+            
             response = self._make_api_request(payload)
             
+            if response and response.get("usage"):
+                self._record_usage(from_claude(response["usage"]), started_at)
+            
             if response and "content" in response:
                 content = response["content"]
                 if isinstance(content, list) and len(content) > 0:
@@ -59,11 +87,51 @@ class ClaudeProvider(BaseProvider):
     
     def _make_api_request(self, payload):
         """Make API request to Claude."""
-        response = requests.post(
+        response = self._send(lambda: requests.post(
             self.base_url,
             headers=self.headers,
             json=payload,
             timeout=60
-        )
-        response.raise_for_status()
+        ))
         return response.json()
+    
+    def _stream_review(self, payload, started_at):
+        """Stream the response, parsing comments as they complete."""
+        usage = {}
+        response = self._make_streaming_request(payload)
+        try:
+            with response:
+                return collect_streamed_review(
+                    self._iter_text(response, usage), self._validate_response, "Claude", started_at
+                )
+        finally:
+            if usage:
+                self._record_usage(from_claude(usage), started_at)
+    
+    def _make_streaming_request(self, payload):
+        """Open a streaming request to Claude; the read timeout bounds the gap between chunks, not the total time."""
+        return self._send(lambda: requests.post(
+            self.base_url,
+            headers=self.headers,
+            json={**payload, "stream": True},
+            stream=True,
+            timeout=(10, self.stream_idle_timeout)
+        ), stream=True)
+    
+    def _iter_text(self, response, usage):
+        """Yield the text deltas of a Messages API event stream, collecting its usage into a dict."""
+        for event, data in iter_sse_events(response):
+            if event == "error":
+                raise StreamError(f"Claude stream error: {data}")
+            if event == "message_start":
+                usage.update(json.loads(data).get("message", {}).get("usage") or {})
+                continue
+            if event == "message_delta":
+                # Carries the final output token count
+                usage.update(json.loads(data).get("usage") or {})
+                continue
+            if event != "content_block_delta":
+                continue
+            delta = json.loads(data).get("delta", {})
+            if delta.get("type") == "text_delta":
+                yield delta.get("text", "")
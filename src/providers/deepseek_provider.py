@@ -1,24 +1,33 @@
 import requests
 import json
+import time
 from .base import BaseProvider
+from .streaming import iter_sse_events, collect_streamed_review
+from .usage import from_chat_completion
 
 class DeepSeekProvider(BaseProvider):
     """DeepSeek provider using their API."""
     
+    context_token_budget = 48_000
+    
     def __init__(self, config):
         super().__init__(config)
         self.api_key = config.deepseek_api_key
         self.base_url = "https://api.deepseek.com/v1/chat/completions"
+        self.model = "deepseek-reasoner"
+        self.stream = config.stream_responses
+        self.stream_idle_timeout = config.stream_idle_timeout
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
     
-    def review_code(self, message, system_prompt):
+    def review_code(self, message, system_prompt, stable_prefix=""):
         """Review code using DeepSeek API."""
+        started_at = time.monotonic()
         try:
             payload = {
-                "model": "deepseek-reasoner",
+                "model": self.model,
                 "messages": [
                     {
                         "role": "system",
@@ -26,7 +35,8 @@ class DeepSeekProvider(BaseProvider):
                     },
                     {
                         "role": "user",
-                        "content": message
+                        # Context caching matches on prefixes: the stable file contents go first
+                        "content": stable_prefix + message
                     }
                 ],
                 "temperature": 0.1,
@@ -35,8 +45,14 @@ class DeepSeekProvider(BaseProvider):
                 "presence_penalty": 0
             }
             
+            if self.stream:
+                return self._stream_review(payload, started_at)
+            
             response = self._make_api_request(payload)
             
+            if response and response.get("usage"):
+                self._record_usage(from_chat_completion(response["usage"]), started_at)
+            
             if response and "choices" in response:
                 choices = response["choices"]
                 if len(choices) > 0 and "message" in choices[0]:
@@ -62,11 +78,47 @@ class DeepSeekProvider(BaseProvider):
     
     def _make_api_request(self, payload):
         """Make API request to DeepSeek."""
-        response = requests.post(
+        response = self._send(lambda: requests.post(
             self.base_url,
             headers=self.headers,
             json=payload,
             timeout=60
-        )
-        response.raise_for_status()
+        ))
         return response.json()
+    
+    def _stream_review(self, payload, started_at):
+        """Stream the response, parsing comments as they complete."""
+        usage = {}
+        response = self._make_streaming_request(payload)
+        try:
+            with response:
+                return collect_streamed_review(
+                    self._iter_text(response, usage), self._validate_response, "DeepSeek", started_at
+                )
+        finally:
+            if usage:
+                self._record_usage(from_chat_completion(usage), started_at)
+    
+    def _make_streaming_request(self, payload):
+        """Open a streaming request to DeepSeek; the read timeout bounds the gap between chunks, not the total time."""
+        return self._send(lambda: requests.post(
+            self.base_url,
+            headers=self.headers,
+            json={**payload, "stream": True, "stream_options": {"include_usage": True}},
+            stream=True,
+            timeout=(10, self.stream_idle_timeout)
+        ), stream=True)
+    
+    def _iter_text(self, response, usage):
+        """Yield the answer text deltas of a chat completions stream, collecting its usage into a dict (reasoning deltas are skipped)."""
+        for _, data in iter_sse_events(response):
+            if data == "[DONE]":
+                return
+            chunk = json.loads(data)
+            # The last chunk carries the usage block and no choices
+            usage.update(chunk.get("usage") or {})
+            choices = chunk.get("choices") or []
+            if choices:
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    yield content
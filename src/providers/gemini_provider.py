@@ -1,32 +1,46 @@
 import requests
 import json
+import time
 from .base import BaseProvider
+from .usage import from_gemini
 
 class GeminiProvider(BaseProvider):
     """Gemini provider using Google's Generative AI API."""
     
+    context_token_budget = 200_000
+    
     def __init__(self, config):
         super().__init__(config)
         self.api_key = config.gemini_api_key
-        self.base_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={self.api_key}"
+        self.model = "gemini-2.5-flash"
+        self.base_url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent?key={self.api_key}"
         self.headers = {
             "Content-Type": "application/json"
         }
     
-    def review_code(self, message, system_prompt):
+    def review_code(self, message, system_prompt, stable_prefix=""):
         """Review code using Gemini API."""
+        started_at = time.monotonic()
         try:
-            # Combine system prompt with user message for Gemini
-            combined_message = f"{system_prompt}\n\n{message}"
+            # System instruction first, then the stable file contents, so repeated prompts
+            # share a prefix that Gemini's implicit caching can reuse
+            parts = []
+            if stable_prefix:
+                parts.append({"text": stable_prefix})
+            parts.append({"text": message})
             
             payload = {
+                "systemInstruction": {
+                    "parts": [
+                        {
+                            "text": system_prompt
+                        }
+                    ]
+                },
                 "contents": [
                     {
-                        "parts": [
-                            {
-                                "text": combined_message
-                            }
-                        ]
+                        "role": "user",
+                        "parts": parts
                     }
                 ],
                 "generationConfig": {
@@ -56,6 +70,9 @@ class GeminiProvider(BaseProvider):
             
             response = self._make_api_request(payload)
             
+            if response and response.get("usageMetadata"):
+                self._record_usage(from_gemini(response["usageMetadata"]), started_at)
+            
             if response and "candidates" in response:
                 candidates = response["candidates"]
                 if len(candidates) > 0 and "content" in candidates[0]:
@@ -83,11 +100,10 @@ class GeminiProvider(BaseProvider):
     
     def _make_api_request(self, payload):
         """Make API request to Gemini."""
-        response = requests.post(
+        response = self._send(lambda: requests.post(
             self.base_url,
             headers=self.headers,
             json=payload,
             timeout=60
-        )
-        response.raise_for_status()
+        ))
         return response.json()
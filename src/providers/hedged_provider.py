@@ -0,0 +1,132 @@
+import queue
+import threading
+import time
+from .base import BaseProvider
+
+class HedgedProvider(BaseProvider):
+    """
+    Sends each review to a ranked list of providers with hedging and failover.
+
+    The first available provider gets the request. If it has not answered after
+    the hedge delay, or fails, the request is also sent to the next provider; the
+    first valid result wins. A provider that fails repeatedly is skipped (its
+    circuit is opened). Once every circuit is open all providers are tried again,
+    and the circuit of one that succeeds is closed.
+    """
+
+    def __init__(self, config, providers):
+        super().__init__(config)
+        # (name, provider) pairs in order of preference
+        self.providers = providers
+        self.hedge_delay = config.hedge_delay
+        self.failure_threshold = config.circuit_breaker_failures
+        self.model = "+".join(f"{name}:{provider.model}" for name, provider in providers)
+        # The prompt must fit whichever provider ends up answering
+        self.context_token_budget = min(provider.context_token_budget for _, provider in providers)
+        self.failures = {name: 0 for name, _ in providers}
+        self.open_circuits = set()
+        self.wins = {name: 0 for name, _ in providers}
+        self._lock = threading.Lock()
+
+    def review_code(self, message, system_prompt, stable_prefix=""):
+        """Review with the ranked providers, returning the first valid result."""
+        candidates = [(name, provider) for name, provider in self.providers if name not in self.open_circuits]
+        if not candidates:
+            print("All provider circuits are open, trying every provider again")
+            candidates = list(self.providers)
+
+        results = queue.Queue()
+        started_at = time.monotonic()
+        launched = 0
+        finished = set()
+
+        def launch(reason=None):
+            nonlocal launched
+            name, provider = candidates[launched]
+            launched += 1
+            # Daemon threads: a slow losing request must not keep the action alive
+            threading.Thread(
+                target=self._call, args=(name, provider, message, system_prompt, stable_prefix, results), daemon=True
+            ).start()
+            if reason:
+                print(f"Sent the review to {name} after {time.monotonic() - started_at:.1f}s ({reason})")
+
+        launch()
+        while len(finished) < launched:
+            try:
+                timeout = self.hedge_delay if launched < len(candidates) else None
+                name, output = results.get(timeout=timeout)
+            except queue.Empty:
+                launch("hedge delay passed")
+                continue
+
+            finished.add(name)
+            if self._is_valid(output):
+                self._record(name, success=True)
+                pending = [candidate for candidate, _ in candidates[:launched] if candidate not in finished]
+                pending_text = f"; abandoned {', '.join(pending)}" if pending else ""
+                print(f"Provider {name} won after {time.monotonic() - started_at:.1f}s{pending_text}")
+                return output
+
+            self._record(name, success=False)
+            print(f"Provider {name} returned no valid review")
+            # Fail over at once instead of waiting for the hedge delay
+            if launched < len(candidates) and len(finished) == launched:
+                launch("failover")
+
+        print("No provider returned a valid review")
+        return {"summary": None, "comments": []}
+
+    def _call(self, name, provider, message, system_prompt, stable_prefix, results):
+        """Run one provider's review, logging its own latency, and report the result."""
+        started_at = time.monotonic()
+        output = {}
+        # Always report back, or review_code would wait for this provider forever
+        try:
+            output = provider.review_code(message, system_prompt, stable_prefix=stable_prefix) or {}
+            print(f"Provider {name} answered in {time.monotonic() - started_at:.1f}s")
+        except Exception as e:
+            print(f"Provider {name} error: {e}")
+        finally:
+            results.put((name, output))
+
+    def _is_valid(self, output):
+        """Providers return a None summary when the request or JSON parsing failed."""
+        return bool(output) and output.get("summary") is not None
+
+    def _record(self, name, success):
+        """Track consecutive failures and open the circuit of a provider that keeps failing."""
+        with self._lock:
+            if success:
+                self.failures[name] = 0
+                self.wins[name] += 1
+                if name in self.open_circuits:
+                    # Only tried again because every circuit was open; it has recovered
+                    self.open_circuits.discard(name)
+                    print(f"Circuit closed for {name} after a successful review")
+                return
+            self.failures[name] += 1
+            if self.failures[name] >= self.failure_threshold and name not in self.open_circuits:
+                self.open_circuits.add(name)
+                print(f"Circuit opened for {name} after {self.failures[name]} consecutive failure(s); "
+                      f"skipping it while another provider is available")
+
+    def all_usage_records(self):
+        """Usage records of every wrapped provider, including requests that lost the race."""
+        return [record for _, provider in self.providers for record in provider.all_usage_records()]
+
+    def report_usage(self):
+        """Print each provider's usage totals."""
+        for _, provider in self.providers:
+            provider.report_usage()
+
+    def report_retries(self):
+        """Print each provider's retries and how many reviews it won."""
+        for name, provider in self.providers:
+            provider.report_retries()
+        wins = ", ".join(f"{name} {count}" for name, count in self.wins.items())
+        print(f"Reviews won per provider: {wins}")
+
+    def _make_api_request(self, payload):
+        """Make API request (not used; requests go through the wrapped providers)."""
+        pass
@@ -0,0 +1,129 @@
+import requests
+import json
+import threading
+import time
+from .base import BaseProvider
+from .streaming import iter_sse_events, collect_streamed_review
+from .usage import from_chat_completion
+
+class OpenAICompatibleProvider(BaseProvider):
+    """
+    Provider for any OpenAI-compatible chat completions endpoint.
+
+    One request per review, against a configurable base URL: OpenAI itself,
+    DeepSeek-style hosted APIs, or a local llama.cpp/vLLM server.
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.api_key = config.openai_compatible_api_key
+        self.base_url = f"{config.openai_compatible_base_url.rstrip('/')}/chat/completions"
+        self.model = config.openai_compatible_model
+        self.stream = config.stream_responses and config.openai_compatible_stream
+        self.stream_idle_timeout = config.stream_idle_timeout
+        self.headers = {"Content-Type": "application/json"}
+        # Local servers usually run without authentication
+        if self.api_key:
+            self.headers["Authorization"] = f"Bearer {self.api_key}"
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # Bounds the requests in flight at once, e.g. to the slots of a local inference server
+        self.slots = threading.BoundedSemaphore(config.openai_compatible_concurrency)
+
+    def review_code(self, message, system_prompt, stable_prefix=""):
+        """Review code with a single chat completions call."""
+        try:
+            payload = {
+                "model": self.model,
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": system_prompt
+                    },
+                    {
+                        "role": "user",
+                        # Automatic prefix caching: the stable file contents go first
+                        "content": stable_prefix + message
+                    }
+                ],
+                "temperature": 0.1
+            }
+
+            with self.slots:
+                # Latency is measured from when a slot is free, not while queued for one
+                started_at = time.monotonic()
+                if self.stream:
+                    return self._stream_review(payload, started_at)
+
+                response = self._make_api_request(payload)
+
+            if response and response.get("usage"):
+                self._record_usage(from_chat_completion(response["usage"]), started_at)
+
+            if response and "choices" in response:
+                choices = response["choices"]
+                if len(choices) > 0 and "message" in choices[0]:
+                    message_content = choices[0]["message"].get("content") or ""
+                    return self._validate_response(message_content)
+
+            return {"summary": None, "comments": []}
+
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 429:
+                print(f"OpenAI-compatible rate limit exceeded: {e}")
+            elif e.response.status_code == 401:
+                print(f"OpenAI-compatible authentication error: {e}")
+            else:
+                print(f"OpenAI-compatible HTTP error: {e}")
+            return {"summary": None, "comments": []}
+        except requests.exceptions.RequestException as e:
+            print(f"OpenAI-compatible request error: {e}")
+            return {"summary": None, "comments": []}
+        except Exception as e:
+            print(f"OpenAI-compatible provider error: {e}")
+            return {"summary": None, "comments": []}
+
+    def _make_api_request(self, payload):
+        """Make API request to the chat completions endpoint."""
+        response = self._send(lambda: self.session.post(
+            self.base_url,
+            json=payload,
+            timeout=60
+        ))
+        return response.json()
+
+    def _stream_review(self, payload, started_at):
+        """Stream the response, parsing comments as they complete."""
+        usage = {}
+        response = self._make_streaming_request(payload)
+        try:
+            with response:
+                return collect_streamed_review(
+                    self._iter_text(response, usage), self._validate_response, "OpenAI-compatible", started_at
+                )
+        finally:
+            if usage:
+                self._record_usage(from_chat_completion(usage), started_at)
+
+    def _make_streaming_request(self, payload):
+        """Open a streaming request; the read timeout bounds the gap between chunks, not the total time."""
+        return self._send(lambda: self.session.post(
+            self.base_url,
+            json={**payload, "stream": True, "stream_options": {"include_usage": True}},
+            stream=True,
+            timeout=(10, self.stream_idle_timeout)
+        ), stream=True)
+
+    def _iter_text(self, response, usage):
+        """Yield the answer text deltas of a chat completions stream, collecting its usage into a dict."""
+        for _, data in iter_sse_events(response):
+            if data == "[DONE]":
+                return
+            chunk = json.loads(data)
+            # The last chunk carries the usage block and no choices
+            usage.update(chunk.get("usage") or {})
+            choices = chunk.get("choices") or []
+            if choices:
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    yield content
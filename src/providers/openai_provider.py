@@ -2,32 +2,53 @@ import requests
 import time
 import json
 from .base import BaseProvider
+from .usage import from_chat_completion
+
+API_URL = "https://api.openai.com/v1"
+
+# Run status polling: start short, back off geometrically up to the cap
+POLL_INITIAL_INTERVAL = 0.25
+POLL_BACKOFF = 1.6
+POLL_MAX_INTERVAL = 3.0
+
+# Terminal run statuses other than "completed"
+FAILED_RUN_STATUSES = ("failed", "cancelled", "expired", "incomplete")
 
 class OpenAIProvider(BaseProvider):
     """OpenAI provider using the existing Assistant API logic."""
     
+    context_token_budget = 90_000
+    
     def __init__(self, config):
         super().__init__(config)
         self.api_key = config.openai_api_key
         self.assistant_id = config.openai_assistant_id
+        # The assistant decides the model; its ID identifies the reviewer
+        self.model = self.assistant_id
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "OpenAI-Beta": "assistants=v2"
         }
         self.max_chars = 250_000
+        self.api_url = API_URL
+        self.run_timeout = config.openai_run_timeout
+        # One session for every call of the thread/run flow, so connections are reused
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
     
-    def review_code(self, message, system_prompt):
+    def review_code(self, message, system_prompt, stable_prefix=""):
         """Review code using OpenAI Assistant API."""
+        started_at = time.monotonic()
         try:
-            # Combine system prompt with message for Assistant API
-            combined_message = f"{system_prompt}\n\n{message}"
-            
-            # Create thread and add message (using existing logic)
-            thread_id = self._create_thread_and_add_message(combined_message)
+            # The system prompt goes in the run's instructions, ahead of the thread, and the
+            # stable file contents open the message, so repeated prompts share a cacheable prefix
+            thread_id = self._create_thread_and_add_message(stable_prefix + message)
             
             # Run assistant
-            self._run_assistant(thread_id)
+            run = self._run_assistant(thread_id, system_prompt)
+            if run.get("usage"):
+                self._record_usage(from_chat_completion(run["usage"]), started_at)
             
             # Get review output
             return self._get_review_output(thread_id)
@@ -48,58 +69,84 @@ class OpenAIProvider(BaseProvider):
             return {"summary": None, "comments": []}
     
     def _create_thread_and_add_message(self, message):
-        """Create thread and send message to the assistant."""
-        thread_res = requests.post(
-            "https://api.openai.com/v1/threads",
-            headers=self.headers
-        )
-        thread_res.raise_for_status()
-        thread_id = thread_res.json()["id"]
-        
+        """Create a thread holding the message (split into chunks if needed) in one request."""
         # Split into chunks if needed (using existing logic)
         messages = self._chunk_messages([message], self.max_chars)
         
-        for part in messages:
-            resp = requests.post(
-                f"https://api.openai.com/v1/threads/{thread_id}/messages",
-                headers=self.headers,
-                json={"role": "user", "content": part}
-            )
-            resp.raise_for_status()
-        
-        return thread_id
+        thread_res = self._send(lambda: self.session.post(
+            f"{self.api_url}/threads",
+            json={"messages": [{"role": "user", "content": part} for part in messages]},
+            timeout=30
+        ))
+        return thread_res.json()["id"]
     
-    def _run_assistant(self, thread_id):
-        """Kick off and poll the assistant run until completion."""
-        run_res = requests.post(
-            f"https://api.openai.com/v1/threads/{thread_id}/runs",
-            headers=self.headers,
-            json={"assistant_id": self.assistant_id}
+    def _run_assistant(self, thread_id, system_prompt):
+        """Kick off the assistant run and poll it, with backoff, until it ends or the deadline passes."""
+        started_at = time.monotonic()
+        deadline = started_at + self.run_timeout
+        
+        runs_url = f"{self.api_url}/threads/{thread_id}/runs"
+        # Creating a run is not idempotent: before posting again, look for a run the failed attempt started
+        run_res = self._send(
+            lambda: self.session.post(
+                runs_url,
+                json={"assistant_id": self.assistant_id, "additional_instructions": system_prompt},
+                timeout=30
+            ),
+            before_retry=lambda: self._get_started_run(runs_url)
         )
-        run_res.raise_for_status()
-        run_id = run_res.json()["id"]
+        run = run_res.json()
+        run_id = run["id"]
         
+        interval = POLL_INITIAL_INTERVAL
+        polls = 0
         while True:
-            status_res = requests.get(
-                f"https://api.openai.com/v1/threads/{thread_id}/runs/{run_id}",
-                headers=self.headers
-            )
-            status_res.raise_for_status()
-            status = status_res.json()["status"]
+            status = run.get("status")
             
             if status == "completed":
-                return
-            if status == "failed":
-                raise Exception("Assistant run failed.")
-            time.sleep(3)
+                print(f"Assistant run completed in {time.monotonic() - started_at:.1f}s ({polls} status poll(s))")
+                return run
+            if status in FAILED_RUN_STATUSES:
+                details = run.get("last_error") or run.get("incomplete_details") or "no details"
+                raise Exception(f"Assistant run {status}: {details}")
+            if status == "requires_action":
+                # The review assistant is not given any tools to call
+                self._cancel_run(thread_id, run_id)
+                raise Exception("Assistant run requires a tool call, which is not supported; run cancelled")
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._cancel_run(thread_id, run_id)
+                raise Exception(f"Assistant run still {status} after {self.run_timeout}s; run cancelled")
+            
+            time.sleep(min(interval, remaining))
+            interval = min(interval * POLL_BACKOFF, POLL_MAX_INTERVAL)
+            
+            status_res = self._send(
+                lambda: self.session.get(f"{self.api_url}/threads/{thread_id}/runs/{run_id}", timeout=30)
+            )
+            run = status_res.json()
+            polls += 1
+    
+    def _get_started_run(self, runs_url):
+        """Response for the newest run of the thread, or None if no run was started."""
+        res = self._send(lambda: self.session.get(runs_url, params={"limit": 1}, timeout=30))
+        runs = res.json().get("data") or []
+        if not runs:
+            return None
+        print(f"Assistant run {runs[0]['id']} was started despite the error; not starting another")
+        return self._send(lambda: self.session.get(f"{runs_url}/{runs[0]['id']}", timeout=30))
+    
+    def _cancel_run(self, thread_id, run_id):
+        """Best-effort cancel of a run that is abandoned."""
+        try:
+            self.session.post(f"{self.api_url}/threads/{thread_id}/runs/{run_id}/cancel", timeout=10)
+        except requests.exceptions.RequestException as e:
+            print(f"Could not cancel assistant run {run_id}: {e}")
     
     def _get_review_output(self, thread_id):
         """Fetch the assistant's final message."""
-        res = requests.get(
-            f"https://api.openai.com/v1/threads/{thread_id}/messages",
-            headers=self.headers
-        )
-        res.raise_for_status()
+        res = self._send(lambda: self.session.get(f"{self.api_url}/threads/{thread_id}/messages", timeout=30))
         messages = res.json()["data"]
         
         for msg in reversed(messages):
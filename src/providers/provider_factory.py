@@ -2,6 +2,8 @@ from .openai_provider import OpenAIProvider
 from .claude_provider import ClaudeProvider
 from .gemini_provider import GeminiProvider
 from .deepseek_provider import DeepSeekProvider
+from .openai_compatible_provider import OpenAICompatibleProvider
+from .hedged_provider import HedgedProvider
 
 class ProviderFactory:
     """Factory class to create AI providers."""
@@ -11,21 +13,43 @@ class ProviderFactory:
         """
         Create an AI provider based on the configuration.
         
+        With several providers in AI_PROVIDERS, returns a HedgedProvider over them
+        in ranked order.
+        
         Args:
             config: Configuration object with ai_provider setting
             
         Returns:
             BaseProvider: Instance of the appropriate provider
         """
+        if len(config.ai_providers) > 1:
+            providers = [(name, ProviderFactory.create_named_provider(name, config)) for name in config.ai_providers]
+            return HedgedProvider(config, providers)
+        
+        return ProviderFactory.create_named_provider(config.ai_provider, config)
+    
+    @staticmethod
+    def create_named_provider(name, config):
+        """
+        Create a single AI provider by name.
+        
+        Args:
+            name (str): Provider name, e.g. "claude"
+            config: Configuration object
+            
+        Returns:
+            BaseProvider: Instance of the named provider
+        """
         provider_map = {
             "openai": OpenAIProvider,
             "claude": ClaudeProvider,
             "gemini": GeminiProvider,
-            "deepseek": DeepSeekProvider
+            "deepseek": DeepSeekProvider,
+            "openai_compatible": OpenAICompatibleProvider
         }
         
-        provider_class = provider_map.get(config.ai_provider)
+        provider_class = provider_map.get(name)
         if not provider_class:
-            raise ValueError(f"Unsupported AI provider: {config.ai_provider}")
+            raise ValueError(f"Unsupported AI provider: {name}")
         
         return provider_class(config)
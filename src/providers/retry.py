@@ -0,0 +1,99 @@
+import random
+import re
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+import requests
+
+# Statuses worth retrying: timeouts, rate limits, server errors and Anthropic's "overloaded"
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504, 529)
+
+# Connection failures where the request never produced a response (resets, refused, dropped bodies)
+RETRY_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError)
+
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+# Provider rate-limit (remaining, reset) header pairs: OpenAI-style durations and Anthropic timestamps
+DURATION_RESET_HEADERS = (
+    ("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+    ("x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+)
+TIMESTAMP_RESET_HEADERS = (
+    ("anthropic-ratelimit-requests-remaining", "anthropic-ratelimit-requests-reset"),
+    ("anthropic-ratelimit-tokens-remaining", "anthropic-ratelimit-tokens-reset"),
+    ("anthropic-ratelimit-input-tokens-remaining", "anthropic-ratelimit-input-tokens-reset"),
+    ("anthropic-ratelimit-output-tokens-remaining", "anthropic-ratelimit-output-tokens-reset"),
+)
+
+DURATION_PART_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def backoff_delay(attempt):
+    """Jittered exponential backoff for the given retry number (1-based)."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+    # Equal jitter: never less than half the delay, so retries still spread out under load
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def server_requested_delay(headers):
+    """
+    Seconds the server asked the client to wait, or None.
+
+    Reads retry-after-ms, Retry-After (seconds or HTTP date) and the providers'
+    rate-limit reset headers.
+    """
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(float(retry_after_ms) / 1000, 0.0)
+        except ValueError:
+            pass
+
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                pass
+
+    # Only limits that are used up matter; each resets separately and the request needs all of them
+    delays = [
+        _parse_duration(headers.get(reset))
+        for remaining, reset in DURATION_RESET_HEADERS
+        if headers.get(remaining) == "0"
+    ] + [
+        _parse_timestamp(headers.get(reset))
+        for remaining, reset in TIMESTAMP_RESET_HEADERS
+        if headers.get(remaining) == "0"
+    ]
+    delays = [delay for delay in delays if delay is not None]
+    if delays:
+        return max(delays)
+
+    return None
+
+
+def _parse_duration(value):
+    """Parse durations such as "20ms", "1.5s" or "6m0s" into seconds."""
+    if not value:
+        return None
+    parts = DURATION_PART_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _parse_timestamp(value):
+    """Seconds until an RFC 3339 timestamp, or None."""
+    if not value:
+        return None
+    try:
+        reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return max(reset_at.timestamp() - time.time(), 0.0)
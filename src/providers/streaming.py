@@ -0,0 +1,176 @@
+import json
+import re
+import time
+import requests
+
+COMMENTS_KEY_RE = re.compile(r'"comments"\s*:\s*\[')
+SUMMARY_KEY_RE = re.compile(r'"summary"\s*:\s*\{')
+
+
+class StreamError(requests.exceptions.RequestException):
+    """An error event received in the middle of a stream."""
+
+
+def iter_sse_events(response):
+    """
+    Yield (event, data) pairs from a server-sent events response as they arrive.
+
+    Comment lines (keep-alives) are skipped; multi-line data fields are joined.
+    """
+    # Event streams are always UTF-8; requests would otherwise assume ISO-8859-1 for text/*
+    response.encoding = "utf-8"
+    event = None
+    data_lines = []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield event, "\n".join(data_lines)
+            event = None
+            data_lines = []
+        elif line.startswith(":"):
+            continue
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].lstrip())
+    if data_lines:
+        yield event, "\n".join(data_lines)
+
+
+class _ObjectScanner:
+    """Finds complete JSON objects in a growing buffer, starting after a key pattern."""
+
+    def __init__(self, key_pattern, in_array):
+        self.key_pattern = key_pattern
+        self.in_array = in_array
+        self.pos = 0
+        self.started = False
+        self.finished = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.object_start = None
+
+    def scan(self, buffer):
+        """Return the complete objects that became available in the buffer since the last call."""
+        found = []
+        if self.finished:
+            return found
+
+        if not self.started:
+            match = self.key_pattern.search(buffer, self.pos)
+            if not match:
+                # Keep a little overlap so a key split across chunks is still found
+                self.pos = max(0, len(buffer) - 32)
+                return found
+            self.started = True
+            if self.in_array:
+                self.pos = match.end()
+            else:
+                # Start on the object's opening brace
+                self.pos = match.end() - 1
+
+        i = self.pos
+        length = len(buffer)
+        while i < length:
+            char = buffer[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == "{":
+                if self.depth == 0:
+                    self.object_start = i
+                self.depth += 1
+            elif char == "}":
+                self.depth -= 1
+                if self.depth == 0 and self.object_start is not None:
+                    try:
+                        found.append(json.loads(buffer[self.object_start:i + 1]))
+                    except ValueError:
+                        pass
+                    self.object_start = None
+                    if not self.in_array:
+                        self.finished = True
+                        i += 1
+                        break
+            elif char == "]" and self.depth == 0 and self.in_array:
+                self.finished = True
+                i += 1
+                break
+            i += 1
+
+        self.pos = i
+        return found
+
+
+class IncrementalCommentParser:
+    """
+    Parses a review JSON document while it streams in.
+
+    Each completed object of the "comments" array is returned by feed() as soon as
+    its closing brace arrives; the "summary" object is kept once complete.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.summary = None
+        self.comments = []
+        self._comments = _ObjectScanner(COMMENTS_KEY_RE, in_array=True)
+        self._summary = _ObjectScanner(SUMMARY_KEY_RE, in_array=False)
+
+    def feed(self, text):
+        """Append streamed text and return the comments completed by it."""
+        self.buffer += text
+        if self.summary is None:
+            summaries = self._summary.scan(self.buffer)
+            if summaries:
+                self.summary = summaries[0]
+        new_comments = self._comments.scan(self.buffer)
+        self.comments.extend(new_comments)
+        return new_comments
+
+
+def collect_streamed_review(text_chunks, validate, label, started_at):
+    """
+    Consume streamed response text into a review result.
+
+    Args:
+        text_chunks (iterable): Text deltas from the provider's stream
+        validate (callable): Parses the complete response text into a review dict
+        label (str): Provider name for log lines
+        started_at (float): time.monotonic() when the request was sent
+
+    Returns:
+        dict: Review result; if the stream breaks, the summary and comments parsed so far
+    """
+    parser = IncrementalCommentParser()
+    first_comment_after = None
+
+    try:
+        for chunk in text_chunks:
+            if parser.feed(chunk) and first_comment_after is None:
+                first_comment_after = time.monotonic() - started_at
+    except requests.exceptions.RequestException as e:
+        elapsed = time.monotonic() - started_at
+        print(f"{label} stream interrupted after {elapsed:.1f}s: {e}")
+        print(f"Keeping partial result: {len(parser.comments)} comment(s), "
+              f"summary {'received' if parser.summary else 'missing'}")
+        return {"summary": parser.summary, "comments": parser.comments}
+
+    total = time.monotonic() - started_at
+    first_text = f"{first_comment_after:.1f}s" if first_comment_after is not None else "n/a"
+    print(f"{label} stream finished in {total:.1f}s (time to first comment: {first_text})")
+
+    result = validate(parser.buffer)
+    if result.get("summary") is None and not result.get("comments") and (parser.summary or parser.comments):
+        # The full document did not parse (e.g. cut off at max tokens); keep what streamed in
+        return {"summary": parser.summary, "comments": parser.comments}
+    return result
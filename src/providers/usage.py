@@ -0,0 +1,139 @@
+import json
+import os
+
+# USD per million tokens for the default models, as published at the time of writing.
+# "cached_input" is the price of a prompt cache hit and "cache_write" of a cache write
+# (Claude only); reasoning tokens are billed as output. Override or extend with PRICE_TABLE.
+DEFAULT_PRICES = {
+    "claude-sonnet-4": {"input": 3.00, "cached_input": 0.30, "cache_write": 3.75, "output": 15.00},
+    "gemini-2.5-flash": {"input": 0.30, "cached_input": 0.03, "output": 2.50},
+    "deepseek-reasoner": {"input": 0.28, "cached_input": 0.028, "output": 0.42},
+    "deepseek-chat": {"input": 0.28, "cached_input": 0.028, "output": 0.42},
+    "gpt-4.1": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
+    "gpt-4.1-mini": {"input": 0.40, "cached_input": 0.10, "output": 1.60},
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+}
+
+TOKEN_FIELDS = ("input_tokens", "cached_input_tokens", "cache_write_tokens", "output_tokens", "reasoning_tokens")
+
+
+def empty_usage():
+    """Normalized token counts; input_tokens includes the cached and cache-write tokens."""
+    return {field: 0 for field in TOKEN_FIELDS}
+
+
+def from_claude(usage):
+    """Normalize a Messages API usage block."""
+    tokens = empty_usage()
+    cached = usage.get("cache_read_input_tokens") or 0
+    written = usage.get("cache_creation_input_tokens") or 0
+    tokens["input_tokens"] = (usage.get("input_tokens") or 0) + cached + written
+    tokens["cached_input_tokens"] = cached
+    tokens["cache_write_tokens"] = written
+    tokens["output_tokens"] = usage.get("output_tokens") or 0
+    return tokens
+
+
+def from_chat_completion(usage):
+    """Normalize an OpenAI-style usage block (OpenAI, DeepSeek, compatible servers, assistant runs)."""
+    tokens = empty_usage()
+    tokens["input_tokens"] = usage.get("prompt_tokens") or 0
+    if "prompt_cache_hit_tokens" in usage:
+        # DeepSeek reports its context cache hits directly
+        tokens["cached_input_tokens"] = usage.get("prompt_cache_hit_tokens") or 0
+    else:
+        details = usage.get("prompt_tokens_details") or usage.get("prompt_token_details") or {}
+        tokens["cached_input_tokens"] = details.get("cached_tokens") or 0
+    tokens["output_tokens"] = usage.get("completion_tokens") or 0
+    completion_details = usage.get("completion_tokens_details") or {}
+    tokens["reasoning_tokens"] = completion_details.get("reasoning_tokens") or 0
+    return tokens
+
+
+def from_gemini(usage):
+    """Normalize Gemini usageMetadata; thinking tokens are billed as output, so they are counted in it."""
+    tokens = empty_usage()
+    tokens["input_tokens"] = usage.get("promptTokenCount") or 0
+    tokens["cached_input_tokens"] = usage.get("cachedContentTokenCount") or 0
+    tokens["reasoning_tokens"] = usage.get("thoughtsTokenCount") or 0
+    tokens["output_tokens"] = (usage.get("candidatesTokenCount") or 0) + tokens["reasoning_tokens"]
+    return tokens
+
+
+def load_price_table(spec):
+    """
+    Build the price table from PRICE_TABLE: inline JSON or a path to a JSON file.
+
+    Entries map a model name (or name prefix) to per-million-token prices and are
+    merged over DEFAULT_PRICES.
+    """
+    prices = {model: dict(price) for model, price in DEFAULT_PRICES.items()}
+    if not spec:
+        return prices
+    if spec.lstrip().startswith("{"):
+        overrides = json.loads(spec)
+    else:
+        with open(spec, encoding="utf-8") as f:
+            overrides = json.load(f)
+    for model, price in overrides.items():
+        if not isinstance(price, dict) or "input" not in price or "output" not in price:
+            raise ValueError(f"Price for {model} needs at least input and output prices per million tokens")
+        prices[model] = price
+    return prices
+
+
+def price_for(model, prices):
+    """Price entry for a model: exact match first, else the longest matching name prefix."""
+    if not model:
+        return None
+    if model in prices:
+        return prices[model]
+    matches = [name for name in prices if model.startswith(name)]
+    return prices[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(tokens, price):
+    """Cost in USD of normalized token counts, or None without a price."""
+    if not price:
+        return None
+    cached = tokens["cached_input_tokens"]
+    written = tokens["cache_write_tokens"]
+    uncached = max(tokens["input_tokens"] - cached - written, 0)
+    cost = (
+        uncached * price["input"]
+        + cached * price.get("cached_input", price["input"])
+        + written * price.get("cache_write", price["input"])
+        + tokens["output_tokens"] * price["output"]
+    )
+    return round(cost / 1_000_000, 6)
+
+
+def summarize(records):
+    """Sum token counts, latency and cost over usage records."""
+    total = empty_usage()
+    total["calls"] = len(records)
+    total["latency_seconds"] = 0.0
+    total["cost_usd"] = 0.0
+    priced = True
+    for record in records:
+        for field in TOKEN_FIELDS:
+            total[field] += record[field]
+        total["latency_seconds"] += record["latency_seconds"]
+        if record["cost_usd"] is None:
+            priced = False
+        else:
+            total["cost_usd"] += record["cost_usd"]
+    total["latency_seconds"] = round(total["latency_seconds"], 3)
+    # A partial sum would understate the cost
+    total["cost_usd"] = round(total["cost_usd"], 6) if priced else None
+    return total
+
+
+def append_to_ledger(path, entry):
+    """Append one run's usage entry as a JSON line."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, sort_keys=True) + "\n")
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import tempfile
+
+
+class ReviewCache:
+    """
+    On-disk cache of per-file review comments with size-based LRU eviction.
+
+    Entries are keyed by a hash of everything that determines the provider's answer
+    for a file: the rendered file section, the system prompt, the previous
+    confidence score, the provider and the model. The directory can be persisted between workflow runs with actions/cache.
+    """
+
+    def __init__(self, cache_dir, max_bytes=100 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(file_section, system_prompt, provider, model, previous_score=None):
+        """Content hash identifying one file's review request."""
+        digest = hashlib.sha256()
+        # The previous confidence score is part of the review message, so it changes the answer too
+        previous = "" if previous_score is None else previous_score
+        for part in (provider, model or "", system_prompt, previous, file_section):
+            data = str(part).encode("utf-8")
+            # Length-prefix each part so different splits cannot collide
+            digest.update(len(data).to_bytes(8, "big"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached entry for a key, or None."""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # Refresh the access time that eviction orders by
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        """Store an entry; call prune() once after a batch of puts to enforce the size limit."""
+        try:
+            handle, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(handle, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Warning: could not write review cache entry: {e}")
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def prune(self):
+        """Delete the least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total += stat.st_size
+
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,223 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.helpers import estimate_tokens
+from utils.tracing import tracer
+
+# Ordered from least to most severe; matched against the model's free-text risk level
+RISK_LEVELS = ("low", "medium", "high")
+
+# A single risky shard may not be averaged away by many clean ones
+MAX_CONFIDENCE_ABOVE_LOWEST = 20
+
+
+def split_into_shards(items, shard_count, weight):
+    """
+    Split items into at most shard_count size-balanced groups.
+
+    Heaviest items are placed first, each into the currently lightest shard; every
+    shard keeps the original item order.
+
+    Args:
+        items (list): Items to split
+        shard_count (int): Maximum number of shards
+        weight (callable): Returns the size of an item
+
+    Returns:
+        list: Non-empty lists of items
+    """
+    shard_count = max(1, min(shard_count, len(items)))
+    shards = [[] for _ in range(shard_count)]
+    loads = [0] * shard_count
+
+    order = sorted(range(len(items)), key=lambda i: -weight(items[i]))
+    for i in order:
+        lightest = loads.index(min(loads))
+        shards[lightest].append(i)
+        loads[lightest] += weight(items[i])
+
+    return [[items[i] for i in sorted(shard)] for shard in shards if shard]
+
+
+def combine_summaries(weighted_summaries):
+    """
+    Combine per-shard summaries into one confidence/risk summary.
+
+    Confidence is the weighted mean, capped a fixed margin above the least confident
+    shard; risk is the most severe shard's risk; reasoning lists every shard.
+
+    Args:
+        weighted_summaries (list): (summary, weight) pairs; summaries may be None
+
+    Returns:
+        dict: Combined summary, or None if no shard produced one
+    """
+    valid = [(summary, max(weight, 1)) for summary, weight in weighted_summaries if summary]
+    if not valid:
+        return None
+    if len(valid) == 1:
+        return valid[0][0]
+
+    confidences = []
+    for summary, weight in valid:
+        try:
+            confidences.append((float(summary.get("confidence", 0)), weight))
+        except (TypeError, ValueError):
+            confidences.append((0.0, weight))
+
+    total_weight = sum(weight for _, weight in confidences)
+    mean = sum(confidence * weight for confidence, weight in confidences) / total_weight
+    lowest = min(confidence for confidence, _ in confidences)
+    confidence = round(min(mean, lowest + MAX_CONFIDENCE_ABOVE_LOWEST))
+
+    risk_level = max(
+        (summary.get("risk_level") or "Unknown risk" for summary, _ in valid),
+        key=_risk_rank
+    )
+    reasoning = "\n".join(
+        f"- Part {i}/{len(valid)}: {summary.get('reasoning', 'No reasoning provided')}"
+        for i, (summary, _) in enumerate(valid, start=1)
+    )
+
+    return {"confidence": confidence, "risk_level": risk_level, "reasoning": reasoning}
+
+
+def _risk_rank(risk_level):
+    """Severity rank of a free-text risk level; unknown levels rank lowest."""
+    text = str(risk_level).lower()
+    for rank in range(len(RISK_LEVELS) - 1, -1, -1):
+        if RISK_LEVELS[rank] in text:
+            return rank
+    return -1
+
+
+class ShardedReviewer:
+    """
+    Reviews a PR as one or more size-balanced shards sent to the provider concurrently.
+
+    Large PRs can be fed in batches with add_batch(); comments and shard summaries
+    accumulate across batches and result() combines them into one review.
+    """
+
+    def __init__(self, provider, prompt, shards=1, workers=4, full_file_format="standard", cache=None):
+        self.provider = provider
+        self.prompt = prompt
+        self.shards = max(1, shards)
+        self.workers = max(1, workers)
+        self.full_file_format = full_file_format
+        self.cache = cache
+        self.files_reviewed = 0
+        self.added_lines = 0
+        self._comments = []
+        self._weighted_summaries = []
+
+    def result(self):
+        """
+        Combine everything reviewed since the last result into one output.
+
+        Returns:
+            dict: {"summary": combined summary, "comments": all shard comments}
+        """
+        if self.cache:
+            self.cache.prune()
+
+        output = {"summary": combine_summaries(self._weighted_summaries), "comments": self._comments}
+        self._comments = []
+        self._weighted_summaries = []
+        return output
+
+    def add_batch(self, structured_files, system_prompt, previous_score=None):
+        """
+        Review one batch of files, keeping its comments and shard summaries for result().
+
+        Files whose review is cached are not sent to the provider; their cached
+        comments are kept with the fresh ones. Nothing built for the batch (rendered
+        sections, shard messages) is kept once its responses are in.
+        """
+        self.files_reviewed += len(structured_files)
+        self.added_lines += sum(file_data["total_additions"] for file_data in structured_files)
+        sections = []
+
+        for file_data in structured_files:
+            parts = self.prompt.render_file_parts(file_data, self.full_file_format)
+            text = "".join(parts)
+            key = None
+            if self.cache:
+                key = self.cache.make_key(
+                    text, system_prompt, type(self.provider).__name__, self.provider.model, previous_score
+                )
+                entry = self.cache.get(key)
+                if entry is not None:
+                    # Only comments are cached: the summary assesses the files sent with this run
+                    self._comments.extend(entry.get("comments") or [])
+                    continue
+            sections.append((file_data, parts, key))
+
+        if self.cache:
+            print(f"Review cache: {self.cache.hits} hit(s), {self.cache.misses} miss(es)")
+
+        if not sections:
+            print("All files served from the review cache, skipping the AI provider")
+            return
+
+        shards = split_into_shards(sections, self.shards, weight=lambda section: len("".join(section[1])))
+
+        # (stable_prefix, message) per shard; the prefix is what providers can cache
+        messages = [
+            self.prompt.assemble_review_message([parts for _, parts, _ in shard], previous_score)
+            for shard in shards
+        ]
+        for i, (stable_prefix, message) in enumerate(messages, start=1):
+            prompt_chars = len(stable_prefix) + len(message) + len(system_prompt)
+            print(f"Shard {i}/{len(messages)}: {len(shards[i - 1])} file(s), {prompt_chars} chars, "
+                  f"~{estimate_tokens(prompt_chars)} tokens, {len(stable_prefix)} in the cacheable prefix "
+                  f"({self.full_file_format} format)")
+
+        start = time.monotonic()
+        if len(messages) == 1:
+            results = [self._review_shard(1, 1, messages[0], system_prompt)]
+        else:
+            workers = min(self.workers, len(messages))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    lambda args: self._review_shard(args[0], len(messages), args[1], system_prompt),
+                    enumerate(messages, start=1)
+                ))
+        print(f"AI review of {len(messages)} shard(s) finished in {time.monotonic() - start:.1f}s")
+
+        for shard, output in zip(shards, results):
+            shard_comments = output.get("comments") or []
+            self._comments.extend(shard_comments)
+            additions = sum(file_data["total_additions"] for file_data, _, _ in shard)
+            self._weighted_summaries.append((output.get("summary"), additions))
+            self._store_shard(shard, output.get("summary"), shard_comments)
+
+    def _store_shard(self, shard, summary, shard_comments):
+        """Cache each file's comments from a shard."""
+        # A missing summary means the response failed to parse; never cache that
+        if not self.cache or not summary:
+            return
+
+        comments_by_file = {}
+        for comment in shard_comments:
+            comments_by_file.setdefault(comment.get("file"), []).append(comment)
+
+        for file_data, _, key in shard:
+            self.cache.put(key, {
+                "file": file_data["file"],
+                "comments": comments_by_file.get(file_data["file"], [])
+            })
+
+    def _review_shard(self, index, total, message, system_prompt):
+        """Send one shard's (stable_prefix, message) to the provider, timing the round trip."""
+        stable_prefix, message = message
+        start = time.monotonic()
+        with tracer.span(f"{type(self.provider).__name__}.review_code", "provider") as span:
+            output = self.provider.review_code(message, system_prompt, stable_prefix=stable_prefix) or {}
+            span.add_bytes(
+                len(json.dumps(output).encode("utf-8")),
+                len((system_prompt + stable_prefix + message).encode("utf-8"))
+            )
+            span.set("shard", index)
+        print(f"Shard {index}/{total}: AI response received in {time.monotonic() - start:.1f}s")
+        return output
@@ -0,0 +1,352 @@
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CASSETTE_VERSION = 1
+REDACTED = "REDACTED"
+
+# Shorter values are placeholders, and replacing them everywhere would mangle unrelated text
+MIN_SECRET_LENGTH = 8
+
+# Never written to a cassette
+SECRET_HEADERS = {
+    "authorization", "proxy-authorization", "x-api-key", "x-goog-api-key", "api-key", "cookie", "set-cookie"
+}
+SECRET_QUERY_RE = re.compile(r"([?&](?:key|api_key|access_token|token)=)[^&]*")
+
+# The body is stored decoded, so these no longer describe it
+DROPPED_RESPONSE_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection"}
+
+# Non-secret settings stored with a recording so a replay rebuilds the same run
+RECORDED_SETTINGS = (
+    "AI_PROVIDER", "AI_PROVIDERS", "FRAMEWORK", "OPENAI_ASSISTANT_ID", "OPENAI_COMPATIBLE_BASE_URL",
+    "OPENAI_COMPATIBLE_MODEL", "OPENAI_COMPATIBLE_STREAM", "FETCH_WORKERS", "DIFF_SOURCE", "CONTEXT_MODE",
+    "FULL_FILE_FORMAT", "CONTEXT_TOKEN_BUDGET", "REVIEW_SHARDS", "SHARD_WORKERS", "REVIEW_BATCH_FILES",
+    "INCREMENTAL_REVIEW", "STREAM_RESPONSES", "GITHUB_API_URL"
+)
+
+
+class CassetteMiss(requests.exceptions.RequestException):
+    """A request made during replay that the cassette has no recorded response for."""
+
+
+class Cassette:
+    """
+    Records every HTTP request made through requests to a JSON file, or replays them from it.
+
+    Recording keeps status, headers, body and timings (time to headers and, for
+    streamed responses, when each chunk arrived) with credentials redacted. Replay
+    answers each request with the recorded response for the same method and URL,
+    preferring one whose request body matched, in recorded order. With "original"
+    timing the recorded delays are slept; with "zero" responses return at once,
+    leaving only the run's own CPU time.
+    """
+
+    def __init__(self, path, mode="record", timing="original", secrets=()):
+        self.path = path
+        self.mode = mode
+        self.timing = timing
+        # Credential values are also scrubbed wherever they appear in URLs and bodies. Replay
+        # matches on the recorded (already scrubbed) URLs and needs no scrubbing of its own
+        self.secrets = [secret for secret in secrets if len(secret or "") >= MIN_SECRET_LENGTH] if mode == "record" else []
+        self.interactions = []
+        self.played = 0
+        self.misses = []
+        self._unplayed = {}
+        self._streams = []
+        self._lock = threading.Lock()
+        self._origin = time.monotonic()
+        self._original_send = None
+
+        if mode == "replay":
+            with open(path, encoding="utf-8") as f:
+                document = json.load(f)
+            if document.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version in {path}: {document.get('version')}")
+            self.interactions = document["interactions"]
+            for interaction in self.interactions:
+                self._unplayed.setdefault((interaction["method"], interaction["url"]), []).append(interaction)
+
+    def install(self):
+        """Route every requests.Session.send (and so requests.get/post) through the cassette."""
+        self._original_send = requests.Session.send
+        cassette = self
+
+        def send(session, request, **kwargs):
+            if cassette.mode == "replay":
+                return cassette._replay(request, kwargs)
+            return cassette._record(session, request, kwargs)
+
+        requests.Session.send = send
+        return self
+
+    def uninstall(self):
+        if self._original_send is not None:
+            requests.Session.send = self._original_send
+            self._original_send = None
+
+    def finish(self):
+        """
+        Stop intercepting; write the cassette after recording, or report what was replayed.
+
+        Returns:
+            bool: False when a replayed request had no recording. Providers swallow the
+                CassetteMiss like any request error, so the run itself may still succeed
+                while no longer matching the recording
+        """
+        self.uninstall()
+        if self.mode == "record":
+            self.save()
+            print(f"Recorded {len(self.interactions)} HTTP interaction(s) to {self.path}")
+            return True
+
+        unplayed = sum(len(entries) for entries in self._unplayed.values())
+        print(f"Replayed {self.played} of {len(self.interactions)} recorded HTTP interaction(s) "
+              f"({self.timing} timing, {unplayed} unused)")
+        if self.misses:
+            print(f"Error: {len(self.misses)} request(s) had no recorded response, the replay does not match the recording:")
+            for miss in self.misses[:10]:
+                print(f"  {miss}")
+        return not self.misses
+
+    def save(self):
+        """Write the recording, including streams that were abandoned before they ended."""
+        with self._lock:
+            for stream in self._streams:
+                stream.flush(open_stream=True)
+            document = {
+                "version": CASSETTE_VERSION,
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+                "event": self._read_event(),
+                "settings": {name: os.environ[name] for name in RECORDED_SETTINGS if os.environ.get(name)},
+                "interactions": sorted(self.interactions, key=lambda interaction: interaction["started_at"])
+            }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=1)
+
+    def _record(self, session, request, kwargs):
+        body = request.body or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        started = time.monotonic()
+        interaction = {
+            "method": request.method,
+            "url": self._redact_url(request.url),
+            "started_at": round(started - self._origin, 4),
+            "request_headers": self._redact_headers(request.headers),
+            "request_bytes": len(body),
+            "request_sha256": hashlib.sha256(body).hexdigest()
+        }
+        try:
+            response = self._original_send(session, request, **kwargs)
+        except requests.exceptions.RequestException as e:
+            interaction["error"] = {
+                "type": type(e).__name__,
+                "message": self._redact_text(str(e)),
+                "after": round(time.monotonic() - started, 4)
+            }
+            self._add(interaction)
+            raise
+
+        interaction.update({
+            "status": response.status_code,
+            "reason": response.reason,
+            "response_headers": self._redact_headers(response.headers, DROPPED_RESPONSE_HEADERS),
+            "headers_after": round(response.elapsed.total_seconds(), 4)
+        })
+        if kwargs.get("stream") and not response._content_consumed:
+            # Record chunk timings as the caller reads, so the recorded run still streams
+            stream = _RecordingStream(response.raw, interaction, started, self)
+            response.raw = stream
+            with self._lock:
+                self._streams.append(stream)
+        else:
+            interaction.update(self._encode_body(response.content))
+            interaction["duration"] = round(time.monotonic() - started, 4)
+        self._add(interaction)
+        return response
+
+    def _replay(self, request, kwargs):
+        interaction = self._match(request)
+        if interaction is None:
+            request_line = f"{request.method} {self._redact_url(request.url)}"
+            with self._lock:
+                self.misses.append(request_line)
+            raise CassetteMiss(f"No recorded response for {request_line} in {self.path}")
+
+        if "error" in interaction:
+            self._sleep(interaction["error"]["after"])
+            error_class = getattr(requests.exceptions, interaction["error"]["type"], requests.exceptions.ConnectionError)
+            raise error_class(interaction["error"]["message"], request=request)
+
+        response = requests.Response()
+        response.status_code = interaction["status"]
+        response.reason = interaction.get("reason")
+        response.headers = CaseInsensitiveDict(interaction["response_headers"])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=interaction["headers_after"])
+        body = self._decode_body(interaction)
+
+        self._sleep(interaction["headers_after"])
+        chunks = interaction.get("chunks")
+        if kwargs.get("stream"):
+            if chunks is None:
+                chunks = [[interaction["duration"], len(body)]]
+            response.raw = _ReplayStream(body, chunks, time.monotonic() - interaction["headers_after"],
+                                         self.timing == "original")
+        else:
+            last = chunks[-1][0] if chunks else interaction["duration"]
+            self._sleep(last - interaction["headers_after"])
+            response._content = body
+            response._content_consumed = True
+        return response
+
+    def _match(self, request):
+        """Take the next unplayed interaction for the request, preferring an identical request body."""
+        body = request.body or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            candidates = self._unplayed.get((request.method, self._redact_url(request.url)))
+            if not candidates:
+                return None
+            index = next((i for i, entry in enumerate(candidates) if entry.get("request_sha256") == digest), 0)
+            self.played += 1
+            return candidates.pop(index)
+
+    def _sleep(self, seconds):
+        if self.timing == "original" and seconds > 0:
+            time.sleep(seconds)
+
+    def _add(self, interaction):
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def _stream_done(self, stream):
+        with self._lock:
+            if stream in self._streams:
+                self._streams.remove(stream)
+
+    def _redact_text(self, text):
+        for secret in self.secrets:
+            text = text.replace(secret, REDACTED)
+        return text
+
+    def _redact_url(self, url):
+        return self._redact_text(SECRET_QUERY_RE.sub(rf"\g<1>{REDACTED}", url))
+
+    def _redact_headers(self, headers, dropped=()):
+        return {
+            name: REDACTED if name.lower() in SECRET_HEADERS else self._redact_text(value)
+            for name, value in headers.items()
+            if name.lower() not in dropped
+        }
+
+    def _encode_body(self, body):
+        try:
+            return {"body": self._redact_text(body.decode("utf-8"))}
+        except UnicodeDecodeError:
+            return {"body": base64.b64encode(body).decode("ascii"), "body_encoding": "base64"}
+
+    def _decode_body(self, interaction):
+        if interaction.get("body_encoding") == "base64":
+            return base64.b64decode(interaction["body"])
+        return interaction.get("body", "").encode("utf-8")
+
+    def _read_event(self):
+        """The GitHub event of the recorded run, so a replay can use the same pull request."""
+        try:
+            with open(os.environ.get("GITHUB_EVENT_PATH", ""), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+class _RecordingStream:
+    """Wraps a streamed response's raw body, noting when each chunk arrived."""
+
+    def __init__(self, raw, interaction, started, cassette):
+        self._raw = raw
+        self._interaction = interaction
+        self._started = started
+        self._cassette = cassette
+        self._parts = []
+        self._chunks = []
+
+    def stream(self, chunk_size=None, decode_content=True):
+        try:
+            for chunk in self._raw.stream(chunk_size, decode_content=decode_content):
+                self._parts.append(chunk)
+                self._chunks.append([round(time.monotonic() - self._started, 4), len(chunk)])
+                yield chunk
+        except Exception as e:
+            self._interaction["stream_error"] = type(e).__name__
+            raise
+        finally:
+            # Also reached when the caller stops reading early, e.g. after a [DONE] event
+            self.flush()
+            self._cassette._stream_done(self)
+
+    def flush(self, open_stream=False):
+        """Store what was read so far in the interaction; open_stream marks a stream still being read."""
+        self._interaction.update(self._cassette._encode_body(b"".join(self._parts)))
+        self._interaction["chunks"] = list(self._chunks)
+        self._interaction["duration"] = self._chunks[-1][0] if self._chunks else self._interaction["headers_after"]
+        if open_stream:
+            self._interaction["incomplete"] = True
+        else:
+            self._interaction.pop("incomplete", None)
+
+    def close(self):
+        self._raw.close()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class _ReplayStream:
+    """Raw body of a replayed streamed response, released chunk by chunk at the recorded times."""
+
+    def __init__(self, body, chunks, started, sleep):
+        self._body = body
+        self._chunks = chunks
+        self._started = started
+        self._sleep = sleep
+        self._position = 0
+
+    def stream(self, chunk_size=None, decode_content=True):
+        for offset, length in self._chunks:
+            if self._sleep:
+                wait = offset - (time.monotonic() - self._started)
+                if wait > 0:
+                    time.sleep(wait)
+            yield self._body[self._position:self._position + length]
+            self._position += length
+        if self._position < len(self._body):
+            yield self._body[self._position:]
+            self._position = len(self._body)
+
+    def read(self, amt=None):
+        end = len(self._body) if amt is None else self._position + amt
+        data = self._body[self._position:end]
+        self._position += len(data)
+        return data
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
@@ -4,3 +4,12 @@ def handle_error(error):
     print(f"Error occurred: {error}")
     import traceback
     traceback.print_exc()
+    from utils.profiling import peak_rss_mib
+    peak_rss = peak_rss_mib()
+    if peak_rss is not None:
+        print(f"Peak RSS at failure: {peak_rss:.1f} MiB")
+
+def estimate_tokens(text):
+    """Rough token estimate (about four characters per token) for a string or a character count."""
+    length = text if isinstance(text, int) else len(text or "")
+    return (length + 3) // 4
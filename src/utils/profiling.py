@@ -0,0 +1,184 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Allocation sites that belong to the profiler or the import system, not the run
+IGNORED_ALLOCATION_FILES = (tracemalloc.__file__, __file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>")
+
+MIB = 1024 * 1024
+
+
+def peak_rss_mib():
+    """Peak resident set size of this process so far, in MiB, or None where it is not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return peak / (MIB if sys.platform == "darwin" else 1024)
+
+
+class Profiler:
+    """
+    Optional profiling of one run: cProfile of every thread, and tracemalloc
+    snapshots plus peak RSS at the end of each pipeline stage.
+
+    Files written to the output directory:
+        cpu.prof     pstats dump (snakeviz, python -m pstats)
+        cpu.txt      top functions by cumulative and by own time
+        memory.txt   per stage: traced and peak memory, RSS, top allocation sites
+                     (appended as each stage ends, so it survives an OOM kill)
+        summary.json the printed summary in machine-readable form
+    """
+
+    def __init__(self, output_dir, cpu=True, memory=True, top=20):
+        self.output_dir = output_dir
+        self.cpu = cpu
+        self.memory = memory
+        self.top = top
+        self.stages = []
+        self._profile = None
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+        self._started_at = None
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._started_at = time.monotonic()
+        if self.memory:
+            # One frame per trace keeps the overhead low; allocation sites are reported by line
+            tracemalloc.start(1)
+            with open(self._path("memory.txt"), "w", encoding="utf-8") as f:
+                f.write(f"Memory by pipeline stage (top {self.top} allocation sites)\n")
+        if self.cpu:
+            self._profile = cProfile.Profile()
+            # Before 3.12, cProfile only sees the thread that enabled it; give each new
+            # worker thread (file fetches, shards) its own profile, merged at the end
+            if sys.version_info < (3, 12):
+                threading.setprofile(self._profile_thread)
+            self._profile.enable()
+        return self
+
+    def _profile_thread(self, frame, event, arg):
+        """Called on the first profiling event of a new thread: switch it to a profile of its own."""
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self._lock:
+            self._thread_profiles.append(profile)
+        profile.enable()
+
+    def stage_ended(self, span):
+        """Tracer stage listener: record memory at the end of a pipeline stage."""
+        entry = {
+            "stage": span.name,
+            "seconds": round(span.duration or 0.0, 3),
+            "peak_rss_mib": round(peak_rss_mib() or 0.0, 1)
+        }
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            # The next stage reports its own peak
+            tracemalloc.reset_peak()
+            entry["traced_mib"] = round(current / MIB, 1)
+            entry["traced_peak_mib"] = round(peak / MIB, 1)
+            # Keep the snapshot itself out of the CPU profile
+            if self._profile is not None:
+                self._profile.disable()
+            try:
+                # Filtering the grouped statistics is far cheaper than filter_traces() on every trace
+                statistics = [
+                    stat for stat in tracemalloc.take_snapshot().statistics("lineno")
+                    if stat.traceback[0].filename not in IGNORED_ALLOCATION_FILES
+                ]
+                self._write_stage_memory(entry, statistics[:self.top])
+            finally:
+                if self._profile is not None:
+                    self._profile.enable()
+        self.stages.append(entry)
+
+    def _write_stage_memory(self, entry, statistics):
+        lines = [
+            "",
+            f"== {entry['stage']} ({entry['seconds']:.2f}s): {entry['traced_mib']:.1f} MiB traced at the end, "
+            f"{entry['traced_peak_mib']:.1f} MiB peak, {entry['peak_rss_mib']:.1f} MiB peak RSS so far"
+        ]
+        for stat in statistics:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  {frame.filename}:{frame.lineno}")
+        with open(self._path("memory.txt"), "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def finish(self):
+        """Stop profiling, write the CPU profile and summary, and print the summary."""
+        if self._profile is not None:
+            self._profile.disable()
+            threading.setprofile(None)
+        summary = {
+            "total_seconds": round(time.monotonic() - self._started_at, 3),
+            "peak_rss_mib": round(peak_rss_mib() or 0.0, 1),
+            "stages": self.stages,
+            "top_functions": []
+        }
+        if self._profile is not None:
+            stats = pstats.Stats(self._profile)
+            with self._lock:
+                for profile in self._thread_profiles:
+                    stats.add(profile)
+            stats.dump_stats(self._path("cpu.prof"))
+            self._write_cpu_text(stats)
+            summary["top_functions"] = self._top_functions(stats, 5)
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+        with open(self._path("summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        self._print_summary(summary)
+        return summary
+
+    def _write_cpu_text(self, stats):
+        out = io.StringIO()
+        stats.stream = out
+        out.write(f"Top {self.top} functions by cumulative time (all threads; wall-clock, so waits count)\n")
+        stats.sort_stats("cumulative").print_stats(self.top)
+        out.write(f"\nTop {self.top} functions by own time\n")
+        stats.sort_stats("tottime").print_stats(self.top)
+        with open(self._path("cpu.txt"), "w", encoding="utf-8") as f:
+            f.write(out.getvalue())
+
+    def _top_functions(self, stats, count):
+        """The functions with the most own time (wall-clock, including waits on sockets and locks)."""
+        rows = sorted(stats.stats.items(), key=lambda item: -item[1][2])[:count]
+        return [
+            {
+                "function": f"{os.path.basename(filename)}:{lineno}({name})",
+                "calls": calls,
+                "own_seconds": round(own, 3),
+                "cumulative_seconds": round(cumulative, 3)
+            }
+            for (filename, lineno, name), (_, calls, own, cumulative, _) in rows
+        ]
+
+    def _print_summary(self, summary):
+        print(f"Profile written to {self.output_dir} ({summary['total_seconds']:.1f}s profiled, "
+              f"peak RSS {summary['peak_rss_mib']:.1f} MiB)")
+        for entry in summary["stages"]:
+            memory = ""
+            if "traced_peak_mib" in entry:
+                memory = f", {entry['traced_peak_mib']:.1f} MiB traced peak"
+            print(f"  {entry['stage']}: {entry['seconds']:.2f}s{memory}, RSS {entry['peak_rss_mib']:.1f} MiB")
+        if summary["top_functions"]:
+            print("  Most own time (wall-clock, all threads):")
+            for row in summary["top_functions"]:
+                print(f"    {row['own_seconds']:>7.3f}s  {row['function']} ({row['calls']} calls)")
+
+    def _path(self, name):
+        return os.path.join(self.output_dir, name)
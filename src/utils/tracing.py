@@ -0,0 +1,187 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Collapse IDs in API paths so calls to the same endpoint are aggregated together
+PATH_ID_RES = (
+    (re.compile(r"/repos/[^/]+/[^/]+"), "/repos/:repo"),
+    (re.compile(r"/contents/.*$"), "/contents/:path"),
+    # Before :sha, which would otherwise consume both ends of a full-length range
+    (re.compile(r"\b[0-9a-f]{7,40}\.\.\.[0-9a-f]{7,40}\b"), ":range"),
+    (re.compile(r"\b[0-9a-f]{40}\b"), ":sha"),
+    # OpenAI assistant threads, runs and messages
+    (re.compile(r"/(?:thread|run|msg)_[A-Za-z0-9]+"), "/:id"),
+    (re.compile(r"/\d+(?=/|$)"), "/:n"),
+)
+
+
+class Span:
+    """One timed operation; bytes and attributes can be added while it runs."""
+
+    __slots__ = ("name", "category", "start", "duration", "bytes_in", "bytes_out", "attrs")
+
+    def __init__(self, name, category, start):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.duration = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.attrs = {}
+
+    def add_bytes(self, bytes_in=0, bytes_out=0):
+        self.bytes_in += bytes_in or 0
+        self.bytes_out += bytes_out or 0
+
+    def set(self, key, value):
+        self.attrs[key] = value
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "category": self.category,
+            "start": round(self.start, 4),
+            "duration": round(self.duration or 0.0, 4),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            **({"attrs": self.attrs} if self.attrs else {})
+        }
+
+
+class Tracer:
+    """
+    Collects timing spans for one run: pipeline stages, GitHub calls and provider calls.
+
+    Spans may be recorded from worker threads. Times are seconds since the tracer started.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self._origin = time.monotonic()
+        self._spans = []
+        self._stage = None
+        self._stage_listeners = []
+        self._lock = threading.Lock()
+
+    def add_stage_listener(self, callback):
+        """Call callback(span) whenever a pipeline stage ends."""
+        self._stage_listeners.append(callback)
+
+    @contextmanager
+    def span(self, name, category="call"):
+        """Time the enclosed block as a span; yields the Span so bytes and attributes can be added."""
+        current = Span(name, category, time.monotonic() - self._origin)
+        try:
+            yield current
+        finally:
+            current.duration = time.monotonic() - self._origin - current.start
+            with self._lock:
+                self._spans.append(current)
+
+    def stage(self, name):
+        """End the running pipeline stage, if any, and start the next one."""
+        self.end_stage()
+        self._stage = Span(name, "stage", time.monotonic() - self._origin)
+
+    def end_stage(self):
+        """End the running pipeline stage."""
+        if self._stage is None:
+            return
+        ended = self._stage
+        ended.duration = time.monotonic() - self._origin - ended.start
+        with self._lock:
+            self._spans.append(ended)
+        self._stage = None
+        for callback in self._stage_listeners:
+            callback(ended)
+
+    def spans(self):
+        with self._lock:
+            return sorted(self._spans, key=lambda span: span.start)
+
+    def summary(self):
+        """Aggregate spans by category and name: call count, total/max duration and bytes."""
+        totals = {}
+        for span in self.spans():
+            entry = totals.setdefault((span.category, span.name), {
+                "category": span.category,
+                "name": span.name,
+                "calls": 0,
+                "total_seconds": 0.0,
+                "max_seconds": 0.0,
+                "bytes_in": 0,
+                "bytes_out": 0
+            })
+            entry["calls"] += 1
+            entry["total_seconds"] += span.duration
+            entry["max_seconds"] = max(entry["max_seconds"], span.duration)
+            entry["bytes_in"] += span.bytes_in
+            entry["bytes_out"] += span.bytes_out
+        for entry in totals.values():
+            entry["total_seconds"] = round(entry["total_seconds"], 4)
+            entry["max_seconds"] = round(entry["max_seconds"], 4)
+        return list(totals.values())
+
+    def write_json(self, path):
+        """Write every span plus the aggregated summary as one JSON document."""
+        document = {
+            "started_at": self.started_at.isoformat(),
+            "total_seconds": round(time.monotonic() - self._origin, 4),
+            "run": {
+                "repository": os.environ.get("GITHUB_REPOSITORY"),
+                "run_id": os.environ.get("GITHUB_RUN_ID"),
+                "sha": os.environ.get("GITHUB_SHA")
+            },
+            "summary": self.summary(),
+            "spans": [span.to_dict() for span in self.spans()]
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+    def markdown(self):
+        """Render the stage timings and per-endpoint call totals as Markdown tables."""
+        summary = self.summary()
+        stages = [entry for entry in summary if entry["category"] == "stage"]
+        calls = [entry for entry in summary if entry["category"] != "stage"]
+
+        lines = ["### Review timings", "", "| Stage | Seconds |", "|-------|--------:|"]
+        for entry in stages:
+            lines.append(f"| {entry['name']} | {entry['total_seconds']:.2f} |")
+        lines.append(f"| **Total** | **{time.monotonic() - self._origin:.2f}** |")
+
+        if calls:
+            lines += [
+                "",
+                "| Call | Count | Total s | Max s | KiB in | KiB out |",
+                "|------|------:|--------:|------:|-------:|--------:|"
+            ]
+            for entry in sorted(calls, key=lambda entry: -entry["total_seconds"]):
+                lines.append(
+                    f"| {entry['category']}: `{entry['name']}` | {entry['calls']} | {entry['total_seconds']:.2f} "
+                    f"| {entry['max_seconds']:.2f} | {entry['bytes_in'] / 1024:.1f} | {entry['bytes_out'] / 1024:.1f} |"
+                )
+        return "\n".join(lines) + "\n"
+
+    def write_step_summary(self, path):
+        """Append the Markdown tables to a job summary file (GITHUB_STEP_SUMMARY)."""
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(self.markdown())
+
+
+def endpoint_name(method, path):
+    """Span name for an API call, with repository names and IDs collapsed."""
+    path = "/" + re.sub(r"^https?://[^/]+", "", path).split("?", 1)[0].lstrip("/")
+    for pattern, replacement in PATH_ID_RES:
+        path = pattern.sub(replacement, path)
+    return f"{method} {path}"
+
+
+# One tracer per process; main.py reports it at the end of the run
+tracer = Tracer()
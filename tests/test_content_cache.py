@@ -0,0 +1,69 @@
+"""ContentCache and how PRHandler finds the blob SHAs it is keyed by."""
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from github.content_cache import ContentCache
+from github.pr_handler import PRHandler
+from offline import write_event
+
+LISTING = [
+    {"filename": "app.py", "status": "modified", "sha": "a" * 40, "changes": 2, "patch": "@@ -1 +1 @@\n-old\n+new"},
+    {"filename": "new.py", "status": "added", "sha": "b" * 40, "changes": 1, "patch": "@@ -0,0 +1 @@\n+x"},
+]
+
+
+class ListingClient:
+    """GitHub client stand-in serving the PR's file listing and counting how often it is listed."""
+
+    def __init__(self):
+        self.listings = 0
+
+    def paginate_concurrently(self, path, params=None, per_page=100, workers=8):
+        self.listings += 1
+        return iter(LISTING)
+
+
+def make_handler(tmp_path, diff_source):
+    write_event()
+    cache = ContentCache(str(tmp_path / "content.sqlite"))
+    handler = PRHandler("token", content_cache=cache, diff_source=diff_source)
+    handler.client = ListingClient()
+    return handler, cache
+
+
+def test_blob_shas_come_from_the_listing_the_diff_was_built_from(tmp_path):
+    handler, cache = make_handler(tmp_path, "files")
+    with contextlib.redirect_stdout(io.StringIO()):
+        handler.get_diff()
+        shas = handler.get_file_blob_shas()
+    cache.close()
+
+    assert shas == {"app.py": "a" * 40, "new.py": "b" * 40}
+    assert handler.client.listings == 1
+
+
+def test_blob_shas_are_listed_once_when_the_diff_came_whole(tmp_path):
+    handler, cache = make_handler(tmp_path, "diff")
+    handler.get_file_blob_shas()
+    handler.get_file_blob_shas()
+    cache.close()
+
+    assert handler.client.listings == 1
+
+
+def test_cache_round_trip_and_reopen(tmp_path):
+    path = str(tmp_path / "content.sqlite")
+    cache = ContentCache(path)
+    cache.put_many([("a" * 40, "print('hi')\n", {"line_count": 1}), (None, "skipped", {})])
+    cache.close()
+
+    reopened = ContentCache(path)
+    found = reopened.get_many(["a" * 40, "c" * 40, None])
+    reopened.close()
+
+    assert found == {"a" * 40: ("print('hi')\n", {"line_count": 1})}
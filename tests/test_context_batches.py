@@ -0,0 +1,66 @@
+"""PRHandler.iter_context_batches: batching, hooks and the carried-forward token budget."""
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from github.parsed_diff import ParsedDiff
+from offline import OfflinePRHandler
+from synthetic import generate_diff
+
+
+class RecordingHandler(OfflinePRHandler):
+    """Records each batch's budget and reports a fixed number of tokens used per batch."""
+
+    def __init__(self, used_per_batch):
+        super().__init__()
+        self.used_per_batch = used_per_batch
+        self.budgets = []
+
+    def _process_batch(self, review_files, parsed_diff, token_budget):
+        self.budgets.append(token_budget)
+        return [{"file": pfile.path} for pfile in review_files], self.used_per_batch
+
+
+def run_batches(handler, files, **kwargs):
+    parsed_diff = ParsedDiff(generate_diff(files=files, hunks=1, lines=3, seed=files))
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [batch for batch in handler.iter_context_batches(parsed_diff, **kwargs)]
+
+
+def test_batches_split_files_and_call_hook_before_each():
+    handler = RecordingHandler(used_per_batch=0)
+    started = []
+
+    batches = run_batches(handler, 5, batch_files=2, before_batch=started.append)
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert started == [0, 1, 2]
+
+
+def test_unused_budget_carries_to_later_batches():
+    handler = RecordingHandler(used_per_batch=100)
+
+    run_batches(handler, 6, token_budget=1200, batch_files=2)
+
+    # 400 of 1200 for the first third; its 300 unused tokens are shared by the rest
+    assert handler.budgets == [400, 550, 1000]
+
+
+def test_budget_stays_proportional_when_batches_use_their_share():
+    handler = RecordingHandler(used_per_batch=400)
+
+    run_batches(handler, 6, token_budget=1200, batch_files=2)
+
+    assert handler.budgets == [400, 400, 400]
+
+
+def test_no_budget_is_passed_through():
+    handler = RecordingHandler(used_per_batch=100)
+
+    run_batches(handler, 4, batch_files=2)
+
+    assert handler.budgets == [None, None]
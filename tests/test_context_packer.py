@@ -0,0 +1,82 @@
+"""ContextPacker tier choice at different token budgets."""
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from github.context_packer import (
+    ContextPacker, TIER_FULL_FILE, TIER_HUNKS_ONLY, TIER_MERGED_HUNKS, TIER_METADATA_ONLY
+)
+
+
+def candidate(name, additions, metadata=10, hunks=50, merged=120, full=300):
+    costs = {TIER_METADATA_ONLY: metadata, TIER_HUNKS_ONLY: hunks, TIER_MERGED_HUNKS: merged}
+    if full is not None:
+        costs[TIER_FULL_FILE] = full
+    return {"file": name, "additions": additions, "costs": costs}
+
+
+def files():
+    return [candidate("big.py", additions=20), candidate("small.py", additions=5), candidate("new.py", 10, full=None)]
+
+
+def pack(token_budget, candidates=None):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        tiers, used = ContextPacker(token_budget).pack(candidates or files())
+    return tiers, used, output.getvalue()
+
+
+def test_no_budget_gives_every_file_its_richest_tier():
+    tiers, used, _ = pack(None)
+
+    assert tiers == {"big.py": TIER_FULL_FILE, "small.py": TIER_FULL_FILE, "new.py": TIER_MERGED_HUNKS}
+    assert used == 720
+
+
+def test_large_budget_fits_everything():
+    tiers, used, _ = pack(1000)
+
+    assert set(tiers.values()) == {TIER_FULL_FILE, TIER_MERGED_HUNKS}
+    assert used == 720
+
+
+def test_budget_for_hunks_only():
+    tiers, used, _ = pack(150)
+
+    assert set(tiers.values()) == {TIER_HUNKS_ONLY}
+    assert used == 150
+
+
+def test_files_with_most_additions_are_upgraded_first():
+    tiers, used, _ = pack(400)
+
+    # Hunks for all (150), then the 250 left upgrade big.py to its full file
+    assert tiers == {"big.py": TIER_FULL_FILE, "new.py": TIER_HUNKS_ONLY, "small.py": TIER_HUNKS_ONLY}
+    assert used == 400
+
+
+def test_metadata_is_reserved_before_hunks():
+    # Hunks of two files fit 110, but then the third file's metadata would not
+    tiers, used, _ = pack(110)
+
+    assert tiers == {"big.py": TIER_HUNKS_ONLY, "new.py": TIER_HUNKS_ONLY, "small.py": TIER_METADATA_ONLY}
+    assert used == 110
+
+
+def test_budget_below_metadata_reports_overrun():
+    tiers, used, output = pack(20)
+
+    assert set(tiers.values()) == {TIER_METADATA_ONLY}
+    assert used == 30
+    assert "over the 20 token budget by ~10" in output
+
+
+def test_used_never_exceeds_a_budget_that_covers_metadata():
+    candidates = [candidate(f"file{index}.py", additions=index, metadata=7) for index in range(50)]
+
+    for token_budget in (350, 400, 1000, 2500, 5000):
+        _, used, output = pack(token_budget, candidates)
+        assert used <= token_budget
+        assert output == ""
@@ -0,0 +1,175 @@
+"""HedgedProvider: failover order, hedging, circuit breaking and total failure."""
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from providers.hedged_provider import HedgedProvider
+
+VALID = {"summary": {"confidence": 90, "risk_level": "Low", "reasoning": "ok"}, "comments": []}
+INVALID = {"summary": None, "comments": []}
+
+
+class ScriptedProvider:
+    """Answers each call with the next scripted outcome: a result dict, an exception or a delay."""
+
+    context_token_budget = 100_000
+
+    def __init__(self, name, *outcomes, delay=0.0):
+        self.model = name
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = 0
+        self.release = threading.Event()
+
+    def review_code(self, message, system_prompt, stable_prefix=""):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if self.delay:
+            self.release.wait(self.delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return {**outcome, "provider": self.model}
+
+    def all_usage_records(self):
+        return []
+
+
+def make_hedged(*providers, hedge_delay=5.0, failures=2):
+    config = SimpleNamespace(
+        provider_max_retries=0,
+        provider_retry_deadline=60,
+        price_table={},
+        hedge_delay=hedge_delay,
+        circuit_breaker_failures=failures
+    )
+    return HedgedProvider(config, [(provider.model, provider) for provider in providers])
+
+
+def review(hedged):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        result = hedged.review_code("message", "system")
+    return result, output.getvalue()
+
+
+def test_first_provider_answers_alone():
+    first, second = ScriptedProvider("first", VALID), ScriptedProvider("second", VALID)
+    hedged = make_hedged(first, second)
+
+    result, _ = review(hedged)
+
+    assert result["provider"] == "first"
+    assert (first.calls, second.calls) == (1, 0)
+    assert hedged.wins == {"first": 1, "second": 0}
+
+
+def test_fails_over_in_rank_order():
+    first = ScriptedProvider("first", INVALID)
+    second = ScriptedProvider("second", RuntimeError("down"))
+    third = ScriptedProvider("third", VALID)
+    hedged = make_hedged(first, second, third)
+
+    started = time.monotonic()
+    result, output = review(hedged)
+
+    assert result["provider"] == "third"
+    assert (first.calls, second.calls, third.calls) == (1, 1, 1)
+    # Failover does not wait for the hedge delay
+    assert time.monotonic() - started < 1.0
+    assert output.index("Provider first returned") < output.index("Provider second error")
+
+
+def test_slow_provider_is_hedged_after_the_delay():
+    slow = ScriptedProvider("slow", VALID, delay=5.0)
+    fast = ScriptedProvider("fast", VALID)
+    hedged = make_hedged(slow, fast, hedge_delay=0.05)
+
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        result = hedged.review_code("message", "system")
+        # Let the abandoned request finish while its log line is still captured
+        slow.release.set()
+        deadline = time.monotonic() + 2.0
+        while "Provider slow answered" not in output.getvalue() and time.monotonic() < deadline:
+            time.sleep(0.01)
+    output = output.getvalue()
+
+    assert result["provider"] == "fast"
+    assert "hedge delay passed" in output
+    assert "abandoned slow" in output
+
+
+def test_circuit_opens_after_consecutive_failures():
+    flaky = ScriptedProvider("flaky", INVALID)
+    backup = ScriptedProvider("backup", VALID)
+    hedged = make_hedged(flaky, backup, failures=2)
+
+    review(hedged)
+    assert hedged.open_circuits == set()
+    _, output = review(hedged)
+    assert hedged.open_circuits == {"flaky"}
+    assert "Circuit opened for flaky" in output
+
+    review(hedged)
+    # Skipped while open
+    assert flaky.calls == 2
+    assert backup.calls == 3
+
+
+def test_success_resets_the_failure_count():
+    flaky = ScriptedProvider("flaky", INVALID, VALID, INVALID, VALID)
+    backup = ScriptedProvider("backup", VALID)
+    hedged = make_hedged(flaky, backup, failures=2)
+
+    for _ in range(4):
+        review(hedged)
+
+    assert hedged.open_circuits == set()
+    assert hedged.failures["flaky"] == 0
+
+
+def test_half_open_when_every_circuit_is_open():
+    first = ScriptedProvider("first", INVALID, INVALID, VALID)
+    second = ScriptedProvider("second", INVALID)
+    hedged = make_hedged(first, second, failures=1)
+
+    review(hedged)
+    assert hedged.open_circuits == {"first", "second"}
+
+    # Every provider is tried again; the one that recovers has its circuit closed
+    result, output = review(hedged)
+    assert "trying every provider again" in output
+    assert result["summary"] is None
+    result, output = review(hedged)
+    assert result["provider"] == "first"
+    assert "Circuit closed for first" in output
+    assert hedged.open_circuits == {"second"}
+
+    # The still-open circuit keeps being skipped
+    review(hedged)
+    assert (first.calls, second.calls) == (4, 2)
+
+
+def test_all_providers_failing_returns_empty_review():
+    first = ScriptedProvider("first", RuntimeError("boom"))
+    second = ScriptedProvider("second", INVALID)
+    hedged = make_hedged(first, second)
+
+    result, output = review(hedged)
+
+    assert result == {"summary": None, "comments": []}
+    assert "No provider returned a valid review" in output
+    assert hedged.wins == {"first": 0, "second": 0}
+
+
+def test_budget_and_model_cover_every_provider():
+    small = ScriptedProvider("small", VALID)
+    small.context_token_budget = 20_000
+    hedged = make_hedged(ScriptedProvider("big", VALID), small)
+
+    assert hedged.context_token_budget == 20_000
+    assert hedged.model == "big:big+small:small"
@@ -0,0 +1,35 @@
+"""Peak memory of the batched review pipeline must not grow with the number of files."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from memory_scaling import GROWTH_THRESHOLD, measure
+
+BATCH_FILES = 300
+TOKEN_BUDGET = 100000
+
+# Each size runs the whole pipeline; deselect with -m "not slow"
+pytestmark = pytest.mark.slow
+
+
+def test_peak_memory_is_flat_from_300_to_1500_files():
+    small_peak, _, small_calls, _ = measure(300, BATCH_FILES, TOKEN_BUDGET, shards=1)
+    large_peak, _, large_calls, _ = measure(1500, BATCH_FILES, TOKEN_BUDGET, shards=1)
+
+    # Every batch was reviewed
+    assert small_calls == 1
+    assert large_calls == 5
+    assert large_peak <= small_peak * (1 + GROWTH_THRESHOLD), (
+        f"peak grew from {small_peak:.1f} MiB at 300 files to {large_peak:.1f} MiB at 1500 files"
+    )
+
+
+def test_unbatched_review_holds_every_file():
+    # Guards the measurement itself: without batching the peak must grow with the PR
+    small_peak = measure(300, 0, TOKEN_BUDGET, shards=1)[0]
+    large_peak = measure(900, 0, TOKEN_BUDGET, shards=1)[0]
+
+    assert large_peak > small_peak * 2
@@ -0,0 +1,252 @@
+"""ParsedDiff against the shapes of diff text GitHub and git produce."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from github.parsed_diff import LINE_ADDED, LINE_CONTEXT, LINE_REMOVED, ParsedDiff
+
+
+def lines_of(pfile):
+    return [line for hunk in pfile for line in hunk]
+
+
+def test_modified_file_indexes_added_lines():
+    parsed = ParsedDiff(
+        "diff --git a/app.py b/app.py\n"
+        "index 1111111..2222222 100644\n"
+        "--- a/app.py\n"
+        "+++ b/app.py\n"
+        "@@ -1,3 +1,4 @@ def main():\n"
+        " one\n"
+        "-two\n"
+        "+deux\n"
+        "+trois\n"
+        " four\n"
+    )
+
+    pfile = parsed.get("app.py")
+    assert len(parsed) == 1
+    assert pfile.source_path == "app.py" and pfile.target_path == "app.py"
+    assert not pfile.is_added_file and not pfile.is_removed_file
+    assert pfile.hunks[0].section_header == "def main():"
+    assert pfile.added_lines == {2: "deux", 3: "trois"}
+    assert lines_of(pfile) == [
+        (LINE_CONTEXT, 1, "one"),
+        (LINE_REMOVED, None, "two"),
+        (LINE_ADDED, 2, "deux"),
+        (LINE_ADDED, 3, "trois"),
+        (LINE_CONTEXT, 4, "four"),
+    ]
+    assert parsed.is_added_line("app.py", 2)
+    assert not parsed.is_added_line("app.py", 4)
+
+
+def test_rename_uses_new_path():
+    parsed = ParsedDiff(
+        "diff --git a/old/name.py b/new/name.py\n"
+        "similarity index 90%\n"
+        "rename from old/name.py\n"
+        "rename to new/name.py\n"
+        "--- a/old/name.py\n"
+        "+++ b/new/name.py\n"
+        "@@ -1 +1 @@\n"
+        "-old\n"
+        "+new\n"
+    )
+
+    pfile = parsed.get("new/name.py")
+    assert pfile.source_path == "old/name.py"
+    assert pfile.added_lines == {1: "new"}
+    assert parsed.get("old/name.py") is None
+
+
+def test_pure_rename_without_hunks():
+    parsed = ParsedDiff(
+        "diff --git a/old name.py b/new name.py\n"
+        "similarity index 100%\n"
+        "rename from old name.py\n"
+        "rename to new name.py\n"
+    )
+
+    pfile = parsed.get("new name.py")
+    assert pfile.source_path == "old name.py"
+    assert pfile.hunks == []
+
+
+def test_new_and_deleted_files():
+    parsed = ParsedDiff(
+        "diff --git a/added.py b/added.py\n"
+        "new file mode 100644\n"
+        "index 0000000..1111111\n"
+        "--- /dev/null\n"
+        "+++ b/added.py\n"
+        "@@ -0,0 +1,2 @@\n"
+        "+first\n"
+        "+second\n"
+        "diff --git a/gone.py b/gone.py\n"
+        "deleted file mode 100644\n"
+        "index 1111111..0000000\n"
+        "--- a/gone.py\n"
+        "+++ /dev/null\n"
+        "@@ -1,2 +0,0 @@\n"
+        "-first\n"
+        "-second\n"
+    )
+
+    added = parsed.get("added.py")
+    removed = parsed.get("gone.py")
+    assert added.is_added_file and not added.is_removed_file
+    assert added.added_lines == {1: "first", 2: "second"}
+    assert removed.is_removed_file and removed.added_lines == {}
+    # Lines of a deleted file are never commentable
+    assert not parsed.is_added_line("gone.py", 1)
+
+
+def test_binary_file_has_no_hunks():
+    parsed = ParsedDiff(
+        "diff --git a/logo.png b/logo.png\n"
+        "index 1111111..2222222 100644\n"
+        "Binary files a/logo.png and b/logo.png differ\n"
+        "diff --git a/app.py b/app.py\n"
+        "--- a/app.py\n"
+        "+++ b/app.py\n"
+        "@@ -1 +1 @@\n"
+        "-a\n"
+        "+b\n"
+    )
+
+    assert [pfile.path for pfile in parsed] == ["logo.png", "app.py"]
+    assert parsed.get("logo.png").hunks == []
+    assert parsed.get("app.py").added_lines == {1: "b"}
+
+
+def test_no_newline_at_end_of_file_marker_is_skipped():
+    parsed = ParsedDiff(
+        "diff --git a/app.py b/app.py\n"
+        "--- a/app.py\n"
+        "+++ b/app.py\n"
+        "@@ -1,2 +1,2 @@\n"
+        " keep\n"
+        "-old\n"
+        "\\ No newline at end of file\n"
+        "+new\n"
+        "\\ No newline at end of file\n"
+        "diff --git a/next.py b/next.py\n"
+        "--- a/next.py\n"
+        "+++ b/next.py\n"
+        "@@ -1 +1 @@\n"
+        "-x\n"
+        "+y\n"
+    )
+
+    pfile = parsed.get("app.py")
+    assert pfile.added_lines == {2: "new"}
+    assert len(lines_of(pfile)) == 3
+    assert parsed.get("next.py").added_lines == {1: "y"}
+
+
+def test_truncated_hunk_ends_at_next_file():
+    # The hunk header promises more lines than the section has, as in a cut-off patch
+    parsed = ParsedDiff(
+        "diff --git a/cut.py b/cut.py\n"
+        "--- a/cut.py\n"
+        "+++ b/cut.py\n"
+        "@@ -1,10 +1,12 @@\n"
+        " one\n"
+        "+two\n"
+        "diff --git a/next.py b/next.py\n"
+        "--- a/next.py\n"
+        "+++ b/next.py\n"
+        "@@ -1 +1 @@\n"
+        "-x\n"
+        "+y\n"
+    )
+
+    assert [pfile.path for pfile in parsed] == ["cut.py", "next.py"]
+    assert parsed.get("cut.py").added_lines == {2: "two"}
+    assert parsed.get("next.py").added_lines == {1: "y"}
+
+
+def test_crlf_line_endings():
+    parsed = ParsedDiff(
+        "diff --git a/win.txt b/win.txt\r\n"
+        "--- a/win.txt\r\n"
+        "+++ b/win.txt\r\n"
+        "@@ -1,2 +1,2 @@\r\n"
+        " same\r\n"
+        "-old\r\n"
+        "+new\r\n"
+    )
+
+    pfile = parsed.get("win.txt")
+    assert pfile.added_lines == {2: "new"}
+    assert lines_of(pfile)[0] == (LINE_CONTEXT, 1, "same")
+
+
+def test_quoted_paths():
+    parsed = ParsedDiff(
+        'diff --git "a/docs/caf\\303\\251 menu.md" "b/docs/caf\\303\\251 menu.md"\n'
+        '--- "a/docs/caf\\303\\251 menu.md"\n'
+        '+++ "b/docs/caf\\303\\251 menu.md"\n'
+        "@@ -1 +1 @@\n"
+        "-old\n"
+        "+new\n"
+        'diff --git a/plain.txt "b/tab\\there.txt"\n'
+        "similarity index 100%\n"
+        "rename from plain.txt\n"
+        'rename to "tab\\there.txt"\n'
+    )
+
+    assert parsed.get("docs/café menu.md").added_lines == {1: "new"}
+    renamed = parsed.get("tab\there.txt")
+    assert renamed.source_path == "plain.txt"
+
+
+def test_plain_unified_diff_without_git_headers():
+    parsed = ParsedDiff(
+        "--- a/one.py\t2024-01-01 00:00:00\n"
+        "+++ b/one.py\t2024-01-02 00:00:00\n"
+        "@@ -1 +1 @@\n"
+        "-a\n"
+        "+b\n"
+        "--- a/two.py\n"
+        "+++ b/two.py\n"
+        "@@ -1 +1,2 @@\n"
+        " a\n"
+        "+b\n"
+    )
+
+    assert [pfile.path for pfile in parsed] == ["one.py", "two.py"]
+    assert parsed.get("two.py").added_lines == {2: "b"}
+
+
+def test_restrict_keeps_only_listed_lines():
+    parsed = ParsedDiff(
+        "diff --git a/app.py b/app.py\n"
+        "--- a/app.py\n"
+        "+++ b/app.py\n"
+        "@@ -1,2 +1,4 @@\n"
+        " one\n"
+        "+two\n"
+        "+three\n"
+        " four\n"
+        "@@ -10 +12,2 @@\n"
+        " ten\n"
+        "+eleven\n"
+        "diff --git a/other.py b/other.py\n"
+        "--- a/other.py\n"
+        "+++ b/other.py\n"
+        "@@ -1 +1 @@\n"
+        "-x\n"
+        "+y\n"
+    )
+
+    restricted = parsed.restrict({"app.py": {3}})
+
+    assert [pfile.path for pfile in restricted] == ["app.py"]
+    pfile = restricted.get("app.py")
+    assert pfile.added_lines == {3: "three"}
+    assert len(pfile.hunks) == 1
+    assert (LINE_CONTEXT, 2, "two") in lines_of(pfile)
+    assert restricted.unrestricted() is parsed
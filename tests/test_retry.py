@@ -0,0 +1,249 @@
+"""Provider retries: server-requested waits, backoff, and not repeating run creation."""
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from providers.base import BaseProvider
+from providers.openai_provider import OpenAIProvider
+from providers.retry import BACKOFF_MAX, backoff_delay, server_requested_delay
+from utils.tracing import tracer
+
+
+def make_config(**overrides):
+    settings = {
+        "provider_max_retries": 3,
+        "provider_retry_deadline": 300,
+        "price_table": {},
+        "openai_api_key": "test-key",
+        "openai_assistant_id": "asst_test",
+        "openai_run_timeout": 60,
+    }
+    settings.update(overrides)
+    return SimpleNamespace(**settings)
+
+
+def make_response(status, body=None, headers=None, method="POST", url="https://api.test/v1/resource"):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(body or {}).encode()
+    response.headers.update(headers or {})
+    response.url = url
+    response.request = requests.Request(method, url).prepare()
+    return response
+
+
+class StubProvider(BaseProvider):
+    def review_code(self, message, system_prompt, stable_prefix=""):
+        return {"summary": None, "comments": []}
+
+    def _make_api_request(self, payload):
+        return None
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waits = []
+    # Providers share the time module, so this also skips run status polling waits
+    monkeypatch.setattr(time, "sleep", waits.append)
+    return waits
+
+
+def test_retry_after_ms_wins_over_retry_after():
+    assert server_requested_delay({"retry-after-ms": "1500", "Retry-After": "9"}) == 1.5
+
+
+def test_retry_after_seconds():
+    headers = requests.structures.CaseInsensitiveDict({"retry-after": "7"})
+    assert server_requested_delay(headers) == 7.0
+
+
+def test_retry_after_http_date():
+    at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    delay = server_requested_delay({"Retry-After": format_datetime(at, usegmt=True)})
+    assert 28 <= delay <= 30
+
+
+def test_retry_after_in_the_past_is_no_wait():
+    assert server_requested_delay({"Retry-After": "-5"}) == 0.0
+    at = datetime.now(timezone.utc) - timedelta(minutes=5)
+    assert server_requested_delay({"Retry-After": format_datetime(at, usegmt=True)}) == 0.0
+
+
+def test_unparseable_retry_after_is_ignored():
+    assert server_requested_delay({"Retry-After": "soon", "retry-after-ms": "later"}) is None
+
+
+def test_openai_reset_headers_only_count_exhausted_limits():
+    headers = {
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "1.5s",
+        "x-ratelimit-remaining-tokens": "0",
+        "x-ratelimit-reset-tokens": "6m0s",
+    }
+    assert server_requested_delay(headers) == 360.0
+
+    headers["x-ratelimit-remaining-tokens"] = "1200"
+    assert server_requested_delay(headers) == 1.5
+
+
+def test_anthropic_reset_timestamp():
+    reset_at = (datetime.now(timezone.utc) + timedelta(seconds=20)).isoformat().replace("+00:00", "Z")
+    delay = server_requested_delay({
+        "anthropic-ratelimit-tokens-remaining": "0",
+        "anthropic-ratelimit-tokens-reset": reset_at,
+    })
+    assert 18 <= delay <= 20
+
+
+def test_no_headers_means_no_requested_delay():
+    assert server_requested_delay({}) is None
+    assert server_requested_delay({"x-ratelimit-remaining-requests": "5", "x-ratelimit-reset-requests": "1s"}) is None
+
+
+def test_backoff_grows_with_jitter_and_is_capped():
+    for attempt in range(1, 10):
+        full = min(BACKOFF_MAX, 2 ** (attempt - 1))
+        for _ in range(20):
+            assert full / 2 <= backoff_delay(attempt) <= full
+
+
+def test_send_waits_as_long_as_the_server_asks(sleeps):
+    provider = StubProvider(make_config())
+    responses = iter([make_response(429, headers={"Retry-After": "4"}), make_response(200, {"ok": True})])
+
+    response = provider._send(lambda: next(responses))
+
+    assert response.json() == {"ok": True}
+    assert sleeps == [4.0]
+    assert provider.retries == 1 and provider.backoff_seconds == 4.0
+
+
+def test_send_gives_up_after_max_retries(sleeps):
+    provider = StubProvider(make_config(provider_max_retries=2))
+    calls = []
+
+    def send():
+        calls.append(1)
+        return make_response(503, headers={"retry-after-ms": "10"})
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        provider._send(send)
+    assert len(calls) == 3
+    assert sleeps == [0.1, 0.1]
+
+
+def test_send_does_not_wait_past_the_deadline(sleeps):
+    provider = StubProvider(make_config(provider_retry_deadline=10))
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        provider._send(lambda: make_response(429, headers={"Retry-After": "60"}))
+    assert sleeps == []
+
+
+def test_send_does_not_retry_client_errors(sleeps):
+    provider = StubProvider(make_config())
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        provider._send(lambda: make_response(400))
+    assert sleeps == []
+
+
+class ChunkedRaw:
+    """Raw body that hands out fixed chunks, like urllib3's streamed response."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def stream(self, chunk_size=None, decode_content=True):
+        yield from self.chunks
+
+    def close(self):
+        pass
+
+
+def test_streamed_body_bytes_are_counted_as_read():
+    class CountedProvider(StubProvider):
+        pass
+
+    provider = CountedProvider(make_config())
+    response = make_response(200)
+    response._content = False
+    response._content_consumed = False
+    response.raw = ChunkedRaw([b"data: one\n\n", b"data: two\n\n"])
+
+    streamed = provider._send(lambda: response, stream=True)
+    span = [span for span in tracer.spans() if span.name == "CountedProvider HTTP"][-1]
+    assert span.bytes_in == 0
+
+    assert b"".join(streamed.iter_content(chunk_size=None)) == b"data: one\n\ndata: two\n\n"
+    assert span.bytes_in == 22
+
+
+class FakeSession:
+    """Answers POST/GET calls from per-URL queues and records every call."""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = []
+
+    def _answer(self, method, url, **kwargs):
+        self.calls.append((method, url))
+        answer = self.routes[(method, url)].pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return make_response(answer[0], answer[1], method=method, url=url)
+
+    def post(self, url, **kwargs):
+        return self._answer("POST", url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self._answer("GET", url, **kwargs)
+
+
+RUNS_URL = "https://api.openai.com/v1/threads/thread_1/runs"
+
+
+def run_assistant(routes):
+    provider = OpenAIProvider(make_config())
+    provider.session = FakeSession(routes)
+    run = provider._run_assistant("thread_1", "Review carefully")
+    return run, provider.session.calls
+
+
+def test_run_started_despite_error_is_not_created_again(sleeps, capsys):
+    run, calls = run_assistant({
+        ("POST", RUNS_URL): [(502, {"error": "bad gateway"})],
+        ("GET", RUNS_URL): [(200, {"data": [{"id": "run_1", "status": "queued"}]})],
+        ("GET", f"{RUNS_URL}/run_1"): [(200, {"id": "run_1", "status": "completed"})],
+    })
+
+    assert run["id"] == "run_1"
+    assert [call for call in calls if call[0] == "POST"] == [("POST", RUNS_URL)]
+
+
+def test_run_is_created_again_when_the_failed_attempt_started_none(sleeps, capsys):
+    run, calls = run_assistant({
+        ("POST", RUNS_URL): [
+            requests.exceptions.ConnectionError("reset"),
+            (200, {"id": "run_2", "status": "in_progress"}),
+        ],
+        ("GET", RUNS_URL): [(200, {"data": []})],
+        ("GET", f"{RUNS_URL}/run_2"): [(200, {"id": "run_2", "status": "completed"})],
+    })
+
+    assert run["id"] == "run_2"
+    assert calls == [
+        ("POST", RUNS_URL),
+        ("GET", RUNS_URL),
+        ("POST", RUNS_URL),
+        ("GET", f"{RUNS_URL}/run_2"),
+    ]
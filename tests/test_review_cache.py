@@ -0,0 +1,103 @@
+"""ShardedReviewer with the on-disk ReviewCache."""
+import contextlib
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from prompts.prompt_factory import PromptFactory
+from review.review_cache import ReviewCache
+from review.sharded_review import ShardedReviewer
+
+
+class FakeProvider:
+    """Answers with one comment per file in the message and a fixed summary."""
+
+    model = "fake-model"
+
+    def __init__(self, confidence=90):
+        self.confidence = confidence
+        self.calls = 0
+
+    def review_code(self, message, system_prompt, stable_prefix=""):
+        self.calls += 1
+        text = stable_prefix + message
+        files = [name for name in ("a.py", "b.py") if name in text]
+        return {
+            "summary": {"confidence": self.confidence, "risk_level": "Low", "reasoning": f"call {self.calls}"},
+            "comments": [{"file": name, "line": 1, "comment": f"{name} from call {self.calls}"} for name in files]
+        }
+
+
+def file_data(name, line="x = 1"):
+    return {
+        "file": name,
+        "added_lines": {1: line},
+        "line_contexts": {},
+        "metadata": {},
+        "total_additions": 1,
+        "context_tier": "metadata_only"
+    }
+
+
+def review(cache, provider, files, previous_score=None):
+    prompt = PromptFactory.create_prompt("react")
+    reviewer = ShardedReviewer(provider, prompt, cache=cache)
+    with contextlib.redirect_stdout(io.StringIO()):
+        reviewer.add_batch(files, prompt.get_system_prompt(), previous_score)
+        return reviewer.result()
+
+
+def test_previous_score_is_part_of_the_key():
+    keys = {
+        ReviewCache.make_key("section", "system", "Provider", "model", previous_score)
+        for previous_score in (None, 60, 85)
+    }
+    assert len(keys) == 3
+
+
+def test_cache_stores_comments_without_the_summary(tmp_path):
+    cache = ReviewCache(str(tmp_path))
+    review(cache, FakeProvider(), [file_data("a.py")])
+
+    entries = [json.loads(path.read_text()) for path in tmp_path.iterdir()]
+    assert len(entries) == 1
+    assert entries[0]["comments"] == [{"file": "a.py", "line": 1, "comment": "a.py from call 1"}]
+    assert "summary" not in entries[0]
+
+
+def test_hits_reuse_comments_and_summary_covers_only_fresh_files(tmp_path):
+    cache = ReviewCache(str(tmp_path))
+    review(cache, FakeProvider(confidence=40), [file_data("a.py")])
+
+    provider = FakeProvider(confidence=95)
+    output = review(cache, provider, [file_data("a.py"), file_data("b.py")])
+
+    assert provider.calls == 1
+    assert {comment["comment"] for comment in output["comments"]} == {"a.py from call 1", "b.py from call 1"}
+    # The earlier run's 40% does not leak into this run's summary
+    assert output["summary"]["confidence"] == 95
+
+
+def test_all_hits_skip_the_provider(tmp_path):
+    cache = ReviewCache(str(tmp_path))
+    review(cache, FakeProvider(), [file_data("a.py")], previous_score=70)
+
+    provider = FakeProvider()
+    output = review(cache, provider, [file_data("a.py")], previous_score=70)
+
+    assert provider.calls == 0
+    assert output["summary"] is None
+    assert len(output["comments"]) == 1
+
+
+def test_new_previous_score_misses(tmp_path):
+    cache = ReviewCache(str(tmp_path))
+    review(cache, FakeProvider(), [file_data("a.py")], previous_score=70)
+
+    provider = FakeProvider()
+    review(cache, provider, [file_data("a.py")], previous_score=85)
+
+    assert provider.calls == 1
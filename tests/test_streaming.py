@@ -0,0 +1,79 @@
+"""IncrementalCommentParser must parse the same comments however the stream is chunked."""
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from providers.streaming import IncrementalCommentParser
+
+SUMMARY = {"confidence": 72, "risk_level": "Medium", "reasoning": "Braces {like} these and \"quotes\" in text"}
+COMMENTS = [
+    {"file": "src/app.py", "line": 12, "comment": "Close the file: `open()` without `with` leaks {fd}"},
+    {"file": "src/util.js", "line": 3, "comment": "Escaped \\\" quote and a ] bracket inside a string"},
+    {"file": "docs/café.md", "line": 1, "comment": "Unicode — ✓ and a nested object", "meta": {"tags": ["a", "b"]}},
+    {"file": "src/empty.py", "line": 7, "comment": ""},
+]
+RESPONSE = "```json\n" + json.dumps({"summary": SUMMARY, "comments": COMMENTS}, ensure_ascii=False, indent=2) + "\n```"
+
+
+def parse_in_chunks(chunks):
+    parser = IncrementalCommentParser()
+    returned = []
+    for chunk in chunks:
+        returned.extend(parser.feed(chunk))
+    assert parser.buffer == RESPONSE
+    assert returned == parser.comments
+    return parser
+
+
+def fixed_chunks(size):
+    return [RESPONSE[start:start + size] for start in range(0, len(RESPONSE), size)]
+
+
+def random_chunks(seed):
+    rng = random.Random(seed)
+    chunks = []
+    start = 0
+    while start < len(RESPONSE):
+        end = start + rng.randint(1, 40)
+        chunks.append(RESPONSE[start:end])
+        start = end
+    return chunks
+
+
+def test_whole_response_in_one_chunk():
+    parser = parse_in_chunks([RESPONSE])
+
+    assert parser.summary == SUMMARY
+    assert parser.comments == COMMENTS
+
+
+def test_every_chunking_gives_the_same_comments():
+    chunkings = [fixed_chunks(size) for size in (1, 2, 3, 7, 31, 32, 33, 64, 500)]
+    chunkings += [random_chunks(seed) for seed in range(20)]
+
+    for chunks in chunkings:
+        parser = parse_in_chunks(chunks)
+        assert parser.summary == SUMMARY
+        assert parser.comments == COMMENTS
+
+
+def test_comments_are_returned_as_their_closing_brace_arrives():
+    parser = IncrementalCommentParser()
+    first_end = RESPONSE.index('"src/util.js"')
+    # Up to the start of the second comment: only the first one is complete
+    assert parser.feed(RESPONSE[:first_end]) == [COMMENTS[0]]
+    assert parser.feed(RESPONSE[first_end:]) == COMMENTS[1:]
+
+
+def test_cut_off_stream_keeps_complete_comments():
+    cut = RESPONSE.index('"docs/café.md"')
+
+    for size in (1, 5, 50):
+        parser = IncrementalCommentParser()
+        for start in range(0, cut, size):
+            parser.feed(RESPONSE[start:min(start + size, cut)])
+        assert parser.summary == SUMMARY
+        assert parser.comments == COMMENTS[:2]